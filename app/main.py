@@ -1,6 +1,20 @@
+import os
+import importlib
 import streamlit as st
-from utils.data_loader import load_model
-from views import dashboard, live_monitor, history
+from utils import telemetry
+from utils.telemetry import span
+
+# Views are imported only when selected, so a rerun of one page never pays for
+# the pydeck/plotly/requests imports of the others.
+VIEW_MODULES = {
+    "SIMULATION_ZONE": "views.dashboard",
+    "LIVE_UPLINK": "views.live_monitor",
+    "HISTORICAL_PRESENTATION": "views.history",
+    "DIAGNOSTICS": "views.diagnostics",
+}
+
+# "1" builds every cache on the first script run (app/serve.py does it at server start)
+WARMUP_ON_FIRST_RUN = os.environ.get("HEAT_RISK_WARMUP") == "1"
 
 # --- CONFIG ---
 st.set_page_config(
@@ -10,12 +24,43 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# --- TELEMETRY ---
+@st.cache_resource
+def metrics_exporter():
+    """Starts the /metrics endpoint once per server process if a port is configured."""
+    port = os.environ.get("HEAT_RISK_METRICS_PORT")
+    return telemetry.start_metrics_server(int(port)) if port else None
+
+metrics_exporter()
+telemetry.start_rerun()
+
+# Multi-process deployments map shared artifacts; a newly published version swaps in here
+if os.environ.get("HEAT_RISK_SHARED_STORE"):
+    from utils.data_loader import follow_shared_store
+    follow_shared_store()
+
+if WARMUP_ON_FIRST_RUN:
+    from utils.warmup import warm_caches
+    with st.spinner("BOOTING_SUBSYSTEMS..."):
+        warm_caches()
+
+# Plain-text metrics view (?metrics=1)
+if st.query_params.get("metrics") == "1":
+    st.text(telemetry.REGISTRY.prometheus_text())
+    st.stop()
+
 # --- LOAD CSS ---
-def local_css(file_name):
+@st.cache_resource
+def read_css(file_name):
+    """Stylesheet text, read from disk once per server process."""
     with open(file_name) as f:
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+        return f.read()
 
-local_css("app/style.css")
+def local_css(file_name):
+    st.markdown(f'<style>{read_css(file_name)}</style>', unsafe_allow_html=True)
+
+with span("load_css"):
+    local_css("app/style.css")
 
 # --- SIDEBAR NAVIGATION (TERMINAL STYLE) ---
 st.sidebar.markdown("### SELECT_MODULE")
@@ -24,17 +69,20 @@ st.sidebar.markdown("---")
 # CLI Style Navigation
 # No Emojis. Just Brackets and Slashes.
 page = st.sidebar.radio(
-    "SELECT_MODULE", 
+    "SELECT_MODULE",
     ["SIMULATION_ZONE", "LIVE_UPLINK", "HISTORICAL_PRESENTATION"],
 )
 
+# Hidden maintenance page (?diagnostics=1), not listed in the navigation
+if st.query_params.get("diagnostics") == "1":
+    page = "DIAGNOSTICS"
+
 st.sidebar.markdown("---")
 st.sidebar.code("v2.1.0 | STABLE_BUILD")
 
 # --- ROUTING ---
-if page == "SIMULATION_ZONE":
-    dashboard.show()
-elif page == "LIVE_UPLINK":
-    live_monitor.show()
-elif page == "HISTORICAL_PRESENTATION":
-    history.show()
\ No newline at end of file
+with span(f"import.{page}"):
+    view = importlib.import_module(VIEW_MODULES[page])
+with span(f"view.{page}"):
+    view.show()
+telemetry.end_rerun(page)
@@ -0,0 +1,53 @@
+"""
+Shared prediction service. Owns one copy of the model and coalesces concurrent
+requests from every Streamlit session into micro-batches.
+
+    python app/prediction_server.py [--port 8765] [--window-ms 2]
+    HEAT_RISK_PREDICTION_URL=http://127.0.0.1:8765 python app/serve.py
+
+With HEAT_RISK_SHARED_STORE set (or --store), the model comes from the live
+store version and is swapped in whenever src/publish_shared_store.py
+publishes a new one, so the service never needs a restart to follow it.
+"""
+import time
+import argparse
+import joblib
+from utils.prediction_service import start_prediction_server, BATCH_WINDOW_MS, MAX_BATCH_ROWS
+from utils.shared_store import SharedStore, STORE_DIR, POLL_S
+
+MODEL_PATH = "models/heat_risk_model.pkl"
+MODEL_NAME = "heat_risk_model.pkl"      # Its name inside a shared-store version
+
+
+def model_path(store):
+    """(version, path) of the model to serve: the live store version's copy, else models/."""
+    version = store.current() if store is not None else None
+    if version is not None and store.has(MODEL_NAME, version):
+        return version, store.path(MODEL_NAME, version)
+    return None, MODEL_PATH
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batching prediction service for the heat-risk model.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window-ms", type=float, default=BATCH_WINDOW_MS)
+    parser.add_argument("--max-rows", type=int, default=MAX_BATCH_ROWS)
+    parser.add_argument("--store", default=STORE_DIR, help="Shared store to follow (defaults to $HEAT_RISK_SHARED_STORE)")
+    args = parser.parse_args()
+
+    store = SharedStore(args.store) if args.store else None
+    version, path = model_path(store)
+    server = start_prediction_server(joblib.load(path), args.host, args.port, args.window_ms, args.max_rows)
+    print(f"🛰️  Prediction service on http://{args.host}:{args.port} (window {args.window_ms} ms, max {args.max_rows} rows) "
+          f"serving {path}")
+    try:
+        while True:
+            time.sleep(POLL_S if store is not None else 3600)
+            live, path = model_path(store)
+            if live != version:
+                server.RequestHandlerClass.batcher.set_model(joblib.load(path))
+                version = live
+                print(f"🔄 Now serving {path}")
+    except KeyboardInterrupt:
+        server.shutdown()
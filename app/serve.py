@@ -0,0 +1,31 @@
+"""
+Production launcher. Starts the Streamlit server for app/main.py and warms the
+shared caches (model, geometry, baseline, history frames) inside the server
+process, so the first operator to connect doesn't pay for them.
+
+    python app/serve.py [--server.port 8501 ...]
+"""
+import os
+import sys
+import time
+import threading
+from streamlit.web import cli as stcli
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+def _warm_when_server_starts():
+    from streamlit.runtime import Runtime
+
+    while not Runtime.exists():
+        time.sleep(0.1)
+
+    from utils.warmup import warm_caches
+    print("🔥 Warming caches...")
+    t0 = time.perf_counter()
+    timings = warm_caches()
+    print(f"✅ Caches warm in {time.perf_counter() - t0:.1f}s {timings}")
+
+if __name__ == "__main__":
+    threading.Thread(target=_warm_when_server_starts, daemon=True, name="cache-warmup").start()
+    sys.argv = ["streamlit", "run", APP_SCRIPT, *sys.argv[1:]]
+    sys.exit(stcli.main())
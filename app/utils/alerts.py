@@ -0,0 +1,303 @@
+# app/utils/alerts.py
+import os
+import heapq
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+
+LEVELS = (2, 3)                     # Danger, Extreme
+LEVEL_LABELS = {0: "NONE", 2: "DANGER", 3: "EXTREME"}
+LOWER = {3: 2, 2: 0}
+RAISE_AFTER_H = {2: 2, 3: 1}        # Hours the class must hold before an alert is raised / escalated
+EXIT_CLASS = {2: 1, 3: 2}           # Hysteresis: a level holds until the class drops below this...
+CLEAR_AFTER_H = 3                   # ...for this many hours, then steps down one level
+NEVER = np.iinfo(np.int64).min
+_WRITER_LOCKS = {}                  # realpath -> open lock file, per process
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    alert_id INTEGER PRIMARY KEY, district_id INTEGER, level INTEGER, peak_level INTEGER,
+    opened_at INTEGER, updated_at INTEGER, closed_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS alerts_open ON alerts (closed_at);
+CREATE TABLE IF NOT EXISTS alert_events (
+    time INTEGER, alert_id INTEGER, district_id INTEGER, kind TEXT, from_level INTEGER, to_level INTEGER
+);
+CREATE TABLE IF NOT EXISTS district_state (
+    district_id INTEGER PRIMARY KEY, risk INTEGER, level INTEGER, alert_id INTEGER,
+    above_danger INTEGER, above_extreme INTEGER, exit_since INTEGER, updated_at INTEGER
+);
+"""
+
+
+def to_seconds(time):
+    return int(pd.Timestamp(time).timestamp())
+
+
+class AlertStore:
+    """
+    SQLite persistence: alert rows, an append-only event log and the per-district machine state.
+
+    The engine keeps its machines in memory and writes them back, so a file has
+    exactly one writer: the store holds an exclusive lock on `<path>.lock` for
+    its lifetime and a second process opening the same file gets a RuntimeError.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock_file = self._acquire_writer_lock(path)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _acquire_writer_lock(path):
+        """Held until the process exits; reused if this process reopens the file (e.g. a cleared resource cache)."""
+        if fcntl is None:           # No advisory locks on this platform (Windows): single writer by convention
+            return None
+        key = os.path.realpath(path)
+        if key not in _WRITER_LOCKS:
+            f = open(path + ".lock", "w")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.close()
+                raise RuntimeError(f"{path} is already open for writing by another process; "
+                                   "give each process its own alerts database (HEAT_RISK_ALERTS_DB)") from None
+            _WRITER_LOCKS[key] = f
+        return _WRITER_LOCKS[key]
+
+    def load(self):
+        state = pd.read_sql("SELECT * FROM district_state", self.conn)
+        alerts = pd.read_sql("SELECT * FROM alerts WHERE closed_at IS NULL", self.conn)
+        return state, alerts
+
+    @staticmethod
+    def snapshot(path):
+        """(state, open alerts) read without taking the writer lock, for processes that do not own the file."""
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return (pd.read_sql("SELECT * FROM district_state", conn),
+                    pd.read_sql("SELECT * FROM alerts WHERE closed_at IS NULL", conn))
+        finally:
+            conn.close()
+
+    def open_alert(self, district_id, level, t):
+        """
+        Inserts a new alert row and returns the alert_id SQLite assigned to it.
+        The insert opens the transaction that the following write() commits.
+        """
+        cur = self.conn.execute("INSERT INTO alerts (district_id, level, peak_level, opened_at, updated_at) "
+                                "VALUES (?, ?, ?, ?, ?)", (district_id, level, level, t, t))
+        return cur.lastrowid
+
+    def write(self, state_rows, alert_rows, events):
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO district_state VALUES (?, ?, ?, ?, ?, ?, ?, ?)", state_rows)
+            self.conn.executemany("INSERT OR REPLACE INTO alerts VALUES (?, ?, ?, ?, ?, ?, ?)", alert_rows)
+            self.conn.executemany("INSERT INTO alert_events VALUES (?, ?, ?, ?, ?, ?)", events)
+
+    def events(self, limit=200):
+        df = pd.read_sql("SELECT * FROM alert_events ORDER BY time DESC, rowid DESC LIMIT ?", self.conn, params=(limit,))
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        return df
+
+
+class AlertEngine:
+    """
+    Per-district alert state machines fed by a stream of predicted classes.
+
+    An alert opens once the class holds at Danger+ for RAISE_AFTER_H, escalates
+    the same way to Extreme, and steps down only after the class has stayed
+    below EXIT_CLASS for CLEAR_AFTER_H (hysteresis). Each district has at most
+    one open alert, so repeated readings never duplicate it.
+
+    An update only touches districts whose class changed. Dwell timers wait in
+    a heap and are invalidated by a per-district version counter, so the cost
+    per update is O(changed + due) rather than a rescan of every district.
+    """
+
+    def __init__(self, n_districts, store=None):
+        n = n_districts
+        self.risk = np.full(n, -1, dtype=np.int8)
+        self.level = np.zeros(n, dtype=np.int8)
+        self.alert_id = np.full(n, -1, dtype=np.int64)
+        self.above_since = np.full((n, len(LEVELS)), NEVER, dtype=np.int64)
+        self.exit_since = np.full(n, NEVER, dtype=np.int64)
+        self.updated_at = np.full(n, NEVER, dtype=np.int64)
+        self.version = np.zeros(n, dtype=np.int64)
+        self.alerts = {}            # Open alerts: alert_id -> row dict
+        self.next_id = 0            # Only used without a store; with one, SQLite assigns alert IDs
+        self._heap = []
+        self._lock = threading.Lock()
+        self.store = store
+        if store is not None:
+            self._restore(*store.load())
+
+    @classmethod
+    def from_snapshot(cls, n_districts, path):
+        """
+        Memory-only engine starting from another process's store: it shows the
+        alerts open at load time and keeps running, but persists nothing.
+        """
+        engine = cls(n_districts)
+        try:
+            state, alerts = AlertStore.snapshot(path)
+        except (sqlite3.Error, pd.errors.DatabaseError):
+            return engine                   # The owner has not created the schema yet
+        engine._restore(state, alerts)
+        engine.next_id = int(alerts['alert_id'].max()) + 1 if len(alerts) else 0
+        return engine
+
+    def _restore(self, state, alerts):
+        d = state['district_id'].to_numpy(np.int64)
+        self.risk[d] = state['risk'].to_numpy(np.int8)
+        self.level[d] = state['level'].to_numpy(np.int8)
+        self.alert_id[d] = state['alert_id'].to_numpy(np.int64)
+        self.above_since[d, 0] = state['above_danger'].to_numpy(np.int64)
+        self.above_since[d, 1] = state['above_extreme'].to_numpy(np.int64)
+        self.exit_since[d] = state['exit_since'].to_numpy(np.int64)
+        self.updated_at[d] = state['updated_at'].to_numpy(np.int64)
+        self.alerts = {int(r['alert_id']): r for r in alerts.to_dict('records')}
+        for district in d.tolist():
+            self._schedule(district)
+
+    # --- State machine ---
+    def _on_class(self, d, c, t):
+        prev = self.risk[d]
+        self.risk[d] = c
+        self.version[d] += 1
+        for j, lvl in enumerate(LEVELS):
+            if c < lvl:
+                self.above_since[d, j] = NEVER
+            elif prev < lvl:
+                self.above_since[d, j] = t
+        level = self.level[d]
+        if level and c < EXIT_CLASS[level]:
+            if self.exit_since[d] == NEVER:
+                self.exit_since[d] = t
+        else:
+            self.exit_since[d] = NEVER
+        self._schedule(d)
+
+    def _schedule(self, d):
+        level, version = self.level[d], self.version[d]
+        for j, lvl in enumerate(LEVELS):
+            if lvl > level and self.above_since[d, j] != NEVER:
+                heapq.heappush(self._heap, (int(self.above_since[d, j]) + RAISE_AFTER_H[lvl] * 3600, d, int(version), lvl))
+        if level and self.exit_since[d] != NEVER:
+            heapq.heappush(self._heap, (int(self.exit_since[d]) + CLEAR_AFTER_H * 3600, d, int(version), 0))
+
+    def _fire_due(self, now, events, touched):
+        while self._heap and self._heap[0][0] <= now:
+            due, d, version, target = heapq.heappop(self._heap)
+            if version != self.version[d]:
+                continue                        # The class changed since this timer was set
+            old = int(self.level[d])
+            if target:                          # Raise / escalate
+                if target <= old:
+                    continue
+                new = target
+                self.exit_since[d] = NEVER
+            else:                               # Step down one level
+                new = LOWER[old]
+                self.version[d] += 1
+                self.exit_since[d] = due if new and self.risk[d] < EXIT_CLASS[new] else NEVER
+            self.level[d] = new
+            kind, aid = self._transition(d, old, new, due)
+            events.append((due, aid, d, kind, old, new))
+            touched.add(d)
+            if not target:
+                self._schedule(d)
+
+    def _transition(self, d, old, new, t):
+        """Updates the alert row for a level change; returns (kind, alert_id)."""
+        if old == 0:
+            if self.store is not None:
+                aid = self.store.open_alert(d, new, t)
+            else:
+                aid = self.next_id
+                self.next_id += 1
+            self.alert_id[d] = aid
+            self.alerts[aid] = {'alert_id': aid, 'district_id': d, 'level': new, 'peak_level': new,
+                                'opened_at': t, 'updated_at': t, 'closed_at': None}
+            return "RAISED", aid
+        aid = int(self.alert_id[d])
+        row = self.alerts[aid]
+        row['level'], row['updated_at'] = new, t
+        if new == 0:
+            row['closed_at'] = t
+            self.alert_id[d] = -1
+            return "CLEARED", aid
+        row['peak_level'] = max(row['peak_level'], new)
+        return ("ESCALATED" if new > old else "DOWNGRADED"), aid
+
+    # --- Public API ---
+    def update(self, district_ids, classes, time):
+        """
+        Feeds one reading per district (any subset) at `time` and returns the
+        alert transitions it caused, including timers that fell due by then.
+        """
+        now = to_seconds(time)
+        ids = np.asarray(district_ids, dtype=np.int64)
+        classes = np.asarray(classes, dtype=np.int8)
+        with self._lock:
+            fresh = self.updated_at[ids] <= now           # Late readings are ignored
+            ids, classes = ids[fresh], classes[fresh]
+            changed = classes != self.risk[ids]
+            events, touched = [], set()
+
+            # Timers due by now still see the old classes (they held until this reading)
+            self._fire_due(now, events, touched)
+            self.updated_at[ids] = now
+            for d, c in zip(ids[changed].tolist(), classes[changed].tolist()):
+                self._on_class(d, c, now)
+                touched.add(d)
+            self._fire_due(now, events, touched)     # Zero-dwell rules fire immediately
+
+            if self.store is not None and touched:
+                self._persist(touched, events)
+            for aid in [a for a, r in self.alerts.items() if r['closed_at'] is not None]:
+                del self.alerts[aid]
+        return self._frame(events)
+
+    def advance(self, time):
+        """Lets dwell timers fire without new readings (e.g. on a polling tick)."""
+        return self.update([], [], time)
+
+    def consume(self, frame, risk_col='pred_risk'):
+        """Replays a long (time, district_id, class) frame hour by hour; returns all transitions."""
+        out = [self.update(g['district_id'].to_numpy(), g[risk_col].to_numpy(), t)
+               for t, g in frame.sort_values('time').groupby('time', sort=True)]
+        return pd.concat(out, ignore_index=True) if out else self._frame([])
+
+    def open_alerts(self):
+        with self._lock:
+            df = pd.DataFrame(list(self.alerts.values()), columns=['alert_id', 'district_id', 'level', 'peak_level',
+                                                                   'opened_at', 'updated_at', 'closed_at'])
+        for c in ('opened_at', 'updated_at'):
+            df[c] = pd.to_datetime(df[c], unit='s')
+        return df.drop(columns='closed_at').sort_values(['level', 'opened_at'], ascending=[False, True])
+
+    # --- Persistence ---
+    def _persist(self, touched, events):
+        d = np.fromiter(touched, dtype=np.int64)
+        state = list(zip(d.tolist(), self.risk[d].tolist(), self.level[d].tolist(), self.alert_id[d].tolist(),
+                         self.above_since[d, 0].tolist(), self.above_since[d, 1].tolist(),
+                         self.exit_since[d].tolist(), self.updated_at[d].tolist()))
+        alert_ids = {e[1] for e in events}
+        alert_rows = [tuple(r[k] for k in ('alert_id', 'district_id', 'level', 'peak_level', 'opened_at', 'updated_at', 'closed_at'))
+                      for a, r in self.alerts.items() if a in alert_ids]
+        self.store.write(state, alert_rows, events)
+
+    @staticmethod
+    def _frame(events):
+        df = pd.DataFrame(events, columns=['time', 'alert_id', 'district_id', 'kind', 'from_level', 'to_level'])
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        return df
@@ -4,39 +4,183 @@ import pandas as pd
 import joblib
 import json
 import os
+from utils.telemetry import timed
+from utils.districts import DistrictRegistry, REGISTRY_PATH
+from utils.alerts import AlertEngine, AlertStore
+from utils.spatial_index import DistrictIndex
+from utils.explain import Explainer
+from utils.drift import DriftMonitor, REFERENCE_PATH as DRIFT_REFERENCE_PATH
+from utils.shared_store import SharedStore, STORE_DIR
 
-@st.cache_resource
+# --- SHARED STORE (multi-process deployments; see src/publish_shared_store.py) ---
+SHARED = SharedStore(STORE_DIR) if STORE_DIR else None
+_DERIVED = []           # Resource caches computed from shared assets
+_seen_version = None
+
+def derived(cached):
+    """Registers a cached function built from shared assets, so a newly published version drops it."""
+    _DERIVED.append(cached)
+    return cached
+
+def follow_shared_store():
+    """Called once per rerun. When a new version has gone live, clears every cache built from the old one."""
+    global _seen_version
+    if SHARED is None:
+        return None
+    version = SHARED.current()
+    if version != _seen_version:
+        if _seen_version is not None:
+            st.cache_data.clear()
+            for cached in _DERIVED:
+                cached.clear()
+        _seen_version = version
+    return version
+
+def asset_path(name, local_path):
+    """The artifact in the live store version, or the local file when there is no store."""
+    version = SHARED.current() if SHARED is not None else None
+    if version is not None and SHARED.has(name, version):
+        return SHARED.path(name, version)
+    return local_path
+
+def shared_table(name):
+    """Read-only mapped frame from the live store version; None means read app/data as usual."""
+    version = SHARED.current() if SHARED is not None else None
+    if version is None or not SHARED.has(name, version):
+        return None
+    return _map_table(name, version)
+
+@st.cache_resource(max_entries=8)
+def _map_table(name, version):
+    return SHARED.table(name, version)
+
+def model_path():
+    """Model file of the live store version (models/ without a store); the ensemble pool loads it too."""
+    return asset_path("heat_risk_model.pkl", "models/heat_risk_model.pkl")
+
+@timed("load_model")
 def load_model():
     """Loads the trained ML model."""
-    path = "models/heat_risk_model.pkl"
+    return _read_model(model_path())
+
+@st.cache_resource(max_entries=2)
+def _read_model(path):
     if not os.path.exists(path):
         st.error("🚨 Model not found! Please check 'models/' folder.")
         return None
     return joblib.load(path)
 
+@derived
+@st.cache_resource
+def load_explainer():
+    """Feature attributions for the loaded model; one quantized cache shared by every session."""
+    model = load_model()
+    return Explainer(model) if hasattr(model, 'get_booster') else None
+
+@timed("load_drift_monitor")
 @st.cache_resource
+def load_drift_monitor():
+    """Live-vs-training input histograms shared by every session; None until src/build_drift_reference.py has run."""
+    if not os.path.exists(DRIFT_REFERENCE_PATH):
+        return None
+    return DriftMonitor.load(DRIFT_REFERENCE_PATH)
+
+@timed("load_map_geojson")
 def load_map_geojson():
     """Loads the optimized district map."""
-    path = "app/data/pakistan_districts.geojson"
+    return _read_geojson(asset_path("pakistan_districts.geojson", "app/data/pakistan_districts.geojson"))
+
+@st.cache_resource(max_entries=2)
+def _read_geojson(path):
     if not os.path.exists(path):
         st.error("🚨 Map GeoJSON not found!")
         return None
     with open(path, 'r') as f:
         return json.load(f)
 
-@st.cache_data
+@timed("load_registry")
+@st.cache_resource
+def load_registry():
+    """District IDs <-> names. Older data folders without a registry get one built from the baseline."""
+    if os.path.exists(REGISTRY_PATH):
+        return DistrictRegistry.load(REGISTRY_PATH)
+    return DistrictRegistry.build(pd.read_csv("app/data/app_baseline.csv", usecols=['district_name'])['district_name'])
+
+@timed("load_district_index")
+@derived
+@st.cache_resource
+def load_district_index():
+    """Point-to-district STRtree over the map, built once per process."""
+    return DistrictIndex.from_geojson(load_map_geojson(), load_registry())
+
+@timed("load_baseline_data")
 def load_baseline_data():
     """Loads the 2023 seasonal baseline."""
-    return pd.read_csv("app/data/app_baseline.csv")
+    shared = shared_table("baseline")
+    return _read_baseline() if shared is None else shared
+
+@st.cache_data
+def _read_baseline():
+    return load_registry().attach(pd.read_csv("app/data/app_baseline.csv"))
+
+@timed("load_climatology")
+@st.cache_data
+def load_climatology():
+    """Multi-year baselines (mean/p50/p90/p99 per district and month); None until build_climatology.py has run."""
+    path = "app/data/app_climatology.csv"
+    if not os.path.exists(path):
+        return None
+    return load_registry().attach(pd.read_csv(path))
+
+@timed("load_heatwave_events")
+@st.cache_data
+def load_heatwave_events():
+    """Heatwave event catalogue (largest exposure first); None until detect_heatwaves.py has run."""
+    path = "app/data/app_heatwave_events.csv"
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, index_col='event_id', parse_dates=['start', 'end'])
+
+@st.cache_resource
+def load_alert_engine():
+    """
+    One alert engine per server process, persisted to SQLite (HEAT_RISK_ALERTS_DB overrides the path).
+    The database takes a single writer: when another process already owns it, this process gets a
+    memory-only engine seeded from the database (engine.store is None) instead of failing.
+    """
+    path = os.environ.get("HEAT_RISK_ALERTS_DB", "app/data/alerts.sqlite")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        return AlertEngine(len(load_registry()), AlertStore(path))
+    except RuntimeError:
+        return AlertEngine.from_snapshot(len(load_registry()), path)
 
+@timed("load_coords")
 @st.cache_data
 def load_coords():
     """Loads Lat/Lon for Live Monitor."""
     return pd.read_csv("app/data/district_coords.csv").set_index('district_name')
 
-@st.cache_data
+@timed("load_history")
 def load_history():
     """Loads 2015 heatwave slice."""
-    df = pd.read_csv("app/data/app_history_2015.csv")
+    shared = shared_table("history")
+    return _read_history() if shared is None else shared
+
+@st.cache_data
+def _read_history():
+    df = load_registry().attach(pd.read_csv("app/data/app_history_2015.csv"))
+    df['time'] = pd.to_datetime(df['time'])
+    return df.sort_values('time')
+
+@timed("load_season_hourly")
+def load_season_hourly():
+    """Loads the hourly 2023 season used by the season simulation."""
+    shared = shared_table("season")
+    return _read_season_hourly() if shared is None else shared
+
+@st.cache_data
+def _read_season_hourly():
+    df = load_registry().attach(pd.read_parquet("app/data/app_season_2023.parquet"))
     df['time'] = pd.to_datetime(df['time'])
-    return df.sort_values('time')
\ No newline at end of file
+    return df.sort_values(['district_id', 'time'])
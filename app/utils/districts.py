@@ -0,0 +1,119 @@
+# app/utils/districts.py
+import os
+import numpy as np
+import pandas as pd
+
+REGISTRY_PATH = "app/data/district_registry.csv"
+
+# Every GADM / ERA5 spelling we have met, resolved once to the canonical name.
+# Keys are matched after whitespace cleanup and again after Title Case.
+ALIASES = {
+    # Typos / alternate spellings
+    "Jakobabad": "Jacobabad",
+    "Attok": "Attock",
+    "Mirphurkhas": "Mirpur Khas",
+    "Dera Ghazi Kha": "Dera Ghazi Khan",
+    "Tando M. Khan": "Tando Muhammad Khan",
+    "M. B. Din": "Mandi Bahauddin",
+    "Gujarat": "Gujrat",
+
+    # Split districts (GADM artifacts)
+    "Gujranwala 1": "Gujranwala",
+    "Gujranwala 2": "Gujranwala",
+    "Narowal 1": "Narowal",
+    "Narowal 2": "Narowal",
+    "Okara 1": "Okara",
+
+    # Tribal / special areas
+    "Malakand P.A.": "Malakand",
+    "N. Waziristan": "North Waziristan",
+    "S. Waziristan": "South Waziristan",
+    "Adam Khel": "Kohat",
+    "Bhitani": "Lakki Marwat",
+    "Largha Shirani": "Sherani",
+}
+
+# Disputed / irrelevant slivers dropped in Notebook 02
+EXCLUDED = {"Disputed Area 1", "Kargil", "Ladakh (Leh)", "Kupwara (Gilgit Wazarat)"}
+
+
+def canonical_name(name):
+    """One raw spelling -> canonical district name (None for missing values)."""
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return None
+    key = " ".join(str(name).split())
+    key = ALIASES.get(key, key).title()
+    return ALIASES.get(key, key)
+
+
+def canonicalize(names):
+    """Vectorised canonical_name: resolves each distinct spelling once, then maps by code."""
+    names = pd.Series(names)
+    codes, uniques = pd.factorize(names, use_na_sentinel=True)
+    resolved = np.array([canonical_name(u) for u in uniques] + [None], dtype=object)
+    return pd.Series(resolved[codes], index=names.index, name='district_name')
+
+
+class DistrictRegistry:
+    """
+    Canonical districts with compact integer IDs (sorted by name, 0..N-1).
+    IDs are the join key; names are attached as a categorical for display.
+    """
+
+    def __init__(self, names, extra=None):
+        self.names = pd.Index(names, name='district_name')
+        self.dtype = pd.CategoricalDtype(self.names)
+        self.extra = extra if extra is not None else pd.DataFrame(index=range(len(self.names)))
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def build(cls, raw_names):
+        names = canonicalize(raw_names).dropna()
+        return cls(sorted(set(names) - EXCLUDED))
+
+    @classmethod
+    def load(cls, path=REGISTRY_PATH):
+        df = pd.read_csv(path).sort_values('district_id')
+        return cls(df['district_name'].tolist(), extra=df.drop(columns=['district_id', 'district_name']).reset_index(drop=True))
+
+    @classmethod
+    def load_or_build(cls, raw_names, path=REGISTRY_PATH):
+        """The saved registry if there is one; otherwise built from `raw_names` and saved."""
+        if os.path.exists(path):
+            return cls.load(path)
+        registry = cls.build(raw_names)
+        registry.save(path)
+        return registry
+
+    def save(self, path=REGISTRY_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.frame().to_csv(path, index=False)
+        return path
+
+    def frame(self):
+        df = pd.DataFrame({'district_id': np.arange(len(self.names), dtype=np.int16), 'district_name': self.names})
+        return pd.concat([df, self.extra], axis=1)
+
+    def ids(self, raw_names):
+        """Raw or canonical names -> int16 IDs (-1 for unknown or excluded)."""
+        codes, uniques = pd.factorize(pd.Series(raw_names), use_na_sentinel=True)
+        lookup = np.append(self.names.get_indexer(canonicalize(pd.Series(uniques))), -1)
+        return lookup[codes].astype(np.int16)
+
+    def categorical(self, ids):
+        """IDs -> categorical names (codes are the IDs, so no string data is copied)."""
+        return pd.Categorical.from_codes(np.asarray(ids, dtype=np.int64), dtype=self.dtype)
+
+    def attach(self, df):
+        """
+        Ensures `district_id` (int16) and a categorical `district_name` on a table,
+        from whichever of the two it carries. Rows that do not resolve are dropped.
+        """
+        ids = df['district_id'].to_numpy(np.int16) if 'district_id' in df else self.ids(df['district_name'])
+        df = df.loc[ids >= 0].copy() if (ids < 0).any() else df.copy()
+        ids = ids[ids >= 0]
+        df['district_id'] = ids
+        df['district_name'] = self.categorical(ids)
+        return df
@@ -0,0 +1,158 @@
+# app/utils/drift.py
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+from utils.sketches import KeyedHistogram
+
+REFERENCE_PATH = "app/data/drift_reference.npz"
+
+# (lo, hi, bins) per live model input; same resolution as the climatology sketches
+DRIFT_BINS = {
+    'temp_c':            (-10, 60, 280),     # 0.25 C
+    'humidity_relative': (0, 100, 200),      # 0.5 %
+    'wind_speed_m_s':    (0, 30, 300),       # 0.1 m/s
+    'solar_w_m2':        (0, 1200, 240),     # 5 W/m2
+}
+PSI_GROUPS = 10             # PSI over reference deciles (per district), not the fine bins
+PSI_FLOOR = 1e-4            # Share given to empty groups so the log stays finite
+PSI_WARN, PSI_DRIFT = 0.10, 0.25
+KS_ALPHA_C = 1.63           # Two-sample KS critical coefficient at alpha = 0.01
+MIN_LIVE = 24               # Live readings before a district is judged
+HALF_LIFE_H = 24 * 7        # Live sketches forget old readings with this half-life
+
+
+def _sketches(n_keys, dtype=np.int64):
+    return {c: KeyedHistogram(n_keys, lo, hi, bins, dtype=dtype) for c, (lo, hi, bins) in DRIFT_BINS.items()}
+
+
+def psi(ref_counts, live_counts, groups=PSI_GROUPS):
+    """
+    Population stability index per row of two (keys, bins) count matrices.
+    Fine bins are pooled into `groups` quantile groups of the reference, so
+    every key is compared on its own deciles.
+    """
+    ref = np.asarray(ref_counts, dtype=np.float64)
+    live = np.asarray(live_counts, dtype=np.float64)
+    n_ref, n_live = ref.sum(axis=1, keepdims=True), live.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        below = (np.cumsum(ref, axis=1) - ref) / n_ref          # Reference share before each bin
+    group = np.clip(np.nan_to_num(below * groups), 0, groups - 1).astype(np.int64)
+    flat = (np.arange(len(ref))[:, None] * groups + group).ravel()
+    p = np.bincount(flat, weights=ref.ravel(), minlength=len(ref) * groups).reshape(-1, groups)
+    q = np.bincount(flat, weights=live.ravel(), minlength=len(ref) * groups).reshape(-1, groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p = np.maximum(p / n_ref, PSI_FLOOR)
+        q = np.maximum(q / n_live, PSI_FLOOR)
+    out = ((q - p) * np.log(q / p)).sum(axis=1)
+    out[(n_ref[:, 0] == 0) | (n_live[:, 0] == 0)] = np.nan
+    return out
+
+
+def ks(ref_counts, live_counts):
+    """Largest gap between the two binned CDFs per row (KS statistic at bin resolution)."""
+    ref = np.cumsum(ref_counts, axis=1, dtype=np.float64)
+    live = np.cumsum(live_counts, axis=1, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.abs(ref / ref[:, -1:] - live / live[:, -1:]).max(axis=1)
+
+
+class DriftMonitor:
+    """
+    Per-district histograms of the live model inputs against the same sketches
+    of the training set. Live counts decay with HALF_LIFE_H, so the monitor
+    follows recent inputs in fixed memory however long it runs, and every
+    metric is computed from the bins alone (cost independent of stream length).
+    """
+
+    def __init__(self, reference, half_life_h=HALF_LIFE_H):
+        self.reference = reference
+        n = len(next(iter(reference.values())).counts)
+        self.live = _sketches(n, dtype=np.float64)
+        self.last_seen = np.full(n, np.iinfo(np.int64).min, dtype=np.int64)   # Hour of the newest reading
+        self.clock = None
+        self.half_life_h = half_life_h
+        self._lock = threading.Lock()
+
+    @property
+    def n_districts(self):
+        return len(self.last_seen)
+
+    def observe(self, district_ids, frame):
+        """
+        Adds live input rows (DRIFT_BINS columns and 'time'). Readings at or before
+        a district's newest hour are skipped, so re-fetched hours count once.
+        Each row is weighted by its age against the clock, so a batch of hours
+        ends up with the same counts as streaming it hour by hour.
+        Returns the number of rows added.
+        """
+        ids = np.asarray(district_ids, dtype=np.int64)
+        times = frame['time'] if pd.api.types.is_datetime64_dtype(frame['time']) else pd.to_datetime(frame['time'])
+        t = np.asarray(times, dtype='datetime64[h]').astype(np.int64)     # Hours since the epoch
+        with self._lock:
+            new = (ids >= 0) & (t > self.last_seen[np.clip(ids, 0, None)])
+            if not new.any():
+                return 0
+            ids, t = ids[new], t[new]
+            self._decay_to(int(t.max()))
+            weights = 0.5 ** ((self.clock - t) / self.half_life_h)
+            for c, sketch in self.live.items():
+                sketch.add(ids, frame[c].to_numpy(np.float64)[new], weights)
+            np.maximum.at(self.last_seen, ids, t)
+        return int(new.sum())
+
+    def _decay_to(self, now):
+        if self.clock is not None and now > self.clock:
+            factor = 0.5 ** ((now - self.clock) / self.half_life_h)
+            for sketch in self.live.values():
+                sketch.counts *= factor
+                sketch.total *= factor
+        self.clock = now if self.clock is None else max(self.clock, now)
+
+    def report(self):
+        """Long frame of PSI / KS / flag per feature and district, plus a national row (district_id -1)."""
+        frames = []
+        with self._lock, np.errstate(invalid='ignore', divide='ignore'):
+            for c, ref in self.reference.items():
+                live = self.live[c]
+                ref_all = np.vstack([ref.counts, ref.counts.sum(axis=0)])
+                live_all = np.vstack([live.counts, live.counts.sum(axis=0)])
+                n_ref, n_live = ref_all.sum(axis=1), live_all.sum(axis=1)
+                frames.append(pd.DataFrame({
+                    'feature': c,
+                    'district_id': np.r_[np.arange(self.n_districts), -1],
+                    'n_live': n_live,
+                    'psi': psi(ref_all, live_all),
+                    'ks': ks(ref_all, live_all),
+                    'ks_crit': KS_ALPHA_C * np.sqrt((n_ref + n_live) / (n_ref * n_live)),
+                    'train_mean': np.r_[ref.mean(), ref.total.sum() / n_ref[-1]],
+                    'live_mean': np.r_[live.mean(), live.total.sum() / n_live[-1]],
+                }))
+        df = pd.concat(frames, ignore_index=True)
+        judged = df['n_live'] >= MIN_LIVE
+        df['status'] = np.select(
+            [~judged, (df['psi'] > PSI_DRIFT) | (df['ks'] > df['ks_crit']), df['psi'] > PSI_WARN],
+            ["NO_DATA", "DRIFT", "WATCH"], "STABLE")
+        return df
+
+    # --- Persistence (reference only; live sketches are rebuilt from the stream) ---
+    @staticmethod
+    def build_reference(n_districts):
+        return _sketches(n_districts)
+
+    @staticmethod
+    def save_reference(reference, path=REFERENCE_PATH, meta=None):
+        arrays = {f"{c}.{k}": v for c, sketch in reference.items() for k, v in sketch.to_state().items()}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(path, meta=json.dumps(meta or {}), **arrays)
+
+    @classmethod
+    def load(cls, path=REFERENCE_PATH):
+        with np.load(path) as z:
+            reference = {c: KeyedHistogram.from_state({k: z[f"{c}.{k}"] for k in ('lo', 'hi', 'n_bins', 'counts', 'total')})
+                         for c in DRIFT_BINS}
+            meta = json.loads(str(z['meta']))
+        monitor = cls(reference)
+        monitor.meta = meta
+        return monitor
@@ -0,0 +1,218 @@
+# app/utils/ensemble.py
+import os
+import atexit
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import joblib
+import numpy as np
+import pandas as pd
+from utils.model_engine import REQUIRED_FEATURES, NEIGHBOUR_FEATURES, model_features
+from utils.physics import heat_index, risk_class
+from utils.sketches import KeyedHistogram
+from utils.spatial_graph import load_graph
+
+MODEL_PATH = "models/heat_risk_model.pkl"
+BATCH_MEMBERS = 256             # Members per predict call (256 x 141 districts ~ 36k rows)
+TASK_MEMBERS = 1024             # Members per pool task; results stream back per task
+HI_BINS = (-10.0, 100.0, 440)   # 0.25 C heat-index bins for the quantile sketches
+DISTRIBUTIONS = ["UNIFORM", "TRIANGULAR", "NORMAL"]
+STRESSORS = ['d_temp', 'd_rh', 'd_pop']
+BASE_COLUMNS = ['population_2020', 'temp_c', 'humidity_relative', 'wind_speed_m_s',
+                'solar_w_m2', 'temp_roll_24h', 'hi_max_72h']
+
+
+def sample_stressors(specs, n, seed=None):
+    """
+    Draws an (n, 3) matrix of (d_temp, d_rh, d_pop). Each spec is (dist, low, high);
+    TRIANGULAR peaks mid-range and NORMAL treats low/high as its 5-95% interval.
+    """
+    rng = np.random.default_rng(seed)
+    cols = []
+    for name in STRESSORS:
+        dist, low, high = specs[name]
+        if high <= low or dist == "UNIFORM":
+            cols.append(rng.uniform(low, high, n) if high > low else np.full(n, float(low)))
+        elif dist == "TRIANGULAR":
+            cols.append(rng.triangular(low, (low + high) / 2, high, n))
+        elif dist == "NORMAL":
+            cols.append(rng.normal((low + high) / 2, (high - low) / (2 * 1.645), n))
+        else:
+            raise ValueError(f"Unknown distribution: {dist}")
+    return np.column_stack(cols)
+
+
+def month_arrays(baseline, month):
+    """One month of the baseline as plain arrays (cheap to ship to workers)."""
+    b = baseline[baseline['month'] == month]
+    return {'districts': b['district_name'].to_numpy(), 'district_ids': b['district_id'].to_numpy(np.int64),
+            **{c: b[c].to_numpy(np.float64) for c in BASE_COLUMNS}}
+
+
+def scenario_matrix(base, stressors, features=REQUIRED_FEATURES):
+    """
+    Vectorised `simulate_scenario` for a (members, 3) stressor block: returns
+    the (members * districts) feature frame and the (members, districts) heat index.
+    """
+    d_temp, d_rh, d_pop = (stressors[:, i:i + 1] for i in range(3))
+    temp = base['temp_c'] + d_temp
+    rh = np.clip(base['humidity_relative'] + d_rh, 0, 100)
+    pop = base['population_2020'] * (1 + d_pop / 100)
+    hi = heat_index(temp, rh).reshape(temp.shape)
+    shape = temp.shape
+
+    risk_lag = risk_class(hi)
+    columns = {
+        'population_2020': pop.ravel(),
+        'pop_log': np.log10(pop + 1).ravel(),
+        'temp_c': temp.ravel(),
+        'humidity_relative': rh.ravel(),
+        'wind_speed_m_s': np.broadcast_to(base['wind_speed_m_s'], shape).ravel(),
+        'solar_w_m2': np.broadcast_to(base['solar_w_m2'], shape).ravel(),
+        'temp_roll_24h': (base['temp_roll_24h'] + d_temp).ravel(),
+        'hi_max_72h': np.maximum(base['hi_max_72h'], hi).ravel(),
+        'risk_lag_1h': risk_lag.ravel(),
+    }
+    if any(c in NEIGHBOUR_FEATURES for c in features):
+        # Districts on axis 0: every member is one column of the same sparse product
+        nb = load_graph().neighbour_features(base['district_ids'], hi.T, risk_lag.reshape(shape).T)
+        columns.update({k: v.T.ravel() for k, v in nb.items()})
+    return pd.DataFrame({c: columns[c] for c in features}), hi, pop
+
+
+class EnsembleAccumulator:
+    """Streaming per-district class counts and heat-index sketches; members are never stored."""
+
+    def __init__(self, n_districts):
+        self.members = 0
+        self.class_counts = np.zeros((n_districts, 4), dtype=np.int64)
+        self.hi = KeyedHistogram(n_districts, *HI_BINS)
+        self.extreme_sectors = np.zeros(n_districts + 1, dtype=np.int64)   # Members with k Extreme districts
+        self.pop_extreme = KeyedHistogram(1, 0, 500, 1000)                  # Millions of people at Extreme
+
+    def add(self, preds, hi, pop):
+        n_m, n_d = preds.shape
+        self.members += n_m
+        self.class_counts += np.bincount((np.arange(n_d) * 4 + preds).ravel(), minlength=n_d * 4).reshape(n_d, 4)
+        self.hi.add_rows(hi)
+        extreme = preds == 3
+        self.extreme_sectors += np.bincount(extreme.sum(axis=1), minlength=n_d + 1)
+        self.pop_extreme.add(np.zeros(n_m), (pop * extreme).sum(axis=1) / 1e6)
+
+    def merge(self, other):
+        self.members += other.members
+        self.class_counts += other.class_counts
+        self.hi.merge(other.hi)
+        self.extreme_sectors += other.extreme_sectors
+        self.pop_extreme.merge(other.pop_extreme)
+        return self
+
+    def district_summary(self, districts):
+        p = self.class_counts / max(self.members, 1)
+        cum = np.cumsum(p, axis=1)
+        q = self.hi.quantiles([0.05, 0.5, 0.95])
+        return pd.DataFrame({
+            'district_name': districts,
+            'p_caution_plus': 1 - p[:, 0],
+            'p_danger_plus': p[:, 2] + p[:, 3],
+            'p_extreme': p[:, 3],
+            'median_class': np.argmax(cum >= 0.5, axis=1),
+            'hi_p05': q[:, 0], 'hi_p50': q[:, 1], 'hi_p95': q[:, 2],
+        })
+
+    def national_summary(self):
+        k = np.arange(len(self.extreme_sectors))
+        n = max(self.members, 1)
+        cum = np.cumsum(self.extreme_sectors) / n
+        pop_q = self.pop_extreme.quantiles([0.05, 0.5, 0.95])[0]
+        return {
+            'members': self.members,
+            'extreme_sectors_mean': float((k * self.extreme_sectors).sum() / n),
+            'extreme_sectors_p05': int(np.argmax(cum >= 0.05)),
+            'extreme_sectors_p95': int(np.argmax(cum >= 0.95)),
+            'p_any_extreme': float(1 - self.extreme_sectors[0] / n),
+            'pop_extreme_m_p05': float(pop_q[0]), 'pop_extreme_m_p50': float(pop_q[1]), 'pop_extreme_m_p95': float(pop_q[2]),
+        }
+
+
+def evaluate_members(model, base, stressors, batch=BATCH_MEMBERS):
+    """Scores a block of members in batched matrices and folds them into an accumulator."""
+    acc = EnsembleAccumulator(len(base['districts']))
+    features = model_features(model)
+    for start in range(0, len(stressors), batch):
+        X, hi, pop = scenario_matrix(base, stressors[start:start + batch], features)
+        preds = model.predict(X).astype(np.int64).reshape(hi.shape)
+        acc.add(preds, hi, pop)
+    return acc
+
+
+# ==========================================
+# PROCESS POOL (one model per worker, reused across runs)
+# ==========================================
+_worker_model = None
+_pool = None
+_pool_key = None            # (workers, model_path) the pool was started with
+_pool_lock = threading.Lock()
+
+
+def _init_worker(model_path):
+    global _worker_model
+    _worker_model = joblib.load(model_path)
+    # Parallelism comes from the pool; one XGBoost thread per worker avoids oversubscription
+    _worker_model.set_params(n_jobs=1)
+
+
+def _run_task(base, stressors):
+    return evaluate_members(_worker_model, base, stressors)
+
+
+def get_pool(workers, model_path=MODEL_PATH):
+    """
+    Process-wide pool. 'spawn' keeps workers independent of the server's threads.
+    Workers load `model_path` once, so a different path (e.g. a newly published
+    shared-store version) restarts the pool; running tasks finish on the old one.
+    """
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is None or _pool_key != (workers, model_path):
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn"),
+                                        initializer=_init_worker, initargs=(model_path,))
+            _pool_key = (workers, model_path)
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+
+
+def run_ensemble(base, stressors, model=None, workers=None, progress=None, model_path=MODEL_PATH):
+    """
+    Evaluates every member and returns the merged accumulator. With workers <= 1
+    (or a small ensemble) it runs in-process on `model`; otherwise tasks of
+    TASK_MEMBERS go to a pool whose workers load `model_path` (which should be
+    the file `model` came from) and are merged as they finish.
+    """
+    workers = os.cpu_count() if workers is None else workers
+    if workers <= 1 or len(stressors) <= TASK_MEMBERS:
+        if model is None:
+            model = joblib.load(model_path)
+        acc = EnsembleAccumulator(len(base['districts']))
+        for start in range(0, len(stressors), TASK_MEMBERS):
+            acc.merge(evaluate_members(model, base, stressors[start:start + TASK_MEMBERS]))
+            if progress:
+                progress(acc.members, len(stressors))
+        return acc
+
+    pool = get_pool(workers, model_path)
+    futures = [pool.submit(_run_task, base, stressors[s:s + TASK_MEMBERS])
+               for s in range(0, len(stressors), TASK_MEMBERS)]
+    acc = EnsembleAccumulator(len(base['districts']))
+    for fut in as_completed(futures):
+        acc.merge(fut.result())
+        if progress:
+            progress(acc.members, len(stressors))
+    return acc
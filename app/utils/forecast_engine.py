@@ -0,0 +1,193 @@
+# app/utils/forecast_engine.py
+import numpy as np
+import pandas as pd
+import requests
+from utils.model_engine import run_prediction
+from utils.physics import compute_physics
+from utils.telemetry import span
+
+INPUT_COLUMNS = ['temp_c', 'humidity_relative', 'wind_speed_m_s', 'solar_w_m2']
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+OPEN_METEO_BATCH = 50       # Coordinates per request (keeps the URL short)
+PAST_DAYS = 3               # Observed hours used to seed the 72h window
+
+
+class RingBuffer:
+    """Fixed window of the last `size` hourly values for every district (NaN until filled)."""
+
+    def __init__(self, size, n_districts):
+        self.values = np.full((size, n_districts), np.nan, dtype=np.float32)
+        self.pos = 0
+        self.count = 0
+        self.total = np.zeros(n_districts, dtype=np.float64)
+
+    def push(self, row):
+        old = self.values[self.pos]
+        if self.count == len(self.values):
+            self.total -= old
+        else:
+            self.count += 1
+        self.total += row
+        self.values[self.pos] = row
+        self.pos = (self.pos + 1) % len(self.values)
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def max(self):
+        return np.fmax.reduce(self.values, axis=0) if self.count else None
+
+
+class ForecastEngine:
+    """
+    Autoregressive rollout for all districts at once. Each step builds one
+    feature row per district from the ring buffers, runs one batched predict
+    and feeds the predicted class back as the next hour's `risk_lag_1h`.
+    """
+
+    def __init__(self, model, populations, district_ids=None):
+        self.model = model
+        self.districts = populations.index
+        self.district_ids = district_ids        # Registry IDs; needed by models with neighbour features
+        self.population = populations.to_numpy(np.float64)
+        self.temp_24h = RingBuffer(24, len(self.districts))
+        self.hi_72h = RingBuffer(72, len(self.districts))
+        self.last_risk = np.zeros(len(self.districts), dtype=np.int64)
+
+    def observe(self, temp, hi, risk):
+        """Pushes one observed hour (physics class as lag, like the training labels)."""
+        self.temp_24h.push(temp)
+        self.hi_72h.push(hi)
+        self.last_risk = risk.astype(np.int64)
+
+    def step(self, temp, rh, wind, solar):
+        """Predicts one forecast hour for every district and advances the buffers."""
+        _, hi, _ = compute_physics(temp, rh=rh)
+
+        # Same fallbacks as Notebook 03 when no earlier hours exist
+        temp_roll = self.temp_24h.mean()
+        hi_max = self.hi_72h.max()
+        features = pd.DataFrame({
+            'population_2020': self.population,
+            'pop_log': np.log10(self.population + 1),
+            'temp_c': temp,
+            'humidity_relative': rh,
+            'wind_speed_m_s': wind,
+            'solar_w_m2': solar,
+            'temp_roll_24h': temp if temp_roll is None else temp_roll,
+            'hi_max_72h': hi if hi_max is None else np.where(np.isnan(hi_max), hi, hi_max),
+            'risk_lag_1h': self.last_risk,
+        })
+        if self.district_ids is not None:
+            features['district_id'] = self.district_ids
+        preds, probs = run_prediction(self.model, features)
+
+        self.temp_24h.push(temp)
+        self.hi_72h.push(hi)
+        self.last_risk = preds.astype(np.int64)
+        return hi, preds, probs
+
+    def rollout(self, inputs, start=None):
+        """
+        Runs the whole horizon from a tidy frame (time, district_name + INPUT_COLUMNS).
+        Hours before `start` only seed the buffers; returns one row per district-hour.
+        """
+        cube = (inputs.pivot_table(index='time', columns='district_name', values=INPUT_COLUMNS)
+                      .reindex(columns=pd.MultiIndex.from_product([INPUT_COLUMNS, self.districts]))
+                      .sort_index()
+                      .interpolate(limit_direction='both'))
+        times = cube.index
+        arrays = {c: cube[c].to_numpy(np.float32) for c in INPUT_COLUMNS}
+        start = times[0] if start is None else pd.Timestamp(start)
+
+        history = times < start
+        if history.any():
+            _, hi, risk = compute_physics(arrays['temp_c'][history], rh=arrays['humidity_relative'][history])
+            hi, risk = hi.reshape(-1, len(self.districts)), risk.reshape(-1, len(self.districts))
+            for i in range(history.sum()):
+                self.observe(arrays['temp_c'][i], hi[i], risk[i])
+
+        rows = []
+        for i in np.flatnonzero(~history):
+            hi, preds, probs = self.step(*(arrays[c][i] for c in INPUT_COLUMNS))
+            rows.append(pd.DataFrame({
+                'time': times[i],
+                'district_name': self.districts,
+                'temp_c': arrays['temp_c'][i],
+                'heat_index_c': hi,
+                'pred_risk': preds,
+                'confidence': probs.max(axis=1),
+            }))
+        return pd.concat(rows, ignore_index=True) if rows else pd.DataFrame()
+
+
+def current_inputs(inputs, now=None):
+    """
+    Weather and memory features at hour `now` (default: the last hour) for every
+    location in a tidy forecast frame, using the hours before it like Notebook 03
+    (shift(1) windows, physics class as the lag). One row per location.
+    """
+    cube = (inputs.pivot_table(index='time', columns='district_name', values=INPUT_COLUMNS)
+                  .sort_index()
+                  .interpolate(limit_direction='both'))
+    times = cube.index
+    i = len(times) - 1 if now is None else int(np.clip(times.searchsorted(pd.Timestamp(now), side='right') - 1, 0, len(times) - 1))
+    arrays = {c: cube[c].to_numpy(np.float32)[:i + 1] for c in INPUT_COLUMNS}
+    _, hi, risk = compute_physics(arrays['temp_c'], rh=arrays['humidity_relative'])
+    hi, risk = hi.reshape(i + 1, -1), risk.reshape(i + 1, -1)
+
+    out = pd.DataFrame({c: a[i] for c, a in arrays.items()}, index=cube['temp_c'].columns)
+    out['temp_roll_24h'] = arrays['temp_c'][max(i - 24, 0):i].mean(axis=0) if i else arrays['temp_c'][i]
+    out['hi_max_72h'] = hi[max(i - 72, 0):i].max(axis=0) if i else hi[i]
+    out['risk_lag_1h'] = risk[i - 1].astype(np.int64) if i else 0
+    out['heat_index_c'] = hi[i]
+    out.attrs['time'] = times[i]
+    return out
+
+
+# ==========================================
+# INPUT SOURCES
+# ==========================================
+def load_forecast_file(file):
+    """Reads a CSV/Parquet forecast with time, district_name and the four weather inputs."""
+    name = getattr(file, 'name', str(file))
+    df = pd.read_parquet(file) if name.endswith('.parquet') else pd.read_csv(file)
+    missing = {'time', 'district_name', *INPUT_COLUMNS} - set(df.columns)
+    if missing:
+        raise ValueError(f"Forecast file is missing columns: {sorted(missing)}")
+    df['time'] = pd.to_datetime(df['time'])
+    return df
+
+
+def fetch_open_meteo(coords, days=7, past_days=PAST_DAYS):
+    """
+    Hourly forecast (UTC) for every district, OPEN_METEO_BATCH coordinates per
+    request. Includes `past_days` of recent hours to seed the lag windows.
+    """
+    frames = []
+    for i in range(0, len(coords), OPEN_METEO_BATCH):
+        batch = coords.iloc[i:i + OPEN_METEO_BATCH]
+        params = {
+            'latitude': ",".join(f"{v:.4f}" for v in batch['lat']),
+            'longitude': ",".join(f"{v:.4f}" for v in batch['lon']),
+            'hourly': "temperature_2m,relative_humidity_2m,wind_speed_10m,direct_radiation",
+            'forecast_days': days,
+            'past_days': past_days,
+            'timezone': "GMT",
+        }
+        with span("forecast.open_meteo"):
+            r = requests.get(OPEN_METEO_URL, params=params, timeout=15)
+            r.raise_for_status()
+            payload = r.json()
+
+        for district, loc in zip(batch.index, payload if isinstance(payload, list) else [payload]):
+            hourly = loc['hourly']
+            frames.append(pd.DataFrame({
+                'time': pd.to_datetime(hourly['time']),
+                'district_name': district,
+                'temp_c': hourly['temperature_2m'],
+                'humidity_relative': hourly['relative_humidity_2m'],
+                'wind_speed_m_s': np.asarray(hourly['wind_speed_10m'], dtype=float) / 3.6,
+                'solar_w_m2': hourly['direct_radiation'],
+            }))
+    return pd.concat(frames, ignore_index=True)
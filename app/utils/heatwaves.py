@@ -0,0 +1,157 @@
+# app/utils/heatwaves.py
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+ALERT_CLASS = 2        # Danger or worse
+MIN_HOURS = 6          # Fewer alert hours than this in a district is a hot afternoon, not a heatwave
+MAX_GAP_HOURS = 18     # Cooler night hours between hot days do not end an event
+
+
+def run_lengths(mask):
+    """
+    Runs of True along axis 1 of a (district x hour) mask as parallel arrays
+    (district, start, end), end exclusive. np.nonzero returns both edge sets in
+    row-major order, so the k-th start pairs with the k-th end.
+    """
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    district, start = np.nonzero(edges == 1)
+    _, end = np.nonzero(edges == -1)
+    return district, start, end
+
+
+def merge_gaps(district, start, end, max_gap=MAX_GAP_HOURS):
+    """Joins consecutive runs in the same district that are at most `max_gap` hours apart."""
+    if len(district) == 0:      # Nothing reached the alert level
+        return district, start, end
+    new = np.ones(len(district), dtype=bool)
+    new[1:] = (district[1:] != district[:-1]) | (start[1:] - end[:-1] > max_gap)
+    first = np.flatnonzero(new)
+    last = np.append(first[1:], len(district)) - 1
+    return district[first], start[first], end[last]
+
+
+def district_events(risk, heat_index, population, level=ALERT_CLASS, min_hours=MIN_HOURS, max_gap=MAX_GAP_HOURS):
+    """
+    One row per (district, episode) from a (district x hour) risk array.
+    Missing hours should carry a negative class so they break runs.
+    Span statistics come from flat cumulative sums and a single reduceat.
+    """
+    mask = risk >= level
+    district, start, end = merge_gaps(*run_lengths(mask), max_gap=max_gap)
+    n_hours = risk.shape[1]
+    lo = district.astype(np.int64) * n_hours + start
+    hi = district.astype(np.int64) * n_hours + end
+
+    alert_cum = np.concatenate([[0], np.cumsum(mask.ravel(), dtype=np.int32)])
+    extreme_cum = np.concatenate([[0], np.cumsum((risk >= 3).ravel(), dtype=np.int32)])
+    alert_hours = alert_cum[hi] - alert_cum[lo]
+    extreme_hours = extreme_cum[hi] - extreme_cum[lo]
+
+    # Peak HI over [lo, hi): reduceat over interleaved bounds, keeping the even slots.
+    # The trailing -inf lets a bound sit at the very end of the array.
+    flat_hi = np.append(np.nan_to_num(heat_index.ravel(), nan=-np.inf), -np.inf)
+    bounds = np.column_stack([lo, hi]).ravel()
+    peak = np.maximum.reduceat(flat_hi, bounds)[::2] if len(bounds) else np.empty(0)
+
+    events = pd.DataFrame({
+        'district_id': district.astype(np.int16),
+        'start_h': start, 'end_h': end,
+        'alert_hours': alert_hours, 'extreme_hours': extreme_hours,
+        'peak_hi_c': peak.astype(np.float32),
+        'person_hours': alert_hours * np.asarray(population, dtype=np.float64)[district],
+    })
+    return events[events['alert_hours'] >= min_hours].reset_index(drop=True)
+
+
+def link_events(events, neighbours, max_gap=MAX_GAP_HOURS):
+    """
+    Event label per district-event: episodes in neighbouring districts whose
+    spans overlap (within `max_gap`) belong to the same heatwave.
+    Candidate pairs come from joining episodes on (neighbour, day) instead of
+    comparing all pairs; exact overlap is checked on the candidates.
+    """
+    n = len(events)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    start = events['start_h'].to_numpy(np.int64)
+    end = events['end_h'].to_numpy(np.int64)
+
+    # Every day each (gap-padded) episode touches
+    first_day = (start - max_gap) // 24
+    n_days = (end - 1) // 24 - first_day + 1
+    node = np.repeat(np.arange(n), n_days)
+    offset = np.arange(len(node)) - np.repeat(np.cumsum(n_days) - n_days, n_days)
+    days = pd.DataFrame({'node': node, 'district_id': events['district_id'].to_numpy(np.int64)[node],
+                         'day': first_day[node] + offset})
+
+    nb = neighbours.tocoo()
+    pairs = pd.DataFrame({'district_id': nb.row.astype(np.int64), 'neighbour_id': nb.col.astype(np.int64)})
+    cand = (days.merge(pairs, on='district_id')
+                .merge(days.rename(columns={'node': 'other', 'district_id': 'neighbour_id'}), on=['neighbour_id', 'day']))
+    a, b = cand['node'].to_numpy(), cand['other'].to_numpy()
+    overlap = (start[a] - max_gap < end[b]) & (start[b] - max_gap < end[a])
+
+    graph = sparse.csr_matrix((np.ones(overlap.sum(), dtype=bool), (a[overlap], b[overlap])), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    return labels
+
+
+def catalogue(events, labels, t0, names=None):
+    """
+    Event table indexed by event_id (largest exposure first) plus the
+    district-level membership rows. Hours are offsets from `t0`.
+    Both are empty (with their usual columns) when no episode was found.
+    """
+    events = events.assign(event=labels)
+    if len(events) == 0:
+        return _empty_catalogue(events, t0, names)
+    g = events.groupby('event')
+    peak_row = events.loc[g['peak_hi_c'].idxmax(), ['event', 'district_id']].set_index('event')['district_id']
+
+    cat = pd.DataFrame({
+        'start': t0 + pd.to_timedelta(g['start_h'].min(), unit='h'),
+        'end': t0 + pd.to_timedelta(g['end_h'].max(), unit='h'),
+        'n_districts': g['district_id'].nunique(),
+        'district_hours': g['alert_hours'].sum(),
+        'extreme_hours': g['extreme_hours'].sum(),
+        'peak_hi_c': g['peak_hi_c'].max(),
+        'peak_district_id': peak_row,
+        'person_hours': g['person_hours'].sum(),
+    })
+    cat['duration_h'] = ((cat['end'] - cat['start']) / pd.Timedelta(hours=1)).astype(np.int64)
+    if names is not None:
+        cat['peak_district'] = names[cat['peak_district_id']]
+
+    # Stable IDs: ranked by exposure, ties broken by start
+    cat = cat.sort_values(['person_hours', 'start'], ascending=[False, True])
+    rank = pd.Series(np.arange(len(cat)), index=cat.index)
+    cat.index = pd.RangeIndex(len(cat), name='event_id')
+
+    members = events.assign(event_id=rank[events['event']].to_numpy())
+    members['start'] = t0 + pd.to_timedelta(members['start_h'], unit='h')
+    members['end'] = t0 + pd.to_timedelta(members['end_h'], unit='h')
+    members = members.drop(columns=['event', 'start_h', 'end_h']).sort_values(['event_id', 'start'])
+    return cat, members.reset_index(drop=True)
+
+
+def _empty_catalogue(events, t0, names):
+    """Zero-row catalogue and membership tables with the same columns and dtypes as a populated run."""
+    when = pd.Series(pd.DatetimeIndex([], dtype=pd.DatetimeIndex([t0]).dtype))
+    cat = pd.DataFrame({
+        'start': when, 'end': when,
+        'n_districts': pd.Series([], dtype=np.int64),
+        'district_hours': events['alert_hours'], 'extreme_hours': events['extreme_hours'],
+        'peak_hi_c': events['peak_hi_c'], 'peak_district_id': events['district_id'],
+        'person_hours': events['person_hours'],
+        'duration_h': pd.Series([], dtype=np.int64),
+    }, index=pd.RangeIndex(0, name='event_id'))
+    if names is not None:
+        cat['peak_district'] = pd.Series([], dtype=object)
+
+    members = events.drop(columns=['event', 'start_h', 'end_h']).assign(
+        event_id=pd.Series([], dtype=np.int64), start=when, end=when)
+    return cat, members.reset_index(drop=True)
@@ -1,51 +1,126 @@
+import os
 import numpy as np
 import pandas as pd
+from utils.telemetry import timed
+from utils.physics import heat_index, heat_index_scalar
+
+# The exact feature list used in Notebook 04
+REQUIRED_FEATURES = [
+    'population_2020', 'pop_log', 
+    'temp_c', 'humidity_relative', 'wind_speed_m_s', 'solar_w_m2',
+    'temp_roll_24h', 'hi_max_72h', 'risk_lag_1h'
+]
+
+# Optional spatial features (Notebook 03): heat in bordering districts.
+# A model trained with them lists them in feature_names_in_.
+NEIGHBOUR_FEATURES = ['nb_hi_mean', 'nb_hi_max', 'nb_risk_lag_1h']
+
+# Set to e.g. http://127.0.0.1:8765 to score through app/prediction_server.py.
+# Only small frames (live monitor rows, scenario maps) go remote; bulk scoring
+# is already batched and stays in-process.
+PREDICTION_URL = os.environ.get("HEAT_RISK_PREDICTION_URL")
+REMOTE_MAX_ROWS = 10_000
+_client = None
+
+def prediction_client():
+    global _client
+    if _client is None and PREDICTION_URL:
+        from utils.prediction_service import PredictionClient
+        _client = PredictionClient(PREDICTION_URL)
+    return _client
 
 def calculate_heat_index(temp, rh):
     """
-    Vectorized Heat Index Calculation (NOAA Standard).
+    Heat Index in Celsius (NOAA Standard), via the shared physics kernel.
     Accepts scalar floats or pandas Series.
     """
-    # Convert to Fahrenheit
-    T_F = (temp * 9/5) + 32
-    
-    # Simple formula
-    hi_simple = 0.5 * (T_F + 61.0 + ((T_F-68.0)*1.2) + (rh*0.094))
-    
-    # Full regression formula constants
-    c1, c2, c3, c4 = -42.379, 2.04901523, 10.14333127, -0.22475541
-    c5, c6, c7, c8, c9 = -6.83783e-3, -5.481717e-2, 1.22874e-3, 8.5282e-4, -1.99e-6
-    
-    hi_full = (c1 + c2*T_F + c3*rh + c4*T_F*rh + c5*T_F**2 + 
-               c6*rh**2 + c7*T_F**2*rh + c8*T_F*rh**2 + c9*T_F**2*rh**2)
-    
-    # Logic: If simple HI > 80F, use full regression. 
-    # Works for both scalars and Series using numpy where
     if isinstance(temp, (int, float)):
-        return (hi_full if hi_simple > 80 else hi_simple - 32) * 5/9
+        return heat_index_scalar(temp, rh)
+    hi = heat_index(temp, rh)
+    if isinstance(temp, pd.Series):
+        return pd.Series(hi, index=temp.index)
+    return hi
+
+def model_features(model):
+    """The columns `model` was trained on, in order (REQUIRED_FEATURES unless it says otherwise)."""
+    names = getattr(model, 'feature_names_in_', None)
+    return REQUIRED_FEATURES if names is None else [str(c) for c in names]
+
+def uses_neighbours(model):
+    return any(c in NEIGHBOUR_FEATURES for c in model_features(model))
+
+def add_neighbour_features(df, graph=None):
+    """
+    Adds NEIGHBOUR_FEATURES to a frame with 'district_id' and 'risk_lag_1h'
+    (plus 'time' for several hours). Rows are scattered into a (district, hour)
+    array so each feature is one sparse pass over the graph, then gathered back.
+    """
+    from utils.spatial_graph import load_graph
+    graph = load_graph() if graph is None else graph
+    if 'heat_index_c' in df.columns:
+        hi = df['heat_index_c'].to_numpy(np.float32)
     else:
-        hi_final_f = np.where(hi_simple > 80, hi_full, hi_simple)
-        return (hi_final_f - 32) * 5/9
+        hi = heat_index(df['temp_c'].to_numpy(np.float64), df['humidity_relative'].to_numpy(np.float64))
+
+    d_codes, d_ids = pd.factorize(df['district_id'])
+    t_codes = pd.factorize(df['time'])[0] if 'time' in df.columns else np.zeros(len(df), dtype=np.intp)
+    shape = (len(d_ids), t_codes.max(initial=-1) + 1)
+    cubes = []
+    for values in (hi, df['risk_lag_1h'].to_numpy(np.float32)):
+        cube = np.full(shape, np.nan, dtype=np.float32)
+        cube[d_codes, t_codes] = values
+        cubes.append(cube)
+    feats = graph.neighbour_features(np.asarray(d_ids, dtype=np.int64), *cubes)
+    return df.assign(**{k: v[d_codes, t_codes] for k, v in feats.items()})
 
+@timed("run_prediction")
 def run_prediction(model, df):
     """
     Runs the ML model on a dataframe.
     Ensures columns are in the exact order the model expects.
     """
-    # The exact feature list used in Notebook 04
-    required_features = [
-        'population_2020', 'pop_log', 
-        'temp_c', 'humidity_relative', 'wind_speed_m_s', 'solar_w_m2',
-        'temp_roll_24h', 'hi_max_72h', 'risk_lag_1h'
-    ]
-    
     # Validation
-    for col in required_features:
+    for col in REQUIRED_FEATURES:
         if col not in df.columns:
             raise ValueError(f"Missing feature: {col}")
+
+    # Neighbour features are derived here, from whichever districts/hours the frame holds
+    features = REQUIRED_FEATURES if model is None else model_features(model)
+    if any(c not in df.columns for c in features):
+        df = add_neighbour_features(df)
             
+    # Shared service, when configured (falls back to the session's model if unreachable)
+    client = prediction_client()
+    if client is not None and len(df) <= REMOTE_MAX_ROWS:
+        try:
+            preds, probs = client.predict(df[features].to_numpy(np.float32))
+            return preds.astype(np.int64), probs
+        except (OSError, RuntimeError):
+            if model is None:
+                raise
+
     # Predict
-    preds = model.predict(df[required_features])
-    probs = model.predict_proba(df[required_features])
+    preds = model.predict(df[features])
+    probs = model.predict_proba(df[features])
     
-    return preds, probs
\ No newline at end of file
+    return preds, probs
+
+def build_lag_features(df):
+    """
+    Rebuilds the Notebook 03 memory features per district.
+    Expects 'time', 'district_name', 'temp_c', 'heat_index_c' and 'risk_score'.
+    """
+    df = df.sort_values(['district_name', 'time']).reset_index(drop=True)
+    by_district = df.groupby('district_name', sort=False, observed=True)
+
+    # Same shift(1) + rolling windows as the notebook, without per-group lambdas
+    prev_temp = by_district['temp_c'].shift(1)
+    prev_hi = by_district['heat_index_c'].shift(1)
+    df['temp_roll_24h'] = prev_temp.groupby(df['district_name'], sort=False, observed=True).rolling(24, min_periods=1).mean().reset_index(level=0, drop=True)
+    df['hi_max_72h'] = prev_hi.groupby(df['district_name'], sort=False, observed=True).rolling(72, min_periods=1).max().reset_index(level=0, drop=True)
+    df['risk_lag_1h'] = by_district['risk_score'].shift(1)
+
+    df['risk_lag_1h'] = df['risk_lag_1h'].fillna(0)
+    df['temp_roll_24h'] = df['temp_roll_24h'].fillna(df['temp_c'])
+    df['hi_max_72h'] = df['hi_max_72h'].fillna(df['heat_index_c'])
+    return df
\ No newline at end of file
@@ -0,0 +1,164 @@
+# app/utils/physics.py
+import math
+import numpy as np
+
+# August-Roche-Magnus constants (Notebook 03)
+MAGNUS_A = 17.625
+MAGNUS_B = 243.04
+
+# NOAA/NWS Rothfusz regression (Fahrenheit)
+C1, C2, C3, C4 = -42.379, 2.04901523, 10.14333127, -0.22475541
+C5, C6, C7, C8, C9 = -6.83783e-3, -5.481717e-2, 1.22874e-3, 8.5282e-4, -1.99e-6
+
+# Risk classes from the NOAA Heat Index categories in Celsius:
+# 0: Safe (< 27), 1: Caution (27-32), 2: Danger (32-41), 3: Extreme (>= 41)
+RISK_THRESHOLDS = (27.0, 32.0, 41.0)
+RISK_LABELS = ["SAFE", "CAUTION", "DANGER", "EXTREME"]
+
+# Rows per block: big enough to amortise NumPy call overhead, small enough
+# that the scratch buffers (a few float32 arrays) stay in cache-friendly sizes
+CHUNK_ROWS = 1 << 18
+
+
+def _as_f32(x):
+    return np.ascontiguousarray(x, dtype=np.float32).ravel()
+
+
+class _Scratch:
+    """Reusable float32/bool block buffers, so a 100M-row pass allocates them once."""
+
+    def __init__(self, n):
+        self.a = np.empty(n, dtype=np.float32)
+        self.b = np.empty(n, dtype=np.float32)
+        self.c = np.empty(n, dtype=np.float32)
+        self.mask = np.empty(n, dtype=bool)
+
+    def view(self, n):
+        return self.a[:n], self.b[:n], self.c[:n], self.mask[:n]
+
+
+def _rh_block(t, td, out, a, b):
+    # RH = 100 * e(Td) / es(T); the 6.112 prefactor cancels, leaving one exp
+    np.add(td, MAGNUS_B, out=a)
+    np.divide(td, a, out=a)
+    np.add(t, MAGNUS_B, out=b)
+    np.divide(t, b, out=b)
+    np.subtract(a, b, out=a)
+    np.multiply(a, MAGNUS_A, out=a)
+    np.exp(a, out=a)
+    np.multiply(a, 100, out=a)
+    np.clip(a, 0, 100, out=out)
+
+
+def _hi_block(t, rh, out, tf, acc, tmp, mask):
+    # Temperature in Fahrenheit
+    np.multiply(t, 1.8, out=tf)
+    np.add(tf, 32, out=tf)
+
+    # Simple formula: 0.5 * (T + 61 + (T - 68) * 1.2 + RH * 0.094) == 1.1T - 10.3 + 0.047RH
+    np.multiply(tf, 1.1, out=out)
+    np.multiply(rh, 0.047, out=tmp)
+    np.add(out, tmp, out=out)
+    np.subtract(out, 10.3, out=out)
+    np.greater(out, 80, out=mask)
+
+    if mask.any():
+        # Full regression in Horner form over RH with quadratic-in-T coefficients:
+        # ((C9 T^2 + C8 T + C6) RH + (C7 T^2 + C4 T + C3)) RH + (C5 T^2 + C2 T + C1)
+        np.multiply(tf, C9, out=acc); np.add(acc, C8, out=acc); np.multiply(acc, tf, out=acc); np.add(acc, C6, out=acc)
+        np.multiply(acc, rh, out=acc)
+        np.multiply(tf, C7, out=tmp); np.add(tmp, C4, out=tmp); np.multiply(tmp, tf, out=tmp); np.add(tmp, C3, out=tmp)
+        np.add(acc, tmp, out=acc)
+        np.multiply(acc, rh, out=acc)
+        np.multiply(tf, C5, out=tmp); np.add(tmp, C2, out=tmp); np.multiply(tmp, tf, out=tmp); np.add(tmp, C1, out=tmp)
+        np.add(acc, tmp, out=acc)
+        np.copyto(out, acc, where=mask)
+
+    # Back to Celsius
+    np.subtract(out, 32, out=out)
+    np.multiply(out, 5 / 9, out=out)
+
+
+def _risk_block(hi, out, mask):
+    # Sum of threshold crossings == the Notebook 03 np.select (NaN stays Safe)
+    np.greater_equal(hi, RISK_THRESHOLDS[0], out=mask)
+    np.copyto(out, mask, casting='unsafe')
+    for threshold in RISK_THRESHOLDS[1:]:
+        np.greater_equal(hi, threshold, out=mask)
+        np.add(out, mask, out=out, casting='unsafe')
+
+
+def compute_physics(temp_c, rh=None, dew_c=None, out=None, chunk_rows=CHUNK_ROWS):
+    """
+    Fused blockwise pass: relative humidity (from dew point when `rh` is None),
+    heat index (C) and risk class, all float32/int8.
+
+    Every block runs RH -> HI -> class back to back on the same scratch buffers,
+    so peak memory is the outputs plus a few `chunk_rows` buffers. Pass `out` as
+    (rh, hi, risk) arrays to write into existing (e.g. memory-mapped) storage.
+    """
+    t = _as_f32(temp_c)
+    n = t.size
+    if rh is None and dew_c is None:
+        raise ValueError("Need either relative humidity or dew point.")
+    src = _as_f32(rh if rh is not None else dew_c)
+
+    if out is None:
+        out = (np.empty(n, dtype=np.float32), np.empty(n, dtype=np.float32), np.empty(n, dtype=np.int8))
+    rh_out, hi_out, risk_out = out
+
+    scratch = _Scratch(min(n, chunk_rows) or 1)
+    for start in range(0, n, chunk_rows):
+        stop = min(start + chunk_rows, n)
+        a, b, c, mask = scratch.view(stop - start)
+        t_blk = t[start:stop]
+        rh_blk = rh_out[start:stop]
+
+        if rh is None:
+            _rh_block(t_blk, src[start:stop], rh_blk, a, b)
+        else:
+            rh_blk[...] = src[start:stop]
+
+        _hi_block(t_blk, rh_blk, hi_out[start:stop], a, b, c, mask)
+        _risk_block(hi_out[start:stop], risk_out[start:stop], mask)
+
+    return rh_out, hi_out, risk_out
+
+
+def relative_humidity(temp_c, dew_c, chunk_rows=CHUNK_ROWS):
+    """Magnus relative humidity (%) as float32, clipped to 0-100."""
+    return compute_physics(temp_c, dew_c=dew_c, chunk_rows=chunk_rows)[0]
+
+
+def heat_index(temp_c, rh, chunk_rows=CHUNK_ROWS):
+    """NOAA Heat Index (C) as float32."""
+    return compute_physics(temp_c, rh=rh, chunk_rows=chunk_rows)[1]
+
+
+def risk_class(hi):
+    """Risk class (0-3, int8) from heat index in Celsius."""
+    hi = _as_f32(hi)
+    out = np.empty(hi.size, dtype=np.int8)
+    _risk_block(hi, out, np.empty(hi.size, dtype=bool))
+    return out
+
+
+# ==========================================
+# SCALAR FAST PATH (Live Monitor)
+# ==========================================
+def heat_index_scalar(temp_c, rh):
+    """Heat Index (C) for one reading, without NumPy overhead."""
+    t_f = temp_c * 1.8 + 32
+    hi = 1.1 * t_f - 10.3 + 0.047 * rh
+    if hi > 80:
+        hi = (((C9 * t_f + C8) * t_f + C6) * rh + ((C7 * t_f + C4) * t_f + C3)) * rh + ((C5 * t_f + C2) * t_f + C1)
+    return (hi - 32) * 5 / 9
+
+
+def relative_humidity_scalar(temp_c, dew_c):
+    rh = 100 * math.exp(MAGNUS_A * dew_c / (MAGNUS_B + dew_c) - MAGNUS_A * temp_c / (MAGNUS_B + temp_c))
+    return min(max(rh, 0.0), 100.0)
+
+
+def risk_class_scalar(hi):
+    return sum(hi >= t for t in RISK_THRESHOLDS)
@@ -0,0 +1,176 @@
+# app/utils/prediction_service.py
+import time
+import queue
+import threading
+import http.client
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import numpy as np
+
+N_FEATURES = 9           # len(REQUIRED_FEATURES); rows travel as raw float32 in model_features() order
+BATCH_WINDOW_MS = 2.0    # How long the batcher waits for more requests after the first one
+MAX_BATCH_ROWS = 8192    # A batch is flushed early once it reaches this many rows
+CLIENT_TIMEOUT_S = 5.0
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent predict calls into one model call. The first request
+    opens a window of `window_ms`; everything that arrives in it (up to
+    `max_rows`) is stacked, scored once with predict_proba, and split back.
+    """
+
+    def __init__(self, model, window_ms=BATCH_WINDOW_MS, max_rows=MAX_BATCH_ROWS):
+        self.set_model(model)
+        self.window = window_ms / 1000.0
+        self.max_rows = max_rows
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.rows = 0
+        threading.Thread(target=self._loop, daemon=True, name="prediction-batcher").start()
+
+    def set_model(self, model):
+        """Swaps the served model; batches already being scored finish on the old one."""
+        self._served = (model, np.asarray(model.classes_), getattr(model, 'n_features_in_', N_FEATURES))
+
+    @property
+    def n_features(self):
+        return self._served[2]
+
+    def submit(self, X):
+        """X: (n, N_FEATURES) float32. Returns a Future of (classes int8, probabilities float32)."""
+        future = Future()
+        self._queue.put((X, future))
+        return future
+
+    def predict(self, X):
+        return self.submit(X).result()
+
+    def _loop(self):
+        while True:
+            pending = [self._queue.get()]
+            n = len(pending[0][0])
+            deadline = time.perf_counter() + self.window
+            while n < self.max_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                n += len(item[0])
+            self._score(pending)
+
+    def _score(self, pending):
+        model, classes, _ = self._served
+        try:
+            X = np.concatenate([x for x, _ in pending]) if len(pending) > 1 else pending[0][0]
+            probs = model.predict_proba(X).astype(np.float32)
+            preds = classes[probs.argmax(axis=1)].astype(np.int8)
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(X)
+        start = 0
+        for x, future in pending:
+            stop = start + len(x)
+            future.set_result((preds[start:stop], probs[start:stop]))
+            start = stop
+
+
+class _PredictHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"    # Keep-alive: clients reuse one connection per thread
+    disable_nagle_algorithm = True   # Headers and body go out as separate writes
+    batcher = None
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        n_features = self.batcher.n_features    # More when the model also takes neighbour features
+        if len(body) % (4 * n_features):
+            self.send_error(400, f"Body must be float32 rows of {n_features} features")
+            return
+        try:
+            preds, probs = self.batcher.predict(np.frombuffer(body, dtype=np.float32).reshape(-1, n_features))
+        except Exception as e:
+            self.send_error(500, str(e))
+            return
+        out = probs.tobytes() + preds.tobytes()    # float32 block first keeps it aligned
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("X-Classes", str(probs.shape[1]))
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_error(404)
+            return
+        body = f"ok batches={self.batcher.batches} rows={self.batcher.rows}\n".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_prediction_server(model, host="127.0.0.1", port=8765, window_ms=BATCH_WINDOW_MS, max_rows=MAX_BATCH_ROWS):
+    """Serves POST /predict (and GET /health) on a daemon thread; returns the server."""
+    handler = type("PredictHandler", (_PredictHandler,), {'batcher': MicroBatcher(model, window_ms, max_rows)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="prediction-service").start()
+    return server
+
+
+class PredictionClient:
+    """
+    Talks to the prediction service. Each calling thread keeps its own
+    keep-alive connection, so Streamlit sessions never share a socket.
+    """
+
+    def __init__(self, url, timeout=CLIENT_TIMEOUT_S):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def predict(self, X):
+        """X: (n, features) array in the served model's feature order -> (classes, probabilities)."""
+        body = np.ascontiguousarray(X, dtype=np.float32).tobytes()
+        for attempt in (0, 1):
+            conn = self._connection()
+            try:
+                conn.request("POST", "/predict", body, {"Content-Type": "application/octet-stream"})
+                resp = conn.getresponse()
+                data = resp.read()
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # The server closed an idle keep-alive connection; reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        if resp.status != 200:
+            raise RuntimeError(f"Prediction service returned {resp.status}: {resp.reason}")
+        n, k = len(X), int(resp.getheader("X-Classes"))
+        probs = np.frombuffer(data, dtype=np.float32, count=n * k).reshape(n, k)
+        preds = np.frombuffer(data, dtype=np.int8, offset=4 * n * k)
+        return preds, probs
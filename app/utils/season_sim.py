@@ -0,0 +1,150 @@
+# app/utils/season_sim.py
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.ndimage import maximum_filter1d
+from utils.data_loader import load_model, load_registry, load_season_hourly, derived
+from utils.model_engine import model_features, uses_neighbours
+from utils.physics import compute_physics
+from utils.spatial_graph import load_graph
+from utils.telemetry import timed
+
+SCORING_CHUNK = 250_000      # Rows per predict call
+SUSTAINED_HOURS = 24         # Hours in a class before the map shows it for a month
+CLASS_NAMES = ["safe", "caution", "danger", "extreme"]
+
+
+@timed("season.arrays")
+@derived
+@st.cache_resource
+def load_season_arrays():
+    """The hourly 2023 season as (districts, hours) float32 arrays, built once per process."""
+    df = load_season_hourly()
+    cols = ['temp_c', 'humidity_relative', 'wind_speed_m_s', 'solar_w_m2']
+    cube = df.pivot(index='district_id', columns='time', values=cols)
+    arrays = {c: cube[c].to_numpy(np.float32) for c in cols}
+    arrays['population'] = df.groupby('district_id')['population_2020'].first().reindex(cube.index).to_numpy(np.float64)
+    arrays['district_ids'] = cube.index.to_numpy(np.int16)
+    arrays['districts'] = load_registry().categorical(arrays['district_ids'])
+    arrays['times'] = cube['temp_c'].columns.to_numpy()
+    return arrays
+
+
+def prev_mean(x, window):
+    """Mean of up to `window` earlier hours along axis 1 (shift(1) + rolling, min_periods=1)."""
+    csum = np.zeros((x.shape[0], x.shape[1] + 1))
+    np.cumsum(x, axis=1, out=csum[:, 1:])
+    end = np.arange(x.shape[1])
+    start = np.maximum(end - window, 0)
+    count = np.maximum(end - start, 1)
+    out = (csum[:, end] - csum[:, start]) / count
+    out[:, 0] = x[:, 0]     # No history: Notebook 03 falls back to the current value
+    return out.astype(np.float32)
+
+
+def prev_max(x, window):
+    """Max of up to `window` earlier hours along axis 1, falling back to the current value."""
+    # Trailing window ending at each hour; 'nearest' repeats hour 0 into the early
+    # windows, which matches what min_periods=1 sees anyway
+    run_max = maximum_filter1d(x, size=window, axis=1, origin=(window - 1) // 2, mode='nearest')
+    out = np.empty_like(x)
+    out[:, 1:] = run_max[:, :-1]
+    out[:, 0] = x[:, 0]
+    return out
+
+
+@timed("season.features")
+@derived
+@st.cache_resource(max_entries=8, show_spinner=False)
+def season_features(d_temp, d_rh):
+    """
+    Physics and memory features for the perturbed season. Population only scales
+    one column, so these arrays are shared by every population stressor.
+    Cached as a resource (no copy per hit), so callers must not modify them.
+    """
+    a = load_season_arrays()
+    temp = a['temp_c'] + np.float32(d_temp)
+    rh = np.clip(a['humidity_relative'] + np.float32(d_rh), 0, 100)
+    _, hi, risk = compute_physics(temp, rh=rh)
+    hi = hi.reshape(temp.shape)
+    risk = risk.reshape(temp.shape)
+
+    risk_lag = np.zeros_like(risk)
+    risk_lag[:, 1:] = risk[:, :-1]
+    return {
+        'temp_c': temp, 'humidity_relative': rh, 'heat_index_c': hi,
+        'temp_roll_24h': prev_mean(temp, 24), 'hi_max_72h': prev_max(hi, 72), 'risk_lag_1h': risk_lag,
+    }
+
+
+@timed("season.predict")
+@st.cache_data(max_entries=16, show_spinner=False)
+def season_predictions(d_temp, d_rh, d_pop):
+    """Predicted class for every district-hour of the season, scored in chunks."""
+    a = load_season_arrays()
+    f = season_features(d_temp, d_rh)
+    n_d, n_h = f['temp_c'].shape
+    pop = a['population'] * (1 + d_pop / 100)
+
+    columns = {
+        'population_2020': np.repeat(pop, n_h),
+        'pop_log': np.repeat(np.log10(pop + 1), n_h),
+        'wind_speed_m_s': a['wind_speed_m_s'].ravel(),
+        'solar_w_m2': a['solar_w_m2'].ravel(),
+        **{k: f[k].ravel() for k in ['temp_c', 'humidity_relative', 'temp_roll_24h', 'hi_max_72h', 'risk_lag_1h']},
+    }
+    model = load_model()
+    if uses_neighbours(model):
+        nb = load_graph().neighbour_features(a['district_ids'], f['heat_index_c'], f['risk_lag_1h'])
+        columns.update({k: v.ravel() for k, v in nb.items()})
+
+    features = model_features(model)
+    preds = np.empty(n_d * n_h, dtype=np.int8)
+    for start in range(0, len(preds), SCORING_CHUNK):
+        stop = start + SCORING_CHUNK
+        X = pd.DataFrame({c: columns[c][start:stop] for c in features})
+        preds[start:stop] = model.predict(X)
+    return preds.reshape(n_d, n_h)
+
+
+def exposure_summary(d_temp, d_rh, d_pop, month=None):
+    """
+    Exposure-hours, person-hours and days reaching each class per district,
+    for the whole season or one month.
+    """
+    a = load_season_arrays()
+    preds = season_predictions(d_temp, d_rh, d_pop)
+    features = season_features(d_temp, d_rh)
+    hi, temp = features['heat_index_c'], features['temp_c']
+    times = pd.DatetimeIndex(a['times'])
+    pop = a['population'] * (1 + d_pop / 100)
+
+    if month is not None:
+        cols = np.flatnonzero(times.month == month)
+        preds, hi, temp, times = preds[:, cols], hi[:, cols], temp[:, cols], times[cols]
+
+    n_d = preds.shape[0]
+    rows = np.repeat(np.arange(n_d), preds.shape[1])
+    hours = np.bincount(rows * 4 + preds.ravel(), minlength=n_d * 4).reshape(n_d, 4)
+
+    # Worst class per calendar day, then days per class
+    day_idx = (times.normalize() - times[0].normalize()).days.to_numpy()
+    day_starts = np.flatnonzero(np.diff(day_idx, prepend=-1))
+    daily_max = np.maximum.reduceat(preds, day_starts, axis=1)
+    days = np.stack([(daily_max == k).sum(axis=1) for k in range(4)], axis=1)
+
+    summary = pd.DataFrame({'district_id': a['district_ids'], 'district_name': a['districts'],
+                            'population_2020': pop.astype(np.int64)})
+    for k, name in enumerate(CLASS_NAMES):
+        summary[f'hours_{name}'] = hours[:, k]
+    summary['person_hours_danger_plus'] = (hours[:, 2] + hours[:, 3]) * pop
+    summary['person_hours_extreme'] = hours[:, 3] * pop
+    summary['days_extreme'] = days[:, 3]
+    summary['days_danger_plus'] = days[:, 2] + days[:, 3]
+
+    # Map class: the highest class held for at least SUSTAINED_HOURS
+    sustained = hours >= SUSTAINED_HOURS
+    summary['pred_risk'] = np.where(sustained.any(axis=1), 3 - np.argmax(sustained[:, ::-1], axis=1), 0)
+    summary['heat_index_c'] = hi.mean(axis=1)
+    summary['temp_c'] = temp.mean(axis=1)
+    return summary
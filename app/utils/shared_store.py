@@ -0,0 +1,109 @@
+# app/utils/shared_store.py
+import os
+import json
+import time
+import shutil
+import threading
+import pandas as pd
+import pyarrow as pa
+
+# Set on every server process behind the load balancer; unset = each process reads app/data itself
+STORE_DIR = os.environ.get("HEAT_RISK_SHARED_STORE")
+CURRENT = "CURRENT"            # Pointer file holding the live version name
+MANIFEST = "manifest.json"
+KEEP_VERSIONS = 3              # Older versions are deleted on publish (open mappings stay valid)
+POLL_S = 2.0                   # How often a process re-reads the pointer
+
+
+def _write_arrow(df, path):
+    """Uncompressed Arrow IPC file, so readers can map the buffers directly. Strings go in as dictionaries."""
+    df = df.copy()
+    for c in df.columns[df.dtypes == object]:
+        df[c] = df[c].astype('category')
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return table.num_rows
+
+
+def publish(store_dir, tables=None, files=None, keep=KEEP_VERSIONS):
+    """
+    Writes a new immutable version (frames as Arrow files, other artifacts copied
+    as-is) into a staging folder, renames it into place and then swaps the
+    CURRENT pointer, so readers only ever see complete versions. Returns its name.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    versions = list_versions(store_dir)
+    version = f"v{int(versions[-1][1:]) + 1 if versions else 1:05d}"
+    staging = os.path.join(store_dir, f".{version}.{os.getpid()}.tmp")
+    os.makedirs(staging)
+
+    manifest = {'version': version, 'published_at': pd.Timestamp.utcnow().isoformat(), 'tables': {}, 'files': {}}
+    for name, df in (tables or {}).items():
+        manifest['tables'][name] = _write_arrow(df, os.path.join(staging, f"{name}.arrow"))
+    for name, src in (files or {}).items():
+        shutil.copyfile(src, os.path.join(staging, name))
+        manifest['files'][name] = os.path.getsize(src)
+    with open(os.path.join(staging, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    os.rename(staging, os.path.join(store_dir, version))
+    pointer = os.path.join(store_dir, f".{CURRENT}.{os.getpid()}.tmp")
+    with open(pointer, 'w') as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(store_dir, CURRENT))
+
+    for old in list_versions(store_dir)[:-keep]:
+        shutil.rmtree(os.path.join(store_dir, old), ignore_errors=True)
+    return version
+
+
+def list_versions(store_dir):
+    return sorted(d for d in os.listdir(store_dir) if d.startswith("v") and d[1:].isdigit())
+
+
+class SharedStore:
+    """
+    Read side of a published store. Frames are memory-mapped Arrow files: every
+    process maps the same page-cache pages, and numeric columns reach pandas
+    without a copy (they arrive read-only). `current()` follows the pointer, so
+    a new publish is picked up by every worker within POLL_S.
+    """
+
+    def __init__(self, store_dir, poll_s=POLL_S):
+        self.store_dir = store_dir
+        self.poll_s = poll_s
+        self._version = None
+        self._checked = 0.0
+        self._manifests = {}
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Live version name (None if nothing is published yet)."""
+        with self._lock:
+            if time.monotonic() - self._checked >= self.poll_s:
+                try:
+                    with open(os.path.join(self.store_dir, CURRENT)) as f:
+                        self._version = f.read().strip() or None
+                except FileNotFoundError:
+                    self._version = None
+                self._checked = time.monotonic()
+            return self._version
+
+    def manifest(self, version):
+        if version not in self._manifests:      # Versions are immutable once renamed into place
+            with open(os.path.join(self.store_dir, version, MANIFEST)) as f:
+                self._manifests[version] = json.load(f)
+        return self._manifests[version]
+
+    def has(self, name, version):
+        m = self.manifest(version)
+        return name in m['tables'] or name in m['files']
+
+    def path(self, name, version):
+        return os.path.join(self.store_dir, version, name)
+
+    def table(self, name, version):
+        """Zero-copy frame over `<version>/<name>.arrow` (kept alive by the mapping it references)."""
+        source = pa.memory_map(self.path(f"{name}.arrow", version), 'r')
+        return pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
@@ -0,0 +1,106 @@
+# app/utils/sketches.py
+import numpy as np
+
+
+class KeyedHistogram:
+    """
+    Fixed-bin histograms for many keys at once (e.g. one per district), kept as
+    a (keys, bins) count matrix. Updates are a single bincount, two sketches
+    with the same edges merge by addition, and quantiles come from the
+    cumulative counts, so streams of any length use constant memory.
+    Values outside [lo, hi) land in the first/last bin. `dtype` sets the count
+    type; int32 halves memory for large key spaces with modest counts.
+    """
+
+    def __init__(self, n_keys, lo, hi, n_bins, dtype=np.int64):
+        self.lo, self.hi, self.n_bins = float(lo), float(hi), int(n_bins)
+        self.width = (self.hi - self.lo) / self.n_bins
+        self.counts = np.zeros((n_keys, self.n_bins), dtype=dtype)
+        self.total = np.zeros(n_keys, dtype=np.float64)
+
+    @property
+    def edges(self):
+        return self.lo + self.width * np.arange(self.n_bins + 1)
+
+    def bin_of(self, values):
+        idx = np.floor((np.asarray(values, dtype=np.float64) - self.lo) / self.width)
+        return np.clip(np.nan_to_num(idx, nan=0), 0, self.n_bins - 1).astype(np.int64)
+
+    def add(self, keys, values, weights=None):
+        """
+        Adds values for the given keys (1-D arrays of equal length). NaNs are skipped.
+        `weights` (same length) counts each value fractionally and needs float counts.
+        """
+        if weights is not None and not np.issubdtype(self.counts.dtype, np.floating):
+            raise ValueError(f"Weighted counts need a floating dtype, not {self.counts.dtype} "
+                             "(fractions would truncate to zero).")
+        values = np.asarray(values, dtype=np.float64).ravel()
+        keys = np.asarray(keys, dtype=np.int64).ravel()
+        ok = ~np.isnan(values)
+        keys, values = keys[ok], values[ok]
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64).ravel()[ok]
+        flat = keys * self.n_bins + self.bin_of(values)
+        if len(flat) * 8 < self.counts.size:
+            # Few values for a big matrix: count the touched cells only
+            if weights is None:
+                cells, n = np.unique(flat, return_counts=True)
+            else:
+                cells, inverse = np.unique(flat, return_inverse=True)
+                n = np.bincount(inverse, weights=weights)
+            self.counts.reshape(-1)[cells] += n.astype(self.counts.dtype)
+        else:
+            self.counts += np.bincount(flat, weights=weights, minlength=self.counts.size).reshape(self.counts.shape).astype(self.counts.dtype, copy=False)
+        self.total += np.bincount(keys, weights=values if weights is None else values * weights, minlength=len(self.total))
+        return self
+
+    def add_rows(self, values):
+        """Adds a (samples, keys) block, one column per key."""
+        values = np.asarray(values)
+        keys = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+        return self.add(keys.ravel(), values.ravel())
+
+    def merge(self, other):
+        if (other.lo, other.hi, other.n_bins) != (self.lo, self.hi, self.n_bins):
+            raise ValueError("Cannot merge histograms with different bin edges.")
+        self.counts += other.counts
+        self.total += other.total
+        return self
+
+    @property
+    def n(self):
+        return self.counts.sum(axis=1)
+
+    def mean(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.total / self.n
+
+    def quantiles(self, qs):
+        """(keys, len(qs)) array, linearly interpolated inside the bin; NaN for empty keys."""
+        qs = np.atleast_1d(qs)
+        cum = np.cumsum(self.counts, axis=1)
+        n = cum[:, -1:]
+        out = np.full((len(cum), len(qs)), np.nan)
+        for j, q in enumerate(qs):
+            target = q * n
+            b = np.minimum((cum < target).sum(axis=1), self.n_bins - 1)
+            rows = np.arange(len(cum))
+            below = np.where(b > 0, cum[rows, np.maximum(b - 1, 0)], 0)
+            in_bin = self.counts[rows, b]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                frac = np.where(in_bin > 0, (target[:, 0] - below) / in_bin, 0.5)
+            out[:, j] = self.lo + (b + np.clip(frac, 0, 1)) * self.width
+        out[n[:, 0] == 0] = np.nan
+        return out
+
+    def to_state(self):
+        """Plain arrays for np.savez / pickling between processes."""
+        return {'lo': self.lo, 'hi': self.hi, 'n_bins': self.n_bins, 'counts': self.counts, 'total': self.total}
+
+    @classmethod
+    def from_state(cls, state):
+        counts = np.asarray(state['counts'])
+        sketch = cls(len(counts), float(state['lo']), float(state['hi']), int(state['n_bins']), dtype=counts.dtype)
+        sketch.counts = counts.copy()
+        sketch.total = np.asarray(state['total'], dtype=np.float64).copy()
+        return sketch
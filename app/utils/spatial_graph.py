@@ -0,0 +1,130 @@
+# app/utils/spatial_graph.py
+import os
+from functools import lru_cache
+import numpy as np
+from scipy import sparse
+from shapely import STRtree
+from shapely.geometry import shape
+
+# Degrees. The simplified app map leaves hairline gaps between neighbours,
+# so borders closer than this still count as shared.
+TOUCH_TOLERANCE = 0.01
+GRAPH_PATH = "app/data/district_graph.npz"
+KM_PER_DEGREE = 111.32
+
+
+def district_geometries(geojson, registry):
+    """Shapely geometries in registry-ID order (None for districts the map lacks)."""
+    props = [f['properties'] for f in geojson['features']]
+    if all('district_id' in p for p in props):
+        ids = np.array([p['district_id'] for p in props], dtype=np.int64)
+    else:
+        ids = registry.ids([p.get('district_name') for p in props]).astype(np.int64)
+
+    geoms = np.full(len(registry), None, dtype=object)
+    for i, feature in zip(ids, geojson['features']):
+        if i >= 0:
+            geoms[i] = shape(feature['geometry'])
+    return geoms
+
+
+def touching(geoms, tolerance=TOUCH_TOLERANCE):
+    """Symmetric boolean CSR matrix over an ID-ordered geometry array (None = absent)."""
+    present = np.flatnonzero(geoms != None)  # noqa: E711 (element-wise)
+    tree = STRtree(geoms[present])
+    a, b = tree.query(geoms[present], predicate='dwithin', distance=tolerance)
+    keep = a != b
+    i, j = present[a[keep]], present[b[keep]]
+    n = len(geoms)
+    return sparse.csr_matrix((np.ones(len(i), dtype=bool), (i, j)), shape=(n, n))
+
+
+def adjacency(geojson, registry, tolerance=TOUCH_TOLERANCE):
+    """Symmetric boolean CSR matrix (districts x districts) of neighbours sharing a border."""
+    return touching(district_geometries(geojson, registry), tolerance)
+
+
+class SpatialGraph:
+    """
+    Bordering districts with inverse centroid-distance weights, indexed by
+    registry ID. Neighbour aggregates for a whole (districts, hours) array
+    are one sparse product (mean) or one segmented reduction (max).
+    """
+
+    def __init__(self, weights):
+        self.weights = sparse.csr_matrix(weights, dtype=np.float32)
+        self.weights.sort_indices()
+        self.indptr, self.indices = self.weights.indptr, self.weights.indices
+
+    def __len__(self):
+        return self.weights.shape[0]
+
+    @property
+    def degree(self):
+        return np.diff(self.indptr)
+
+    @classmethod
+    def from_geometries(cls, geoms, tolerance=TOUCH_TOLERANCE):
+        """Builds the graph from an ID-ordered geometry array (see `district_geometries`)."""
+        i, j = touching(geoms, tolerance).nonzero()
+        centroids = np.array([(g.centroid.x, g.centroid.y) if g is not None else (np.nan, np.nan) for g in geoms])
+        lon, lat = centroids[:, 0], centroids[:, 1]
+        dx = (lon[i] - lon[j]) * np.cos(np.radians((lat[i] + lat[j]) / 2))
+        km = np.maximum(np.hypot(dx, lat[i] - lat[j]) * KM_PER_DEGREE, 1.0)
+        n = len(geoms)
+        return cls(sparse.csr_matrix((1.0 / km, (i, j)), shape=(n, n)))
+
+    @classmethod
+    def from_geojson(cls, geojson, registry, tolerance=TOUCH_TOLERANCE):
+        return cls.from_geometries(district_geometries(geojson, registry), tolerance)
+
+    def save(self, path=GRAPH_PATH):
+        sparse.save_npz(path, self.weights)
+
+    @classmethod
+    def load(cls, path=GRAPH_PATH):
+        return cls(sparse.load_npz(path))
+
+    # --- Aggregations over axis 0 (districts); NaN marks a missing reading ---
+    def mean(self, X):
+        """Distance-weighted mean over each district's neighbours, ignoring NaNs."""
+        flat = np.asarray(X, dtype=np.float32).reshape(len(self), -1)
+        valid = ~np.isnan(flat)
+        num = self.weights @ np.where(valid, flat, 0)
+        den = self.weights @ valid.astype(np.float32)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = (num / den).astype(np.float32)
+        return out.reshape(np.shape(X))
+
+    def max(self, X):
+        """Max over each district's neighbours, ignoring NaNs (NaN where there are none)."""
+        flat = np.asarray(X, dtype=np.float32).reshape(len(self), -1)
+        out = np.full(flat.shape, np.nan, dtype=np.float32)
+        rows = np.flatnonzero(self.degree)
+        if len(rows):
+            # Rows without neighbours own no entries, so each segment ends where the next starts
+            out[rows] = np.fmax.reduceat(flat[self.indices], self.indptr[rows], axis=0)
+        return out.reshape(np.shape(X))
+
+    def neighbour_features(self, ids, hi, risk_lag):
+        """
+        Neighbour heat index (mean, max) and max previous-hour risk for districts
+        `ids`, the first axis of `hi` / `risk_lag` (any trailing shape). Neighbours
+        outside `ids` are ignored; a district with none falls back to its own values.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        full_hi = np.full((len(self),) + np.shape(hi)[1:], np.nan, dtype=np.float32)
+        full_lag = np.full_like(full_hi, np.nan)
+        full_hi[ids], full_lag[ids] = hi, risk_lag
+        out = {'nb_hi_mean': self.mean(full_hi)[ids], 'nb_hi_max': self.max(full_hi)[ids],
+               'nb_risk_lag_1h': self.max(full_lag)[ids]}
+        own = {'nb_hi_mean': hi, 'nb_hi_max': hi, 'nb_risk_lag_1h': risk_lag}
+        return {k: np.where(np.isnan(v), own[k], v).astype(np.float32) for k, v in out.items()}
+
+
+@lru_cache(maxsize=2)
+def load_graph(path=GRAPH_PATH):
+    """The prebuilt graph (src/prepare_app_data.py), once per process."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} is missing; run src/prepare_app_data.py to build the district graph.")
+    return SpatialGraph.load(path)
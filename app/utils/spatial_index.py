@@ -0,0 +1,87 @@
+# app/utils/spatial_index.py
+import numpy as np
+import pandas as pd
+import shapely
+from shapely import STRtree
+from utils.spatial_graph import district_geometries
+
+NEAREST_MAX_DEG = 0.5      # Points just off the simplified map snap to a centroid within this distance
+WEATHER_GRID_DEG = 0.1     # Sites share one weather series per grid cell of this size (~11 km)
+MATCH_LABELS = np.array(["UNMATCHED", "POLYGON", "NEAREST"])
+
+
+class DistrictIndex:
+    """
+    Point-to-district lookup over the map. The STRtree is built once and a whole
+    batch of points is located in one vectorized query; points that land in no
+    polygon (simplified coastlines, borders) fall back to the nearest centroid.
+    """
+
+    def __init__(self, geoms):
+        self.present = np.flatnonzero(geoms != None)  # noqa: E711 (element-wise)
+        self.tree = STRtree(geoms[self.present])
+        self.centroid_tree = STRtree(shapely.centroid(geoms[self.present]))
+
+    @classmethod
+    def from_geojson(cls, geojson, registry):
+        return cls(district_geometries(geojson, registry))
+
+    def locate(self, lat, lon, max_nearest=NEAREST_MAX_DEG):
+        """
+        District ID per point (-1 if none) and how it matched, as an index
+        into MATCH_LABELS. Distances for the fallback are in degrees.
+        """
+        points = shapely.points(np.asarray(lon, dtype=float), np.asarray(lat, dtype=float))
+        ids = np.full(len(points), -1, dtype=np.int64)
+        match = np.zeros(len(points), dtype=np.int8)
+
+        p, g = self.tree.query(points, predicate='intersects')
+        first = np.unique(p, return_index=True)[1]     # A point on a shared border keeps its first hit
+        ids[p[first]], match[p[first]] = self.present[g[first]], 1
+
+        miss = np.flatnonzero(ids < 0)
+        if len(miss) and max_nearest:
+            p, g = self.centroid_tree.query_nearest(points[miss], max_distance=max_nearest)
+            first = np.unique(p, return_index=True)[1]
+            ids[miss[p[first]]], match[miss[p[first]]] = self.present[g[first]], 2
+        return ids, match
+
+
+def weather_cells(lat, lon, resolution=WEATHER_GRID_DEG):
+    """
+    Snaps points to a regular grid so nearby sites share one weather request.
+    Returns the cells (lat/lon, indexed by a cell key) and each point's cell position.
+    """
+    key = np.column_stack([np.round(np.asarray(lat) / resolution), np.round(np.asarray(lon) / resolution)]).astype(np.int64)
+    cells, inverse = np.unique(key, axis=0, return_inverse=True)
+    lat_c, lon_c = cells[:, 0] * resolution, cells[:, 1] * resolution
+    index = pd.Index([f"{a:.2f},{b:.2f}" for a, b in zip(lat_c, lon_c)], name='cell')
+    return pd.DataFrame({'lat': lat_c, 'lon': lon_c}, index=index), inverse.ravel()
+
+
+def site_features(district_ids, cells, current, population):
+    """
+    Model rows for the sites: weather and memory features from the weather cell
+    (`current`, one row per cell), population from the district (indexed by ID),
+    as the live panel does for a centroid. Sites sharing a (district, cell) pair
+    share a row, so returns the rows and each site's row position.
+    """
+    pairs, site_row = np.unique(np.column_stack([district_ids, cells]), axis=0, return_inverse=True)
+    rows = current.iloc[pairs[:, 1]].reset_index(drop=True)
+    pop = np.asarray(population, dtype=np.float64)[pairs[:, 0]]
+    rows.insert(0, 'district_id', pairs[:, 0])
+    rows.insert(1, 'population_2020', pop)
+    rows.insert(2, 'pop_log', np.log10(pop + 1))
+    return rows, site_row.ravel()
+
+
+def load_sites_file(file):
+    """Reads a CSV of sites with lat and lon (site_name optional)."""
+    df = pd.read_csv(file)
+    df.columns = df.columns.str.strip().str.lower()
+    missing = {'lat', 'lon'} - set(df.columns)
+    if missing:
+        raise ValueError(f"Sites file is missing columns: {sorted(missing)}")
+    if 'site_name' not in df:
+        df['site_name'] = [f"SITE_{i:05d}" for i in range(len(df))]
+    return df
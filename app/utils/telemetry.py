@@ -0,0 +1,181 @@
+# app/utils/telemetry.py
+import time
+import bisect
+import threading
+import functools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+# Histogram bucket upper bounds (ms), Prometheus style
+BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+RESERVOIR_SIZE = 2048   # Recent samples kept per span for p50/p95
+RERUN_LOG_SIZE = 200    # Recent reruns kept for the diagnostics page
+
+
+class SpanStats:
+    """Running count/sum, fixed-bucket histogram and a bounded window of recent samples."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)   # Last bucket is +Inf
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.recent.append(ms)
+
+
+class TelemetryRegistry:
+    """
+    Process-wide span registry. Streamlit runs every session in a thread of the
+    same server process, so one module-level instance aggregates all users.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._reruns = deque(maxlen=RERUN_LOG_SIZE)
+        self.started_at = time.time()
+
+    def record(self, name, ms):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = SpanStats()
+            stats.add(ms)
+
+    def record_rerun(self, entry):
+        with self._lock:
+            self._reruns.append(entry)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._reruns.clear()
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """List of dicts (one per span) with count, mean, p50, p95 and max in ms."""
+        with self._lock:
+            items = [(name, s.count, s.total_ms, s.max_ms, np.array(s.recent)) for name, s in self._stats.items()]
+
+        rows = []
+        for name, count, total, peak, recent in items:
+            p50, p95 = np.percentile(recent, [50, 95]) if len(recent) else (0.0, 0.0)
+            rows.append({
+                'span': name, 'count': count, 'mean_ms': total / count,
+                'p50_ms': float(p50), 'p95_ms': float(p95), 'max_ms': peak,
+            })
+        return sorted(rows, key=lambda r: r['p95_ms'], reverse=True)
+
+    def recent_reruns(self):
+        with self._lock:
+            return list(self._reruns)
+
+    def prometheus_text(self):
+        """Exposition-format text: a histogram plus p50/p95 gauges per span."""
+        with self._lock:
+            stats = {name: (list(s.buckets), s.count, s.total_ms) for name, s in self._stats.items()}
+
+        lines = [
+            "# HELP heat_risk_span_ms Latency of instrumented app spans in milliseconds.",
+            "# TYPE heat_risk_span_ms histogram",
+        ]
+        for name, (buckets, count, total) in sorted(stats.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS_MS + ["+Inf"], buckets):
+                cumulative += n
+                lines.append(f'heat_risk_span_ms_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'heat_risk_span_ms_sum{{span="{name}"}} {total:.3f}')
+            lines.append(f'heat_risk_span_ms_count{{span="{name}"}} {count}')
+
+        lines.append("# HELP heat_risk_span_quantile_ms Recent-window latency quantiles in milliseconds.")
+        lines.append("# TYPE heat_risk_span_quantile_ms gauge")
+        for row in self.snapshot():
+            lines.append(f'heat_risk_span_quantile_ms{{span="{row["span"]}",quantile="0.5"}} {row["p50_ms"]:.3f}')
+            lines.append(f'heat_risk_span_quantile_ms{{span="{row["span"]}",quantile="0.95"}} {row["p95_ms"]:.3f}')
+
+        lines.append(f"heat_risk_uptime_seconds {time.time() - self.started_at:.0f}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = TelemetryRegistry()
+_local = threading.local()
+
+
+@contextmanager
+def span(name):
+    """Times a block, adds it to the process histograms and to the current rerun's trace."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - t0) * 1000
+        REGISTRY.record(name, ms)
+        trace = getattr(_local, 'trace', None)
+        if trace is not None:
+            trace.append((name, ms))
+
+
+def timed(name=None):
+    """Decorator form of `span`. Wrap *outside* st.cache_* to see hits and misses alike."""
+    def wrap(fn):
+        label = name or fn.__name__
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(label):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def start_rerun():
+    """Called at the top of main.py. Session scripts run on their own threads."""
+    _local.trace = []
+    _local.t0 = time.perf_counter()
+
+
+def end_rerun(page):
+    """Called at the bottom of main.py. Records the whole rerun and keeps its span breakdown."""
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return
+    ms = (time.perf_counter() - _local.t0) * 1000
+    REGISTRY.record("rerun", ms)
+    REGISTRY.record_rerun({
+        'at': time.strftime("%H:%M:%S"),
+        'page': page,
+        'total_ms': round(ms, 1),
+        'spans': [(n, round(t, 1)) for n, t in trace],
+    })
+    _local.trace = None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port):
+    """Serves GET /metrics on a daemon thread. Call once per server process."""
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-exporter").start()
+    return server
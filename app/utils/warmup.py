@@ -0,0 +1,38 @@
+# app/utils/warmup.py
+import time
+import streamlit as st
+from utils.data_loader import load_model, load_map_geojson, load_baseline_data, load_coords
+from utils.telemetry import span
+
+def _history_frames():
+    # Imported here so a lazy start doesn't pull plotly in just to warm caches
+    from views.history import load_animation_figure
+    return load_animation_figure()
+
+def _season_arrays():
+    from utils.season_sim import load_season_arrays
+    return load_season_arrays()
+
+WARMUP_STEPS = [
+    ("model", load_model),
+    ("geometry", load_map_geojson),
+    ("baseline", load_baseline_data),
+    ("coords", load_coords),
+    ("history_frames", _history_frames),
+    ("season_arrays", _season_arrays),
+]
+
+@st.cache_resource
+def warm_caches():
+    """Builds every shared cache once per server process. Returns per-step timings (ms)."""
+    timings = {}
+    for name, loader in WARMUP_STEPS:
+        t0 = time.perf_counter()
+        try:
+            with span(f"warmup.{name}"):
+                loader()
+            timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+        except Exception as e:
+            # A missing artifact shouldn't stop the server; the page will report it on use
+            timings[name] = f"FAILED: {e}"
+    return timings
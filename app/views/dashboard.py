@@ -2,38 +2,176 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import pydeck as pdk
-from utils.data_loader import load_baseline_data, load_map_geojson, load_model
+import plotly.graph_objects as go
+from utils.data_loader import load_baseline_data, load_climatology, load_map_geojson, load_model, model_path, load_explainer, derived
+from utils.explain import top_drivers
 from utils.model_engine import calculate_heat_index, run_prediction
+from utils.physics import risk_class
+from utils.telemetry import span
 
-def show():
-    # --- 1. LOAD ASSETS ---
-    model = load_model()
-    geojson = load_map_geojson() 
-    baseline = load_baseline_data()
+MONTH_LABELS = {4:"APR", 5:"MAY", 6:"JUN", 7:"JUL", 8:"AUG", 9:"SEP"}
+
+COLOR_LOOKUP = {
+    0: [0, 204, 150, 255],    # Green
+    1: [255, 193, 7, 255],    # Yellow
+    2: [255, 87, 34, 255],    # Orange
+    3: [183, 28, 28, 255]     # Red
+}
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def run_cached_ensemble(baseline, month, specs, members, seed):
+    """Ensemble summaries per (month, distributions, size, seed); members themselves are never kept."""
+    # Imported on demand: the pool machinery is only needed once someone runs an ensemble
+    from utils.ensemble import month_arrays, sample_stressors, run_ensemble
+    base = month_arrays(baseline, month)
+    acc = run_ensemble(base, sample_stressors(specs, members, seed), model=load_model(), model_path=model_path())
+    return acc.district_summary(base['districts']), acc.national_summary()
+
+def select_baseline(source, season_2023, climatology):
+    """SEASON_2023 is the single-year mean; CLIM_* pick one statistic of the multi-year climatology."""
+    if source == "SEASON_2023" or climatology is None:
+        return season_2023
+    stat = source.split("_", 1)[1].lower()
+    return climatology[climatology['stat'] == stat].reset_index(drop=True)
+
+def simulate_scenario(model, baseline, month, d_temp, d_rh, d_pop):
+    """Applies the stressors to one month of the baseline and scores every district."""
+    sim_df = baseline[baseline['month'] == month].copy()
     
+    # Apply Modifiers
+    sim_df['temp_c'] += d_temp
+    sim_df['humidity_relative'] = (sim_df['humidity_relative'] + d_rh).clip(0, 100)
+    sim_df['population_2020'] = sim_df['population_2020'] * (1 + d_pop/100)
+    sim_df['pop_log'] = np.log10(sim_df['population_2020'] + 1)
+    
+    # Re-calc Physics
+    sim_df['heat_index_c'] = calculate_heat_index(sim_df['temp_c'], sim_df['humidity_relative'])
+    sim_df['temp_roll_24h'] += d_temp
+    sim_df['hi_max_72h'] = np.maximum(sim_df['hi_max_72h'], sim_df['heat_index_c'])
+    
+    # Lag Heuristic
+    sim_df['risk_lag_1h'] = risk_class(sim_df['heat_index_c'].to_numpy())
+    
+    # Predict
+    preds, _ = run_prediction(model, sim_df)
+    sim_df['pred_risk'] = preds
+    return sim_df
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_simulation(source, month, d_temp, d_rh, d_pop):
+    """simulate_scenario memoized on its inputs; the baseline is keyed by its source name."""
+    baseline = select_baseline(source, load_baseline_data(), load_climatology())
+    return simulate_scenario(load_model(), baseline, month, d_temp, d_rh, d_pop)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def scenario_drivers(source, month, d_temp, d_rh, d_pop):
+    """Per-district attributions (log-odds) toward the predicted class; None if the model has no trees to explain."""
+    explainer = load_explainer()
+    if explainer is None:
+        return None
+    df = cached_simulation(source, month, d_temp, d_rh, d_pop)
+    return explainer.for_class(explainer.explain(df), df['pred_risk'], index=df['district_name'].astype(str).to_numpy())
+
+def scenario_result(season, source, month, d_temp, d_rh, d_pop):
+    """Per-district result for one set of inputs (both modes are cached per input)."""
+    if season:
+        # Imported on demand: only this mode needs scipy and the hourly arrays
+        from utils.season_sim import exposure_summary
+        return exposure_summary(d_temp, d_rh, d_pop, month=month)
+    return cached_simulation(source, month, d_temp, d_rh, d_pop)
+
+def style_geojson(geojson, df):
+    """Writes fill colour and tooltip fields from the simulation into the GeoJSON features."""
+    df['fill_color'] = df['pred_risk'].map(COLOR_LOOKUP)
+    if 'drivers' not in df:
+        df['drivers'] = "N/A"
+    # One keyed lookup per feature instead of a string scan of the frame
+    rows = (df.assign(district_name=df['district_name'].astype(str))
+              .drop_duplicates('district_name').set_index('district_name')
+              [['fill_color', 'heat_index_c', 'temp_c', 'pred_risk', 'drivers']].to_dict('index'))
+    
+    for feature in geojson['features']:
+        dist_name = feature['properties']['district_name']
+        row = rows.get(dist_name)
+        feature['properties']['fill_color'] = row['fill_color'] if row else [20, 20, 20, 255]
+        
+        if row:
+            feature['properties']['hi'] = round(row['heat_index_c'], 1)
+            feature['properties']['temp'] = round(row['temp_c'], 1)
+            feature['properties']['risk_label'] = ["SAFE", "CAUTION", "DANGER", "EXTREME"][int(row['pred_risk'])]
+            feature['properties']['drivers'] = row['drivers']
+        else:
+            feature['properties']['hi'] = "N/A"
+            feature['properties']['drivers'] = "N/A"
+    return geojson
+
+@derived
+@st.cache_resource(max_entries=16, show_spinner=False)
+def styled_layer(season, source, month, d_temp, d_rh, d_pop):
+    """Map layer for one scenario. Styles a copy, so the shared map GeoJSON is never mutated."""
+    base = load_map_geojson()
+    geojson = {**base, 'features': [{**f, 'properties': dict(f['properties'])} for f in base['features']]}
+    df = scenario_result(season, source, month, d_temp, d_rh, d_pop)
+    drivers = None if season else scenario_drivers(source, month, d_temp, d_rh, d_pop)
+    if drivers is not None:
+        df = df.assign(drivers=top_drivers(drivers).to_numpy())
+    style_geojson(geojson, df)
+    return pdk.Layer(
+        "GeoJsonLayer",
+        geojson,
+        opacity=1.0,
+        stroked=True,
+        filled=True,
+        get_fill_color="properties.fill_color",
+        get_line_color=[0, 0, 0], # Pure black borders
+        get_line_width=1500,
+        pickable=True,
+        auto_highlight=True,
+    )
+
+def show():
     # Terminal Header
     st.markdown("""
     <div style='border-bottom: 1px solid #333; padding-bottom: 10px; margin-bottom: 20px;'>
         <h2 style='margin:0; color: white;'> SIMULATION_ZONE <span style='font-size: 14px; color: #00FF41;'>[ACTIVE]</span></h2>
     </div>
     """, unsafe_allow_html=True)
+
+    # Each panel reruns on its own: an ensemble widget never redraws the map and vice versa
+    simulation_panel()
+    ensemble_panel()
+
+@st.fragment
+def simulation_panel():
+    # --- 1. LOAD ASSETS ---
+    season_2023 = load_baseline_data()
+    climatology = load_climatology()
+    baseline_sources = ["SEASON_2023"]
+    if climatology is not None:
+        baseline_sources += ["CLIM_MEAN", "CLIM_P50", "CLIM_P90", "CLIM_P99"]
     
     col_controls, col_map = st.columns([1, 3])
     
     # --- 2. CONTROLS ---
     with col_controls:
+        # MONTHLY_MEAN scores one averaged row per district; HOURLY_SEASON replays every 2023 hour
+        sim_mode = st.radio("SIM_MODE", ["MONTHLY_MEAN", "HOURLY_SEASON"], horizontal=True)
+
         # We use a container to visually box the controls
         with st.container(border=True):
             with st.form("sim_form"):
                 st.markdown("**>> SCENARIO_PARAMETERS**")
+
+                # Baseline: the 2023 season, or a statistic of the multi-year climatology
+                source = st.selectbox("BASELINE_SOURCE", baseline_sources, disabled=len(baseline_sources) == 1)
+                baseline = select_baseline(source, season_2023, climatology)
                 
                 # Month Selector
-                month_map = {4:"APR", 5:"MAY", 6:"JUN", 7:"JUL", 8:"AUG", 9:"SEP"}
                 sel_month = st.select_slider(
                     "BASELINE_SEASON", 
                     options=[4, 5, 6, 7, 8, 9], 
                     value=6, 
-                    format_func=lambda x: month_map[x]
+                    format_func=lambda x: MONTH_LABELS[x]
                 )
                 
                 # BASELINE CONTEXT
@@ -43,7 +181,8 @@ def show():
                 
                 st.code(f"""
 [BASELINE_DATA]
-MONTH: {month_map[sel_month]}
+SOURCE: {source}
+MONTH: {MONTH_LABELS[sel_month]}
 AVG_TEMP: {avg_t:.1f}C
 AVG_HUM : {avg_rh:.0f}%
                 """)
@@ -56,38 +195,22 @@ AVG_HUM : {avg_rh:.0f}%
                 submitted = st.form_submit_button(">> EXECUTE_SIMULATION", type="primary")
             
     # --- 3. LOGIC ---
-    if submitted or 'sim_data' not in st.session_state:
-        sim_df = baseline[baseline['month'] == sel_month].copy()
-        
-        # Apply Modifiers
-        sim_df['temp_c'] += d_temp
-        sim_df['humidity_relative'] = (sim_df['humidity_relative'] + d_rh).clip(0, 100)
-        sim_df['population_2020'] = sim_df['population_2020'] * (1 + d_pop/100)
-        sim_df['pop_log'] = np.log10(sim_df['population_2020'] + 1)
-        
-        # Re-calc Physics
-        sim_df['heat_index_c'] = calculate_heat_index(sim_df['temp_c'], sim_df['humidity_relative'])
-        sim_df['temp_roll_24h'] += d_temp
-        sim_df['hi_max_72h'] = np.maximum(sim_df['hi_max_72h'], sim_df['heat_index_c'])
-        
-        # Lag Heuristic
-        conditions = [
-            (sim_df['heat_index_c'] < 27),
-            (sim_df['heat_index_c'] >= 27) & (sim_df['heat_index_c'] < 32),
-            (sim_df['heat_index_c'] >= 32) & (sim_df['heat_index_c'] < 41),
-            (sim_df['heat_index_c'] >= 41)
-        ]
-        sim_df['risk_lag_1h'] = np.select(conditions, [0, 1, 2, 3], default=0)
-        
-        # Predict
-        preds, _ = run_prediction(model, sim_df)
-        sim_df['pred_risk'] = preds
-        
-        st.session_state['sim_data'] = sim_df
+    # Only the submitted inputs are kept; results and map layers are memoized on them
+    season = sim_mode == "HOURLY_SEASON"
+    state_key = 'season_inputs' if season else 'sim_inputs'
+    if submitted or state_key not in st.session_state:
+        st.session_state[state_key] = (source, sel_month, d_temp, d_rh, d_pop)
+    inputs = (season, *st.session_state[state_key])
+
+    try:
+        with span("dashboard.season_simulate" if season else "dashboard.simulate"), \
+                st.spinner("SCORING 2023 SEASON (HOURLY)..." if season else "SIMULATING..."):
+            df = scenario_result(*inputs)
+    except FileNotFoundError:
+        st.error("[MISSING_DATA] app/data/app_season_2023.parquet not found. Re-run src/prepare_app_data.py.")
+        return
 
     # --- 4. DISPLAY ---
-    df = st.session_state['sim_data']
-    
     with col_map:
         # CRISIS ADVISORY
         risk_districts = len(df[df['pred_risk'] == 3])
@@ -106,46 +229,19 @@ AVG_HUM : {avg_rh:.0f}%
 
         # KPI ROW
         k1, k2, k3 = st.columns(3)
-        risk_pop = df[df['pred_risk'] >= 2]['population_2020'].sum()
-        k1.metric("POP_AT_RISK", f"{risk_pop/1_000_000:.1f} M")
-        k2.metric("CRITICAL_SECTORS", f"{risk_districts}")
-        k3.metric("AVG_HEAT_INDEX", f"{df['heat_index_c'].mean():.1f}°C")
+        if season:
+            k1.metric("EXTREME_PERSON_HOURS", f"{df['person_hours_extreme'].sum()/1e9:.2f} B")
+            k2.metric("CRITICAL_SECTORS", f"{risk_districts}")
+            k3.metric("MAX_EXTREME_DAYS", f"{df['days_extreme'].max()}")
+        else:
+            risk_pop = df[df['pred_risk'] >= 2]['population_2020'].sum()
+            k1.metric("POP_AT_RISK", f"{risk_pop/1_000_000:.1f} M")
+            k2.metric("CRITICAL_SECTORS", f"{risk_districts}")
+            k3.metric("AVG_HEAT_INDEX", f"{df['heat_index_c'].mean():.1f}°C")
         
         # MAP
-        color_lookup = {
-            0: [0, 204, 150, 255],    # Green
-            1: [255, 193, 7, 255],    # Yellow
-            2: [255, 87, 34, 255],    # Orange
-            3: [183, 28, 28, 255]     # Red
-        }
-        
-        df['fill_color'] = df['pred_risk'].map(color_lookup)
-        color_dict = dict(zip(df['district_name'], df['fill_color']))
-        
-        for feature in geojson['features']:
-            dist_name = feature['properties']['district_name']
-            feature['properties']['fill_color'] = color_dict.get(dist_name, [20, 20, 20, 255])
-            
-            if dist_name in df['district_name'].values:
-                row = df[df['district_name'] == dist_name].iloc[0]
-                feature['properties']['hi'] = round(row['heat_index_c'], 1)
-                feature['properties']['temp'] = round(row['temp_c'], 1)
-                feature['properties']['risk_label'] = ["SAFE", "CAUTION", "DANGER", "EXTREME"][int(row['pred_risk'])]
-            else:
-                feature['properties']['hi'] = "N/A"
-
-        layer = pdk.Layer(
-            "GeoJsonLayer",
-            geojson,
-            opacity=1.0,
-            stroked=True,
-            filled=True,
-            get_fill_color="properties.fill_color",
-            get_line_color=[0, 0, 0], # Pure black borders
-            get_line_width=1500,
-            pickable=True,
-            auto_highlight=True,
-        )
+        with span("dashboard.style_geojson"):
+            layer = styled_layer(*inputs)
 
         view_state = pdk.ViewState(latitude=30.3753, longitude=69.3451, zoom=4.5)
         
@@ -155,7 +251,79 @@ AVG_HUM : {avg_rh:.0f}%
                     "<b>SECTOR: {district_name}</b><br/>"
                     "RISK_LEVEL: {risk_label}<br/>"
                     "HEAT_INDEX: {hi}°C<br/>"
-                    "TEMP: {temp}°C</div>"
+                    "TEMP: {temp}°C<br/>"
+                    "DRIVERS: {drivers}</div>"
         }
 
-        st.pydeck_chart(pdk.Deck(layers=[layer], initial_view_state=view_state, tooltip=tooltip))
\ No newline at end of file
+        with span("dashboard.render_deck"):
+            st.pydeck_chart(pdk.Deck(layers=[layer], initial_view_state=view_state, tooltip=tooltip))
+
+        # RISK DRIVERS (Monthly mode): why a sector got its class
+        if not season:
+            with span("dashboard.explain"):
+                drivers = scenario_drivers(*inputs[1:])
+            if drivers is not None:
+                show_drivers(df, drivers)
+
+        # EXPOSURE TABLE (Season mode)
+        if season:
+            st.markdown("**>> EXPOSURE_LEDGER [HOURS / PERSON-HOURS PER CLASS]**")
+            ledger = df.drop(columns=['pred_risk', 'fill_color', 'heat_index_c', 'temp_c'], errors='ignore')
+            ledger = ledger.sort_values('person_hours_extreme', ascending=False)
+            st.dataframe(ledger, use_container_width=True, hide_index=True)
+            st.download_button(">> EXPORT_LEDGER", ledger.to_csv(index=False), file_name="season_exposure.csv", mime="text/csv")
+
+def show_drivers(df, drivers):
+    """Bar breakdown of one sector's attributions toward its predicted class."""
+    labels = ["SAFE", "CAUTION", "DANGER", "EXTREME"]
+    ranked = df.sort_values(['pred_risk', 'heat_index_c'], ascending=False)['district_name'].astype(str).tolist()
+    st.markdown("**>> RISK_DRIVERS [CONTRIBUTION TO PREDICTED CLASS, LOG-ODDS]**")
+    sector = st.selectbox("DRIVER_SECTOR", ranked, key="driver_sector")
+    row = drivers.loc[sector]
+    bias, row = row['bias'], row.drop('bias').sort_values()
+    risk = int(df.loc[df['district_name'].astype(str) == sector, 'pred_risk'].iloc[0])
+    fig = go.Figure(go.Bar(
+        x=row.to_numpy(), y=row.index, orientation='h',
+        marker_color=["#D50000" if v > 0 else "#00CC96" for v in row.to_numpy()],
+    ))
+    fig.update_layout(
+        height=300, title=f"SECTOR {sector.upper()} -> {labels[risk]} (BASE {bias:+.2f})",
+        margin={"t": 40, "b": 10, "l": 10, "r": 10},
+        paper_bgcolor="#000000", plot_bgcolor="#000000",
+        font={'family': "Roboto Mono", 'color': "white"},
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment
+def ensemble_panel():
+    # --- 5. ENSEMBLE (Uncertainty Ranges) ---
+    # Runs on the last submitted baseline source and month of the simulation panel
+    source, sel_month = st.session_state.get('sim_inputs', ("SEASON_2023", 6))[:2]
+    with st.expander(">> ENSEMBLE_ANALYSIS [MONTE_CARLO]"):
+        with st.form("ensemble_form"):
+            e1, e2, e3 = st.columns(3)
+            dist = e1.selectbox("DISTRIBUTION", ["UNIFORM", "TRIANGULAR", "NORMAL"])
+            members = e2.number_input("MEMBERS", 200, 20000, 2000, step=200)
+            seed = e3.number_input("SEED", 0, 10_000, 42)
+            t_range = st.slider("GLOBAL_WARMING RANGE [dC]", 0.0, 5.0, (1.5, 2.5))
+            rh_range = st.slider("HUMIDITY_SHIFT RANGE [%]", -20, 20, (-5, 5))
+            pop_range = st.slider("POPULATION_BOOM RANGE [%]", 0, 50, (0, 10))
+            run_ens = st.form_submit_button(">> EXECUTE_ENSEMBLE")
+
+        if run_ens:
+            specs = {'d_temp': (dist, *t_range), 'd_rh': (dist, *rh_range), 'd_pop': (dist, *pop_range)}
+            baseline = select_baseline(source, load_baseline_data(), load_climatology())
+            with span("dashboard.ensemble"), st.spinner(f"EVALUATING {members} MEMBERS..."):
+                st.session_state['ensemble'] = (sel_month,) + run_cached_ensemble(baseline, sel_month, specs, int(members), int(seed))
+
+        if 'ensemble' in st.session_state:
+            ens_month, summary, national = st.session_state['ensemble']
+            n1, n2, n3 = st.columns(3)
+            n1.metric("P(ANY_EXTREME_SECTOR)", f"{national['p_any_extreme']:.0%}")
+            n2.metric("EXTREME_SECTORS [p5-p95]", f"{national['extreme_sectors_p05']}-{national['extreme_sectors_p95']}")
+            n3.metric("POP_AT_EXTREME [p50]", f"{national['pop_extreme_m_p50']:.1f} M")
+            st.caption(f"MONTH {MONTH_LABELS[ens_month]} | {national['members']} MEMBERS")
+            st.dataframe(
+                summary.sort_values('p_extreme', ascending=False).round(3),
+                use_container_width=True, hide_index=True,
+            )
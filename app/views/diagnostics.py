@@ -0,0 +1,103 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from utils.telemetry import REGISTRY
+from utils.data_loader import load_drift_monitor, load_registry
+from utils.drift import DRIFT_BINS, PSI_WARN, PSI_DRIFT, MIN_LIVE, HALF_LIFE_H
+
+def show():
+    # TERMINAL HEADER
+    st.markdown("""
+    <div style='border-bottom: 1px solid #333; padding-bottom: 10px; margin-bottom: 20px;'>
+        <h2 style='margin:0; color: white; font-family: Roboto Mono;'>DIAGNOSTICS <span style='font-size: 14px; color: #FFC107;'>[MAINTENANCE_CHANNEL]</span></h2>
+    </div>
+    """, unsafe_allow_html=True)
+
+    drift_panel()
+
+    stats = pd.DataFrame(REGISTRY.snapshot())
+    if stats.empty:
+        st.code("[TELEMETRY] NO SPANS RECORDED YET. USE THE OTHER MODULES FIRST.")
+        return
+
+    # 1. Span Table
+    st.markdown("**>> SPAN_LATENCY [ms] (ALL SESSIONS, THIS PROCESS)**")
+    st.dataframe(stats.round(1), use_container_width=True, hide_index=True)
+
+    # 2. p50 / p95 Chart
+    top = stats.head(15).iloc[::-1]
+    fig = go.Figure([
+        go.Bar(y=top['span'], x=top['p50_ms'], name='p50', orientation='h', marker_color='#00CC96'),
+        go.Bar(y=top['span'], x=top['p95_ms'], name='p95', orientation='h', marker_color='#FF5722'),
+    ])
+    fig.update_layout(
+        barmode='group', height=420,
+        margin={"t": 10, "b": 10, "l": 10, "r": 10},
+        paper_bgcolor="#000000", plot_bgcolor="#000000",
+        font={'family': "Roboto Mono", 'color': "white"},
+        xaxis_title="ms",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # 3. Recent Reruns
+    st.markdown("**>> RECENT_RERUNS**")
+    reruns = REGISTRY.recent_reruns()[::-1][:25]
+    st.dataframe(pd.DataFrame([
+        {'at': r['at'], 'page': r['page'], 'total_ms': r['total_ms'],
+         'breakdown': ", ".join(f"{n}={t}" for n, t in r['spans'])}
+        for r in reruns
+    ]), use_container_width=True, hide_index=True)
+
+    # 4. Export
+    col1, col2 = st.columns(2)
+    col1.download_button(">> EXPORT_METRICS", REGISTRY.prometheus_text(), file_name="heat_risk_metrics.txt", mime="text/plain")
+    if col2.button(">> RESET_COUNTERS"):
+        REGISTRY.reset()
+        st.rerun()
+    st.caption("Plain-text metrics: append `?metrics=1` to the app URL, or set HEAT_RISK_METRICS_PORT to serve GET /metrics for scrapers.")
+
+def drift_panel():
+    st.markdown("**>> FEATURE_DRIFT [LIVE INPUTS vs TRAINING]**")
+    monitor = load_drift_monitor()
+    if monitor is None:
+        st.code("[DRIFT] NO TRAINING REFERENCE. RUN: python src/build_drift_reference.py")
+        return
+
+    report = monitor.report()
+    national = report[report['district_id'] < 0].drop(columns='district_id').set_index('feature')
+    st.dataframe(national.round(3), use_container_width=True)
+
+    districts = report[(report['district_id'] >= 0) & report['status'].isin(["WATCH", "DRIFT"])]
+    districts = districts.assign(district_name=load_registry().categorical(districts['district_id']))
+    st.caption(f"PSI > {PSI_WARN} WATCH, > {PSI_DRIFT} (OR KS ABOVE ITS 1% CRITICAL VALUE) DRIFT | "
+               f"JUDGED AFTER {MIN_LIVE} LIVE HOURS | LIVE WEIGHTS HALVE EVERY {HALF_LIFE_H} H")
+    if len(districts):
+        st.markdown(f"**>> DRIFTING_SECTORS [{districts['district_id'].nunique()}]**")
+        st.dataframe(districts.sort_values('psi', ascending=False)
+                              [['district_name', 'feature', 'status', 'psi', 'ks', 'n_live', 'train_mean', 'live_mean']].round(3),
+                     use_container_width=True, hide_index=True)
+
+    # Reference vs live histogram (national, or one sector)
+    c1, c2 = st.columns(2)
+    feature = c1.selectbox("DRIFT_FEATURE", list(DRIFT_BINS), key="drift_feature")
+    sectors = ["ALL_SECTORS"] + list(load_registry().names)
+    sector = c2.selectbox("DRIFT_SECTOR", sectors, key="drift_sector")
+    ref, live = monitor.reference[feature], monitor.live[feature]
+    if sector == "ALL_SECTORS":
+        ref_counts, live_counts = ref.counts.sum(axis=0), live.counts.sum(axis=0)
+    else:
+        i = sectors.index(sector) - 1
+        ref_counts, live_counts = ref.counts[i], live.counts[i]
+    centres = ref.edges[:-1] + ref.width / 2
+    fig = go.Figure()
+    for name, counts, color in [("TRAINING", ref_counts, '#00F0FF'), ("LIVE", live_counts, '#FF5722')]:
+        if counts.sum() > 0:
+            fig.add_trace(go.Scatter(x=centres, y=counts / counts.sum(), name=name, line={'color': color, 'shape': 'hvh'}))
+    fig.update_layout(
+        height=280,
+        margin={"t": 10, "b": 10, "l": 10, "r": 10},
+        paper_bgcolor="#000000", plot_bgcolor="#000000",
+        font={'family': "Roboto Mono", 'color': "white"},
+        xaxis_title=feature, yaxis_title="share",
+    )
+    st.plotly_chart(fig, use_container_width=True)
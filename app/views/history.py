@@ -1,35 +1,26 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from utils.data_loader import load_history, load_map_geojson, load_model
+from utils.data_loader import load_history, load_map_geojson, load_model, load_heatwave_events, derived
 from utils.model_engine import run_prediction, calculate_heat_index
+from utils.telemetry import span
 
-def show():
-    # TERMINAL HEADER
-    st.markdown("""
-    <div style='border-bottom: 1px solid #333; padding-bottom: 10px; margin-bottom: 20px;'>
-        <h2 style='margin:0; color: white; font-family: Roboto Mono;'>Historical Presentation <span style='font-size: 14px; color: #FF00FF;'>[ARCHIVE_MOUNTED]</span></h2>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # 1. Load Data
-    with st.spinner("DECRYPTING_ARCHIVE..."):
-        hist_df = load_history()
-        geojson = load_map_geojson()
-        model = load_model()
+def build_animation_frames(hist_df, model):
+    """Scores the archive slice and resamples it to 4-hour animation frames."""
+    # 2. Names arrive canonical and categorical from the loader (utils/districts.py)
 
-    # 2. Data Polish
-    hist_df['district_name'] = hist_df['district_name'].str.strip().str.title()
-    
     # 3. Run AI Prediction
+    # (new columns go on a copy: the loaded frame is shared, and read-only when mapped from the store)
     preds, _ = run_prediction(model, hist_df)
-    hist_df['pred_risk'] = preds
-    hist_df['heat_index_c'] = calculate_heat_index(hist_df['temp_c'], hist_df['humidity_relative'])
+    hist_df = hist_df.assign(
+        pred_risk=preds,
+        heat_index_c=calculate_heat_index(hist_df['temp_c'], hist_df['humidity_relative']),
+    )
 
     # 4. OPTIMIZATION: Resample to 4-Hour Intervals
     hist_df['time_group'] = hist_df['time'].dt.floor('4h')
     
-    anim_df = hist_df.groupby(['district_name', 'time_group']).agg({
+    anim_df = hist_df.groupby(['district_name', 'time_group'], observed=True).agg({
         'pred_risk': 'max',      
         'heat_index_c': 'max',   
         'temp_c': 'max',
@@ -37,7 +28,19 @@ def show():
     }).reset_index()
     
     anim_df['time_str'] = anim_df['time_group'].dt.strftime('%Y-%m-%d %H:00')
-    anim_df = anim_df.sort_values('time_group')
+    return anim_df.sort_values('time_group')
+
+@st.cache_data
+def load_animation_frames():
+    """Animation frames for the archive slice, computed once per server process."""
+    return build_animation_frames(load_history(), load_model())
+
+@derived
+@st.cache_resource
+def load_animation_figure():
+    """The animated map, built once per server process (the figure is never mutated)."""
+    anim_df = load_animation_frames()
+    geojson = load_map_geojson()
 
     # 5. Render Native Plotly Animation (Terminal Style)
     fig = px.choropleth(
@@ -162,12 +165,47 @@ def show():
             "font": {"color": "white", "family": "Roboto Mono"}
         }]
     )
+    return fig
+
+def show():
+    # TERMINAL HEADER
+    st.markdown("""
+    <div style='border-bottom: 1px solid #333; padding-bottom: 10px; margin-bottom: 20px;'>
+        <h2 style='margin:0; color: white; font-family: Roboto Mono;'>Historical Presentation <span style='font-size: 14px; color: #FF00FF;'>[ARCHIVE_MOUNTED]</span></h2>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # 1. Load Data, Predict & Resample, then build the animation (all cached)
+    with st.spinner("DECRYPTING_ARCHIVE..."):
+        with span("history.build_figure"):
+            fig = load_animation_figure()
     
-    st.plotly_chart(fig, use_container_width=True)
+    with span("history.render_figure"):
+        st.plotly_chart(fig, use_container_width=True)
     
     # Footer Note
     st.markdown("""
     <div style="font-family: Roboto Mono; font-size: 12px; color: #666; margin-top: -10px; border-top: 1px solid #333; padding-top: 10px;">
         ℹ [SYSTEM_NOTE] TIMELINE RESAMPLED (4H INTERVALS) FOR RENDERING PERFORMANCE.
     </div>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    """, unsafe_allow_html=True)
+
+    # Event catalogue from src/detect_heatwaves.py (whole archive, not just this slice)
+    events = load_heatwave_events()
+    if events is not None and len(events):
+        st.markdown("**>> EVENT_CATALOGUE [TOP 20 BY PERSON-HOURS EXPOSED]**")
+        top = events.head(20)
+        st.dataframe(
+            top[['start', 'end', 'duration_h', 'n_districts', 'peak_hi_c', 'peak_district', 'person_hours']],
+            use_container_width=True,
+            column_config={
+                'start': st.column_config.DatetimeColumn("START", format="YYYY-MM-DD HH:00"),
+                'end': st.column_config.DatetimeColumn("END", format="YYYY-MM-DD HH:00"),
+                'duration_h': "HOURS",
+                'n_districts': "DISTRICTS",
+                'peak_hi_c': st.column_config.NumberColumn("PEAK_HI", format="%.1f"),
+                'peak_district': "PEAK_AT",
+                'person_hours': st.column_config.NumberColumn("PERSON_HOURS", format="%.3e"),
+            },
+        )
+        st.caption(f"{len(events):,} EVENTS DETECTED ACROSS THE ARCHIVE")
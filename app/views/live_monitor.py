@@ -3,8 +3,67 @@ import pandas as pd
 import numpy as np
 import requests
 import plotly.graph_objects as go
-from utils.data_loader import load_coords, load_model, load_baseline_data
+from utils.data_loader import load_coords, load_model, load_baseline_data, load_registry, load_alert_engine, load_district_index, load_drift_monitor
+from utils.alerts import AlertEngine, LEVEL_LABELS
 from utils.model_engine import calculate_heat_index, run_prediction
+from utils.forecast_engine import ForecastEngine, fetch_open_meteo, load_forecast_file, current_inputs
+from utils.spatial_index import MATCH_LABELS, weather_cells, site_features, load_sites_file
+from utils.telemetry import span
+
+RISK_LABELS = {0: "SAFE", 1: "CAUTION", 2: "DANGER", 3: "EXTREME"}
+RISK_COLORS = {0: "#00CC96", 1: "#FFC107", 2: "#FF5722", 3: "#D50000"}
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def fetch_forecast_inputs(coords, days):
+    """Open-Meteo hourly inputs for every district, refreshed every 30 minutes."""
+    return fetch_open_meteo(coords, days=days), pd.Timestamp.utcnow().tz_localize(None).floor('h')
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def fetch_site_weather(cells):
+    """Open-Meteo hourly inputs per weather cell (last 3 days + today), refreshed every 30 minutes."""
+    return fetch_open_meteo(cells, days=1), pd.Timestamp.utcnow().tz_localize(None).floor('h')
+
+def screen_sites(model, baseline, sites):
+    """
+    Locates every site, builds feature rows from each site's weather cell and
+    district, and scores them all in a single run_prediction call.
+    """
+    ids, match = load_district_index().locate(sites['lat'], sites['lon'])
+    sites = sites.assign(district_id=ids, matched=MATCH_LABELS[match])
+    located = sites[sites['district_id'] >= 0].reset_index(drop=True)
+    if located.empty:
+        return sites.assign(district_name=None, pred_risk=np.nan, heat_index_c=np.nan)
+
+    cells, cell_of_site = weather_cells(located['lat'], located['lon'])
+    inputs, now = fetch_site_weather(cells)
+    current = current_inputs(inputs, now).reindex(cells.index)
+    population = baseline.groupby('district_id')['population_2020'].first().reindex(range(len(load_registry())))
+    features, row = site_features(located['district_id'].to_numpy(), cell_of_site, current, population.to_numpy())
+
+    preds, probs = run_prediction(model, features)
+    located = located.assign(district_name=load_registry().categorical(located['district_id']),
+                             heat_index_c=features['heat_index_c'].to_numpy()[row], pred_risk=preds[row],
+                             confidence=probs.max(axis=1)[row])
+    return pd.concat([located, sites[sites['district_id'] < 0]], ignore_index=True)
+
+def record_drift(inputs, until=None):
+    """Feeds observed input hours (time, district_name + inputs) to the shared drift monitor, if one is built."""
+    monitor = load_drift_monitor()
+    if monitor is None:
+        return
+    if until is not None:
+        inputs = inputs[inputs['time'] <= until]
+    monitor.observe(load_registry().ids(inputs['district_name'].astype(str)), inputs)
+
+def run_rollout(model, baseline, inputs, start, days):
+    """Steps the model through the horizon for all districts (one batched predict per hour)."""
+    populations = baseline.groupby('district_name', observed=True)['population_2020'].first()
+    populations.index = populations.index.astype(str)
+    populations = populations[populations.index.isin(inputs['district_name'].unique())]
+    if start is not None:
+        inputs = inputs[inputs['time'] < start + pd.Timedelta(days=days)]
+    district_ids = load_registry().ids(populations.index)
+    return ForecastEngine(model, populations, district_ids).rollout(inputs, start=start)
 
 def show():
     # TERMINAL HEADER
@@ -13,7 +72,14 @@ def show():
         <h2 style='margin:0; color: white; font-family: Roboto Mono;'>LIVE_UPLINK <span style='font-size: 14px; color: #00F0FF;'>[STANDBY]</span></h2>
     </div>
     """, unsafe_allow_html=True)
-    
+
+    # The point reading and the rollout rerun independently of each other
+    live_panel()
+    forecast_panel()
+    sites_panel()
+
+@st.fragment
+def live_panel():
     coords = load_coords()
     model = load_model()
     baseline = load_baseline_data()
@@ -23,7 +89,7 @@ def show():
     with col1:
         with st.container(border=True):
             st.markdown("**>> TARGET_SELECTION**")
-            target = st.selectbox("SECTOR_COORDINATES", sorted(coords.index))
+            target = st.selectbox("SECTOR_COORDINATES", sorted(coords.index), key="live_target")
             
             st.write("")
             st.write("")
@@ -36,8 +102,9 @@ def show():
                     url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,wind_speed_10m,direct_radiation"
                     
                     try:
-                        r = requests.get(url, timeout=5)
-                        data = r.json()['current']
+                        with span("live.open_meteo"):
+                            r = requests.get(url, timeout=5)
+                            data = r.json()['current']
                         
                         # Process
                         temp = data['temperature_2m']
@@ -52,6 +119,7 @@ def show():
                         
                         # Build Input
                         input_row = pd.DataFrame([{
+                            'district_id': load_registry().ids([target])[0],
                             'population_2020': pop,
                             'pop_log': np.log10(pop + 1),
                             'temp_c': temp,
@@ -67,6 +135,11 @@ def show():
                         pred, prob = run_prediction(model, input_row)
                         risk_class = pred[0]
                         
+                        # Feed the shared alert engine (only this district's machine is touched)
+                        now = pd.Timestamp.utcnow().tz_localize(None)
+                        load_alert_engine().update(load_registry().ids([target]), [risk_class], now)
+                        record_drift(input_row.assign(time=now, district_name=target))
+                        
                         st.session_state['live_result'] = {
                             'temp': temp, 'rh': rh, 'hi': hi, 'solar': solar, 
                             'risk': risk_class, 'district': target
@@ -132,4 +205,125 @@ def show():
                 paper_bgcolor="#000000",
                 font={'family': "Roboto Mono", 'color': "white"}
             )
-            st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+            st.plotly_chart(fig, use_container_width=True)
+
+    # Alerts persist across sessions and restarts (utils/alerts.py)
+    engine = load_alert_engine()
+    if engine.store is None:
+        st.warning("[SYSTEM_WARNING] ALERT DATABASE OWNED BY ANOTHER SERVER PROCESS. ALERTS ON THIS NODE ARE NOT PERSISTED; "
+                   "SET HEAT_RISK_ALERTS_DB PER PROCESS.")
+    alerts = engine.open_alerts()
+    if len(alerts):
+        alerts['district_name'] = load_registry().categorical(alerts['district_id'])
+        alerts['level'] = alerts['level'].map(LEVEL_LABELS)
+        alerts['peak_level'] = alerts['peak_level'].map(LEVEL_LABELS)
+        st.markdown(f"**>> ACTIVE_ALERTS [{len(alerts)}]**")
+        st.dataframe(alerts[['alert_id', 'district_name', 'level', 'peak_level', 'opened_at', 'updated_at']],
+                     use_container_width=True, hide_index=True)
+
+def alert_outlook(forecast):
+    """Alerts the forecast would raise, from a throwaway engine replaying it hour by hour."""
+    registry = load_registry()
+    fc = forecast.assign(district_id=registry.ids(forecast['district_name']))
+    transitions = AlertEngine(len(registry)).consume(fc[fc['district_id'] >= 0])
+    raised = transitions[transitions['to_level'] > transitions['from_level']]
+    outlook = raised.groupby('district_id').agg(first_alert=('time', 'min'), peak_level=('to_level', 'max'))
+    outlook.index = pd.CategoricalIndex(registry.categorical(outlook.index), name='district_name')
+    outlook['peak_level'] = outlook['peak_level'].map(LEVEL_LABELS)
+    return outlook.sort_values('first_alert')
+
+@st.fragment
+def forecast_panel():
+    # --- FORECAST ROLLOUT (ALL SECTORS) ---
+    coords = load_coords()
+    model = load_model()
+    baseline = load_baseline_data()
+    st.markdown("---")
+    st.markdown("**>> FORECAST_ROLLOUT [ALL_SECTORS]**")
+    f1, f2, f3 = st.columns([1, 1, 2])
+    source = f1.radio("INPUT_FEED", ["OPEN_METEO", "LOCAL_FILE"], horizontal=True)
+    days = f2.slider("HORIZON [DAYS]", 1, 7, 7)
+    upload = f3.file_uploader("FORECAST_FILE (time, district_name, temp_c, humidity_relative, wind_speed_m_s, solar_w_m2)", type=["csv", "parquet"]) if source == "LOCAL_FILE" else None
+
+    if st.button(" RUN_ROLLOUT"):
+        try:
+            with st.spinner("ROLLING MODEL FORWARD..."), span("live.forecast_rollout"):
+                if source == "OPEN_METEO":
+                    inputs, start = fetch_forecast_inputs(coords, days)
+                else:
+                    if upload is None:
+                        raise ValueError("No forecast file uploaded.")
+                    inputs, start = load_forecast_file(upload), None
+                st.session_state['forecast'] = run_rollout(model, baseline, inputs, start, days)
+                record_drift(inputs, until=start)
+        except Exception as e:
+            st.error(f"[ROLLOUT_FAILURE] {e}")
+
+    if 'forecast' in st.session_state and not st.session_state['forecast'].empty:
+        fc = st.session_state['forecast']
+        n_hours = fc['time'].nunique()
+        st.caption(f"{fc['district_name'].nunique()} SECTORS x {n_hours} HOURS | {n_hours} BATCHED PREDICT CALLS")
+
+        # Sector timeline (starts on the live target if it is in the forecast)
+        sectors = sorted(fc['district_name'].unique())
+        target = st.session_state.get('live_target')
+        sector = st.selectbox("TIMELINE_SECTOR", sectors, index=sectors.index(target) if target in sectors else 0)
+        line = fc[fc['district_name'] == sector]
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=line['time'], y=line['heat_index_c'], name='HEAT_INDEX', line={'color': '#00F0FF'}))
+        fig.add_trace(go.Bar(x=line['time'], y=line['pred_risk'], name='PRED_RISK', yaxis='y2',
+                             marker_color=[RISK_COLORS[r] for r in line['pred_risk']], opacity=0.5))
+        fig.update_layout(
+            height=300, title=f"SECTOR {sector.upper()}",
+            margin={"t": 40, "b": 10, "l": 10, "r": 10},
+            paper_bgcolor="#000000", plot_bgcolor="#000000",
+            font={'family': "Roboto Mono", 'color': "white"},
+            yaxis={'title': "HI [C]"}, yaxis2={'overlaying': 'y', 'side': 'right', 'range': [0, 3.5], 'title': "CLASS"},
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        # Per-sector outlook
+        outlook = fc.groupby('district_name').agg(
+            peak_class=('pred_risk', 'max'),
+            danger_hours=('pred_risk', lambda r: int((r >= 2).sum())),
+            peak_hi=('heat_index_c', 'max'),
+        ).sort_values(['peak_class', 'danger_hours'], ascending=False)
+        outlook['peak_class'] = outlook['peak_class'].map(RISK_LABELS)
+        st.dataframe(outlook.round(1), use_container_width=True)
+
+        # Same hysteresis / minimum-duration rules as the live alerts
+        alert_plan = alert_outlook(fc)
+        st.markdown(f"**>> ALERT_OUTLOOK [{len(alert_plan)} SECTORS]**")
+        if len(alert_plan):
+            st.dataframe(alert_plan, use_container_width=True)
+@st.fragment
+def sites_panel():
+    # --- SITE SCREENING (ARBITRARY LOCATIONS) ---
+    st.markdown("---")
+    st.markdown("**>> SITE_SCREENING [BULK LOCATIONS]**")
+    upload = st.file_uploader("SITES_FILE (lat, lon, optional site_name)", type=["csv"], key="sites_file")
+
+    if st.button(" SCREEN_SITES"):
+        try:
+            if upload is None:
+                raise ValueError("No sites file uploaded.")
+            with st.spinner("LOCATING SITES..."), span("live.screen_sites"):
+                st.session_state['sites'] = screen_sites(load_model(), load_baseline_data(), load_sites_file(upload))
+        except Exception as e:
+            st.error(f"[SCREENING_FAILURE] {e}")
+
+    if 'sites' in st.session_state:
+        sites = st.session_state['sites']
+        scored = sites.dropna(subset=['pred_risk'])
+        counts = sites['matched'].value_counts()
+        st.caption(f"{len(sites):,} SITES | {counts.get('POLYGON', 0):,} IN POLYGON | "
+                   f"{counts.get('NEAREST', 0):,} NEAREST CENTROID | {counts.get('UNMATCHED', 0):,} UNMATCHED | 1 BATCHED PREDICT CALL")
+        if len(scored):
+            by_class = scored['pred_risk'].astype(int).map(RISK_LABELS).value_counts().reindex(list(RISK_LABELS.values()), fill_value=0)
+            cols = st.columns(4)
+            for col, (label, n) in zip(cols, by_class.items()):
+                col.metric(label, f"{n:,}")
+            table = scored.sort_values(['pred_risk', 'heat_index_c'], ascending=False).head(500)
+            table = table.assign(pred_risk=table['pred_risk'].astype(int).map(RISK_LABELS))
+            st.dataframe(table[['site_name', 'lat', 'lon', 'district_name', 'matched', 'heat_index_c', 'pred_risk', 'confidence']].round(2),
+                         use_container_width=True, hide_index=True)
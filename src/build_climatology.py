@@ -0,0 +1,208 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from instrumentation import stage, instrumented
+
+# Shared sketches and district registry from the app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from utils.sketches import KeyedHistogram
+from utils.districts import DistrictRegistry, REGISTRY_PATH
+
+# --- CONFIGURATION ---
+DATA_PATH = "data/processed/final_training_data.csv"
+STATE_PATH = "data/processed/climatology_state.npz"
+HOURLY_PATH = "data/processed/climatology_hourly.parquet"
+APP_PATH = "app/data/app_climatology.csv"
+
+SEASON_MONTHS = [4, 5, 6, 7, 8, 9]      # Same heat season as download_data_cds.py
+READ_CHUNK = 500_000
+QUANTILES = {'p50': 0.50, 'p90': 0.90, 'p99': 0.99}
+
+# (lo, hi, bins) per baseline column. Every sketch is keyed by district x month x hour,
+# so 141 districts x 6 months x 24 hours = 20k keys; int32 counts keep the whole
+# state near 140 MB however many years are streamed through it.
+SKETCH_BINS = {
+    'temp_c':            (-10, 60, 280),     # 0.25 C
+    'humidity_relative': (0, 100, 200),      # 0.5 %
+    'wind_speed_m_s':    (0, 30, 300),       # 0.1 m/s
+    'solar_w_m2':        (0, 1200, 240),     # 5 W/m2
+    'temp_roll_24h':     (-10, 60, 280),
+    'hi_max_72h':        (-10, 80, 360),
+}
+
+
+class Climatology:
+    """
+    Mergeable per-district/month/hour sketches of the baseline columns, plus the
+    set of months already ingested so an update only streams new data.
+    """
+
+    def __init__(self, n_districts, months=SEASON_MONTHS):
+        self.n_districts = n_districts
+        self.months = list(months)
+        n_keys = n_districts * len(self.months) * 24
+        self.sketches = {c: KeyedHistogram(n_keys, *bins, dtype=np.int32) for c, bins in SKETCH_BINS.items()}
+        self.pop_total = np.zeros(n_districts)
+        self.pop_rows = np.zeros(n_districts, dtype=np.int64)
+        self.ingested = set()
+
+    def keys(self, district_id, month, hour):
+        month_idx = np.searchsorted(self.months, month)
+        return (district_id.astype(np.int64) * len(self.months) + month_idx) * 24 + hour
+
+    def add(self, district_id, time, frame):
+        """Adds rows already filtered to known districts and season months."""
+        keys = self.keys(district_id, time.dt.month.to_numpy(), time.dt.hour.to_numpy())
+        for c, sketch in self.sketches.items():
+            sketch.add(keys, frame[c].to_numpy(np.float64))
+        self.pop_total += np.bincount(district_id, weights=frame['population_2020'].to_numpy(np.float64), minlength=self.n_districts)
+        self.pop_rows += np.bincount(district_id, minlength=self.n_districts)
+
+    def merge(self, other):
+        if (other.n_districts, other.months) != (self.n_districts, self.months):
+            raise ValueError("Cannot merge climatologies over different districts or months.")
+        for c in self.sketches:
+            self.sketches[c].merge(other.sketches[c])
+        self.pop_total += other.pop_total
+        self.pop_rows += other.pop_rows
+        self.ingested |= other.ingested
+        return self
+
+    # --- Persistence ---
+    def save(self, path=STATE_PATH):
+        arrays = {'pop_total': self.pop_total, 'pop_rows': self.pop_rows}
+        for c, sketch in self.sketches.items():
+            for k, v in sketch.to_state().items():
+                arrays[f"{c}.{k}"] = v
+        meta = {'n_districts': self.n_districts, 'months': self.months, 'ingested': sorted(self.ingested)}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(path, meta=json.dumps(meta), **arrays)
+
+    @classmethod
+    def load(cls, path=STATE_PATH):
+        with np.load(path) as z:
+            meta = json.loads(str(z['meta']))
+            clim = cls(meta['n_districts'], meta['months'])
+            for c in SKETCH_BINS:
+                clim.sketches[c] = KeyedHistogram.from_state({k: z[f"{c}.{k}"] for k in ('lo', 'hi', 'n_bins', 'counts', 'total')})
+            clim.pop_total, clim.pop_rows = z['pop_total'], z['pop_rows']
+        clim.ingested = set(meta['ingested'])
+        return clim
+
+    # --- Outputs ---
+    def population(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.pop_total / self.pop_rows
+
+    def summarise(self, by_hour=False):
+        """Long frame of mean/p50/p90/p99 per district x month (x hour)."""
+        n_m = len(self.months)
+        index = {'district_id': np.repeat(np.arange(self.n_districts, dtype=np.int16), n_m * (24 if by_hour else 1)),
+                 'month': np.tile(np.repeat(self.months, 24 if by_hour else 1), self.n_districts)}
+        if by_hour:
+            index['hour'] = np.tile(np.arange(24), self.n_districts * n_m)
+
+        stats = {s: {} for s in ['mean', *QUANTILES]}
+        rows = None
+        for c, sketch in self.sketches.items():
+            if not by_hour:
+                # District-month sketch = sum of its 24 hourly sketches
+                merged = KeyedHistogram(self.n_districts * n_m, sketch.lo, sketch.hi, sketch.n_bins)
+                merged.counts = sketch.counts.reshape(-1, 24, sketch.n_bins).sum(axis=1)
+                merged.total = sketch.total.reshape(-1, 24).sum(axis=1)
+                sketch = merged
+            q = sketch.quantiles(list(QUANTILES.values()))
+            stats['mean'][c] = sketch.mean()
+            for j, name in enumerate(QUANTILES):
+                stats[name][c] = q[:, j]
+            rows = sketch.n
+        pop = np.repeat(self.population(), n_m * (24 if by_hour else 1))
+
+        frames = []
+        for name, cols in stats.items():
+            df = pd.DataFrame({**index, 'stat': name, 'population_2020': pop, 'pop_log': np.log10(pop + 1), **cols,
+                               'n_hours': rows})
+            frames.append(df[rows > 0])
+        return pd.concat(frames, ignore_index=True)
+
+
+def iter_inputs(paths, chunk=READ_CHUNK):
+    """Streams the training-data schema from CSV (chunked) or Parquet files."""
+    for path in paths:
+        if path.endswith(".parquet"):
+            yield path, pd.read_parquet(path)
+        else:
+            for df in pd.read_csv(path, chunksize=chunk):
+                yield path, df
+
+
+@instrumented("build_climatology")
+def build(paths, state_path=STATE_PATH, rebuild=False):
+    registry = DistrictRegistry.load(REGISTRY_PATH)
+    if os.path.exists(state_path) and not rebuild:
+        clim = Climatology.load(state_path)
+        if clim.n_districts != len(registry):
+            raise SystemExit(f"❌ Registry has {len(registry)} districts, the state {clim.n_districts}. Run with --rebuild.")
+        print(f"   📦 Loaded state with {len(clim.ingested)} ingested months.")
+    else:
+        clim = Climatology(len(registry))
+
+    done_before = set(clim.ingested)
+    new_months = set()
+    with stage("stream_archive") as s:
+        s.rows_in, s.rows_out = 0, 0
+        for path, df in iter_inputs(paths):
+            s.rows_in += len(df)
+            time = pd.to_datetime(df['time'])
+            period = time.dt.strftime('%Y-%m')
+            ids = df['district_id'].to_numpy(np.int16) if 'district_id' in df else registry.ids(df['district_name'])
+            # Months from earlier runs are already in the sketches; only new ones are added
+            keep = (ids >= 0) & time.dt.month.isin(clim.months).to_numpy() & ~period.isin(done_before).to_numpy()
+            if not keep.any():
+                continue
+            clim.add(ids[keep], time[keep], df.loc[keep])
+            new_months |= set(period[keep].unique())
+            s.rows_out += int(keep.sum())
+        for p in paths:
+            s.read(p)
+    clim.ingested |= new_months
+    print(f"   ➕ {len(new_months)} new months ({s.rows_out:,} rows); {len(clim.ingested)} months in total.")
+
+    clim.save(state_path)
+    return clim, registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-year climatology baselines from streaming quantile sketches.")
+    parser.add_argument("--input", nargs="*", default=[DATA_PATH], help="CSV/Parquet files in the training-data schema")
+    parser.add_argument("--state", default=STATE_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the saved state and stream everything again")
+    args = parser.parse_args()
+
+    print(f"🌡️  Building climatology from {args.input}...")
+    clim, registry = build(args.input, args.state, args.rebuild)
+
+    with stage("write_baselines") as s:
+        monthly = clim.summarise()
+        monthly.insert(1, 'district_name', registry.names[monthly['district_id']])
+        os.makedirs(os.path.dirname(APP_PATH), exist_ok=True)
+        monthly.to_csv(APP_PATH, index=False)
+        s.wrote(APP_PATH)
+
+        hourly = clim.summarise(by_hour=True)
+        hourly['stat'] = hourly['stat'].astype('category')
+        hourly.to_parquet(HOURLY_PATH, index=False)
+        s.wrote(HOURLY_PATH)
+        s.rows_out = len(monthly) + len(hourly)
+
+    years = sorted({m[:4] for m in clim.ingested})
+    print(f"   ✅ {APP_PATH}: {monthly['district_id'].nunique()} districts, stats {list(monthly['stat'].unique())}")
+    print(f"   ✅ {HOURLY_PATH}: {len(hourly):,} rows")
+    print(f"🎉 SUCCESS! Climatology covers {years[0] if years else '-'}-{years[-1] if years else '-'}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import argparse
+import numpy as np
+from instrumentation import stage, instrumented
+from build_climatology import iter_inputs, DATA_PATH
+
+# Shared drift sketches and district registry from the app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from utils.drift import DriftMonitor, DRIFT_BINS, REFERENCE_PATH
+from utils.districts import DistrictRegistry, REGISTRY_PATH
+
+# --- CONFIGURATION ---
+# The reference is the training distribution of the live inputs, one histogram per
+# district; ~141 x 1020 bins, a few hundred KB on disk however large the archive.
+
+
+@instrumented("build_drift_reference")
+def build(paths, out_path=REFERENCE_PATH):
+    registry = DistrictRegistry.load(REGISTRY_PATH)
+    reference = DriftMonitor.build_reference(len(registry))
+
+    with stage("stream_training") as s:
+        s.rows_in, s.rows_out = 0, 0
+        for path, df in iter_inputs(paths):
+            s.rows_in += len(df)
+            ids = df['district_id'].to_numpy(np.int64) if 'district_id' in df else registry.ids(df['district_name'])
+            keep = ids >= 0
+            for c, sketch in reference.items():
+                sketch.add(ids[keep], df[c].to_numpy(np.float64)[keep])
+            s.rows_out += int(keep.sum())
+        for p in paths:
+            s.read(p)
+        rows = s.rows_out
+
+    with stage("write_reference") as s:
+        DriftMonitor.save_reference(reference, out_path, meta={'sources': list(paths), 'rows': rows})
+        s.wrote(out_path)
+    return reference
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training-set input histograms for the live drift monitor.")
+    parser.add_argument("--input", nargs="*", default=[DATA_PATH], help="CSV/Parquet files in the training-data schema")
+    parser.add_argument("--output", default=REFERENCE_PATH)
+    args = parser.parse_args()
+
+    print(f"📊 Building drift reference from {args.input}...")
+    reference = build(args.input, args.output)
+    rows = next(iter(reference.values())).n
+    print(f"✅ {int(rows.sum()):,} rows over {int((rows > 0).sum())} districts, {len(DRIFT_BINS)} features -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
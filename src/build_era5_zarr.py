@@ -0,0 +1,168 @@
+import os
+import glob
+import shutil
+import zipfile
+import argparse
+import warnings
+import numpy as np
+import xarray as xr
+import zarr
+import netCDF4
+from zarr.codecs import BloscCodec
+from instrumentation import stage, instrumented
+
+warnings.filterwarnings("ignore")
+
+# --- CONFIGURATION ---
+ERA5_DIR = "data/raw/era5"
+STORE_PATH = "data/interim/era5.zarr"
+VARIABLES = ['t2m', 'd2m', 'u10', 'v10', 'ssrd']
+
+# Chunks balance the two access patterns: one week x 16x32 cells is ~340 KB raw.
+# A single-cell year touches 53 chunks, a single-hour map of Pakistan 54, and
+# TIME_CHUNK / LAT_CHUNK line up with the tiles score_grid.py reads.
+TIME_CHUNK = 168
+LAT_CHUNK = 16
+LON_CHUNK = 32
+COMPRESSOR = BloscCodec(cname="zstd", clevel=5, shuffle="shuffle")
+
+
+# ==========================================
+# 1. READING RAW FILES
+# ==========================================
+def open_raw(path):
+    """
+    Opens one monthly download. CDS sometimes ships a zip under a .nc name
+    (instant and accumulated variables as separate members); those are read
+    straight from the archive in memory instead of being renamed and unpacked.
+    """
+    if not zipfile.is_zipfile(path):
+        return xr.open_dataset(path, engine="netcdf4")
+
+    parts = []
+    with zipfile.ZipFile(path) as zf:
+        for member in sorted(m for m in zf.namelist() if m.endswith(".nc")):
+            nc = netCDF4.Dataset(member, memory=zf.read(member))
+            parts.append(xr.open_dataset(xr.backends.NetCDF4DataStore(nc)).load())
+            nc.close()
+    return xr.merge(parts, compat="override", join="outer")
+
+
+def normalize(ds):
+    """The five model variables on (time, latitude, longitude), float32, extra dims dropped."""
+    if 'valid_time' in ds.dims:
+        ds = ds.rename({'valid_time': 'time'})
+    ds = ds[[v for v in VARIABLES if v in ds]]
+    extra = [d for d in ds.dims if d not in ('time', 'latitude', 'longitude')]
+    if extra:
+        ds = ds.isel({d: 0 for d in extra})
+    ds = ds.drop_vars([c for c in ds.coords if c not in ('time', 'latitude', 'longitude')])
+    missing = set(VARIABLES) - set(ds.data_vars)
+    if missing:
+        raise ValueError(f"missing variables {sorted(missing)}")
+    return ds.astype(np.float32).transpose('time', 'latitude', 'longitude')
+
+
+def fingerprint(path):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime': int(st.st_mtime)}
+
+
+# ==========================================
+# 2. STORE
+# ==========================================
+def open_store(path=STORE_PATH):
+    """
+    Lazily opens the consolidated store (no dask needed): indexing reads only
+    the chunks it touches, so every process can open it without sharing handles.
+    """
+    return xr.open_dataset(path, engine="zarr", consolidated=True, chunks=None)
+
+
+def store_state(path):
+    """(ingested file fingerprints, last stored hour) or ({}, None) for a new store."""
+    if not os.path.exists(path):
+        return {}, None
+    # Read past the consolidated metadata, which an interrupted run may have left stale
+    with xr.open_dataset(path, engine="zarr", consolidated=False, chunks=None) as ds:
+        last = ds['time'].values[-1] if ds.sizes['time'] else None
+        return dict(ds.attrs.get('source_files', {})), last
+
+
+def append_file(path, ds, new_store, chunks):
+    """Writes one month; the first write creates the arrays, later ones append along time."""
+    if new_store:
+        encoding = {v: {'chunks': chunks, 'compressors': [COMPRESSOR]} for v in ds.data_vars}
+        ds.to_zarr(path, mode="w", encoding=encoding, consolidated=False, zarr_format=3)
+    else:
+        ds.to_zarr(path, mode="a", append_dim="time", consolidated=False)
+
+
+@instrumented("build_era5_zarr")
+def build_store(era5_dir=ERA5_DIR, path=STORE_PATH, rebuild=False,
+                chunks=(TIME_CHUNK, LAT_CHUNK, LON_CHUNK)):
+    files = sorted(glob.glob(os.path.join(era5_dir, "*.nc")))
+    print(f"found {len(files)} weather files.")
+    if rebuild and os.path.exists(path):
+        print(f"   🧹 Rebuilding {path} from scratch...")
+        shutil.rmtree(path)
+
+    ingested, last_time = store_state(path)
+    todo = [f for f in files if ingested.get(os.path.basename(f)) != fingerprint(f)]
+    changed = [f for f in todo if os.path.basename(f) in ingested]
+    if changed:
+        print(f"   ⚠️  {len(changed)} ingested file(s) changed on disk, e.g. {os.path.basename(changed[0])}.")
+        print("   Run with --rebuild to re-ingest them.")
+        todo = [f for f in todo if f not in changed]
+    if not todo:
+        print(f"✅ {path} is up to date ({len(ingested)} files).")
+        return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    for f in todo:
+        name = os.path.basename(f)
+        print(f"   ⚡ Ingesting: {name}...")
+        try:
+            with stage("ingest_month", file=name) as s:
+                ds = normalize(open_raw(s.read(f)))
+                ds = ds.sortby('time')
+                if last_time is not None:
+                    if ds['time'].values[0] <= last_time and ds['time'].values[-1] > last_time:
+                        ds = ds.sel(time=ds['time'] > last_time)    # Overlapping expver hours
+                    elif ds['time'].values[-1] <= last_time:
+                        print(f"    {name} is older than the store's last hour. Run with --rebuild to insert it.")
+                        continue
+                s.rows_in = int(np.prod(list(ds.sizes.values())))
+                append_file(path, ds.load(), last_time is None, chunks)
+                last_time = ds['time'].values[-1]
+                ds.close()
+
+                ingested[name] = fingerprint(f)
+                zarr.open_group(path, mode="r+").attrs['source_files'] = ingested
+                s.rows_out = s.rows_in
+        except Exception as e:
+            print(f"    Error ingesting {name}: {e}")
+
+    with stage("consolidate") as s:
+        zarr.consolidate_metadata(path)
+        s.wrote(path)
+
+    with open_store(path) as ds:
+        print(f"🎉 SUCCESS! {path}: {ds.sizes['time']:,} hours x {ds.sizes['latitude']}x{ds.sizes['longitude']} cells, "
+              f"{len(ingested)} source files.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consolidate the monthly ERA5 NetCDF archive into one chunked Zarr store.")
+    parser.add_argument("--era5-dir", default=ERA5_DIR)
+    parser.add_argument("--store", default=STORE_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="Discard the store and ingest every file again")
+    parser.add_argument("--time-chunk", type=int, default=TIME_CHUNK)
+    parser.add_argument("--lat-chunk", type=int, default=LAT_CHUNK)
+    parser.add_argument("--lon-chunk", type=int, default=LON_CHUNK)
+    args = parser.parse_args()
+    build_store(args.era5_dir, args.store, args.rebuild, (args.time_chunk, args.lat_chunk, args.lon_chunk))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import time as clock
+import argparse
+import numpy as np
+import pandas as pd
+from instrumentation import stage, instrumented
+from validate_emdat import load_prediction_archive
+
+# Event engine, physics and district registry from the app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from utils.heatwaves import district_events, link_events, catalogue, ALERT_CLASS, MIN_HOURS, MAX_GAP_HOURS
+from utils.spatial_graph import adjacency
+from utils.physics import heat_index, risk_class
+from utils.districts import DistrictRegistry, REGISTRY_PATH
+
+# --- CONFIGURATION ---
+DATA_PATH = "data/processed/final_training_data.csv"
+METADATA_PATH = "data/processed/district_metadata.csv"
+GEOJSON_PATH = "app/data/pakistan_districts.geojson"
+EVENTS_PATH = "data/processed/heatwave_events.parquet"
+MEMBERS_PATH = "data/processed/heatwave_event_districts.parquet"
+APP_EVENTS_PATH = "app/data/app_heatwave_events.csv"
+READ_CHUNK = 500_000
+
+
+def load_observed(registry, path=DATA_PATH, chunk=READ_CHUNK):
+    """Observed classes straight from the heat index, streamed from the training data."""
+    parts = []
+    for df in pd.read_csv(path, chunksize=chunk):
+        ids = df['district_id'].to_numpy(np.int16) if 'district_id' in df else registry.ids(df['district_name'])
+        hi = df['heat_index_c'] if 'heat_index_c' in df else heat_index(df['temp_c'], df['humidity_relative'])
+        parts.append(pd.DataFrame({'time': pd.to_datetime(df['time']), 'district_id': ids,
+                                   'heat_index_c': np.asarray(hi, dtype=np.float32)}))
+    out = pd.concat(parts, ignore_index=True)
+    out['risk'] = risk_class(out['heat_index_c'].to_numpy())
+    return out
+
+
+def load_predicted(registry):
+    archive = load_prediction_archive()
+    return pd.DataFrame({'time': archive['time'], 'district_id': registry.ids(archive['district_name']),
+                         'heat_index_c': archive['heat_index_c'].to_numpy(np.float32),
+                         'risk': archive['predicted_risk'].to_numpy(np.int8)})
+
+
+def to_cube(rows, n_districts):
+    """
+    Long rows -> dense (district x hour) arrays from the first midnight.
+    Hours without data (off-season, gaps) get class -1, so they end runs.
+    """
+    rows = rows[rows['district_id'] >= 0]
+    t0 = rows['time'].min().floor('D')
+    hour = ((rows['time'] - t0) // pd.Timedelta(hours=1)).to_numpy(np.int64)
+    district = rows['district_id'].to_numpy(np.int64)
+
+    risk = np.full((n_districts, hour.max() + 1), -1, dtype=np.int8)
+    hi = np.full(risk.shape, np.nan, dtype=np.float32)
+    risk[district, hour] = rows['risk'].to_numpy(np.int8)
+    hi[district, hour] = rows['heat_index_c'].to_numpy(np.float32)
+    return risk, hi, t0
+
+
+def load_population(registry, path=METADATA_PATH):
+    if not os.path.exists(path):
+        print(f"   ⚠️ {path} not found; person-hours will be zero.")
+        return np.zeros(len(registry))
+    meta = registry.attach(pd.read_csv(path))
+    pop = np.zeros(len(registry))
+    pop[meta['district_id']] = meta['population_2020']
+    return pop
+
+
+@instrumented("detect_heatwaves")
+def detect(observed=False, level=ALERT_CLASS, min_hours=MIN_HOURS, max_gap=MAX_GAP_HOURS):
+    registry = DistrictRegistry.load(REGISTRY_PATH)
+
+    with stage("load_archive") as s:
+        rows = load_observed(registry) if observed else load_predicted(registry)
+        risk, hi, t0 = to_cube(rows, len(registry))
+        s.rows_in = len(rows)
+        s.rows_out = risk.size
+    print(f"   🧊 Risk cube: {risk.shape[0]} districts x {risk.shape[1]:,} hours from {t0:%Y-%m-%d}.")
+
+    with open(GEOJSON_PATH) as f:
+        neighbours = adjacency(json.load(f), registry)
+
+    tic = clock.perf_counter()
+    with stage("detect_events") as s:
+        events = district_events(risk, hi, load_population(registry), level, min_hours, max_gap)
+        labels = link_events(events, neighbours, max_gap)
+        cat, members = catalogue(events, labels, t0, registry.names)
+        s.rows_in, s.rows_out = risk.size, len(cat)
+    print(f"   ⚡ {len(events):,} district episodes -> {len(cat):,} heatwaves in {clock.perf_counter() - tic:.2f}s")
+    members['district_name'] = registry.categorical(members['district_id'])
+    return cat, members
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect heatwave events (runs of Danger/Extreme hours) across the archive.")
+    parser.add_argument("--observed", action="store_true",
+                        help="Use heat-index classes from the training data instead of model predictions")
+    parser.add_argument("--level", type=int, default=ALERT_CLASS, help="Lowest risk class that counts (2 = Danger)")
+    parser.add_argument("--min-hours", type=int, default=MIN_HOURS)
+    parser.add_argument("--max-gap", type=int, default=MAX_GAP_HOURS)
+    args = parser.parse_args()
+
+    print("🔥 Detecting heatwave events...")
+    cat, members = detect(args.observed, args.level, args.min_hours, args.max_gap)
+
+    with stage("write_catalogue") as s:
+        os.makedirs(os.path.dirname(EVENTS_PATH), exist_ok=True)
+        cat.to_parquet(EVENTS_PATH)
+        members.to_parquet(MEMBERS_PATH, index=False)
+        os.makedirs(os.path.dirname(APP_EVENTS_PATH), exist_ok=True)
+        cat.to_csv(APP_EVENTS_PATH)
+        for p in (EVENTS_PATH, MEMBERS_PATH, APP_EVENTS_PATH):
+            s.wrote(p)
+        s.rows_out = len(cat)
+
+    if len(cat):
+        print("\n   Largest events by person-hours exposed:")
+        print(cat.head(5)[['start', 'end', 'n_districts', 'peak_hi_c', 'peak_district', 'person_hours']].to_string())
+    print(f"\n🎉 SUCCESS! {len(cat):,} events saved to {EVENTS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
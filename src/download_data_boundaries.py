@@ -2,6 +2,7 @@ import os
 import requests
 import zipfile
 import io
+from instrumentation import stage
 
 # --- CONFIGURATION ---
 GEO_DIR = "data/raw/geospatial"
@@ -18,13 +19,16 @@ WPOP_URL = "https://data.worldpop.org/GIS/Population/Global_2000_2020/2020/PAK/p
 def download_and_extract(url, target_folder, name):
     print(f"⬇️  Downloading {name}...")
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        # Unzip directly from memory
-        print(f"📦 Extracting {name}...")
-        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-            z.extractall(target_folder)
+        with stage("download_static", dataset=name) as s:
+            response = requests.get(url, stream=True)
+            response.raise_for_status()
+            s.bytes_read = len(response.content)
+            
+            # Unzip directly from memory
+            print(f"📦 Extracting {name}...")
+            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+                z.extractall(target_folder)
+            s.wrote(target_folder)
         print(f"✅ {name} saved to {target_folder}")
         
     except Exception as e:
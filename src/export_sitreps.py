@@ -0,0 +1,292 @@
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import numpy as np
+import pandas as pd
+from instrumentation import stage, instrumented
+from validate_emdat import load_prediction_archive
+
+# Scenario engine, geometry and district registry from the app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from utils.ensemble import month_arrays, scenario_matrix
+from utils.model_engine import run_prediction, model_features
+from utils.spatial_graph import district_geometries
+from utils.districts import DistrictRegistry, REGISTRY_PATH
+
+# --- CONFIGURATION ---
+OUT_DIR = "report/sitreps"
+MODEL_PATH = "models/heat_risk_model.pkl"
+GEOJSON_PATH = "app/data/pakistan_districts.geojson"
+BASELINE_PATH = "app/data/app_baseline.csv"
+
+RISK_LABELS = {0: "SAFE", 1: "CAUTION", 2: "DANGER", 3: "EXTREME"}
+RISK_COLORS = {0: "#00CC96", 1: "#FFC107", 2: "#FF5722", 3: "#B71C1C"}     # Same palette as the simulation map
+CONTEXT_COLOR = "#1A1A1A"       # Districts outside the page's focus
+NO_DATA_COLOR = "#444444"
+UNASSIGNED = "UNASSIGNED"       # Province of districts in registries saved before provinces were recorded
+FIG_SIZE = (7, 7)
+DPI = 110
+DISTRICT_PAD_DEG = 0.6          # Context around a district on its own page
+PAGES_PER_TASK = 8              # Pages per pool task (pool.map chunksize)
+TOP_N = 10
+
+
+def slug(name):
+    return re.sub(r"[^a-z0-9]+", "_", str(name).lower()).strip("_")
+
+
+# ==========================================
+# PREDICTION TABLES (one row per district)
+# ==========================================
+def scenario_table(registry, model, month, d_temp, d_rh, d_pop):
+    """The simulation-map scenario for one month of the 2023 baseline, scored in one call."""
+    base = month_arrays(registry.attach(pd.read_csv(BASELINE_PATH)), month)
+    X, hi, pop = scenario_matrix(base, np.array([[d_temp, d_rh, d_pop]]), model_features(model))
+    preds, probs = run_prediction(model, X)
+    table = pd.DataFrame({
+        'district_id': base['district_ids'],
+        'temp_c': X['temp_c'].to_numpy(),
+        'humidity_relative': X['humidity_relative'].to_numpy(),
+        'heat_index_c': hi[0],
+        'population_2020': pop[0].round(),
+        'risk': preds,
+        'confidence': probs.max(axis=1),
+    })
+    return table, None
+
+
+def window_table(registry, start, end):
+    """Peak class, heat index and danger hours per district over [start, end) of the prediction archive."""
+    archive = load_prediction_archive()
+    archive = archive[(archive['time'] >= start) & (archive['time'] < end)]
+    if archive.empty:
+        raise SystemExit(f"❌ No archived predictions between {start} and {end}.")
+    names = archive['district_name'].astype('category')
+    ids = np.append(registry.ids(names.cat.categories), -1)[names.cat.codes.to_numpy()]
+    hourly = pd.DataFrame({'time': archive['time'].to_numpy(), 'district_id': ids,
+                           'heat_index_c': archive['heat_index_c'].to_numpy(),
+                           'risk': archive['predicted_risk'].to_numpy()})
+    hourly = hourly[hourly['district_id'] >= 0]
+
+    table = hourly.groupby('district_id').agg(
+        risk=('risk', 'max'),
+        heat_index_c=('heat_index_c', 'max'),
+        danger_hours=('risk', lambda r: int((r >= 2).sum())),
+        extreme_hours=('risk', lambda r: int((r >= 3).sum())),
+        hours=('risk', 'size'),
+    ).reset_index()
+    population = registry.attach(pd.read_csv(BASELINE_PATH)).groupby('district_id')['population_2020'].first()
+    table['population_2020'] = population.reindex(table['district_id']).to_numpy()
+    return table, hourly
+
+
+def summarise(table, description):
+    """Headline numbers for one page: districts and people per class, worst districts."""
+    by_class = table.groupby('risk')
+    return {
+        'scenario': description,
+        'districts': int(len(table)),
+        'districts_by_class': {RISK_LABELS[k]: int(v) for k, v in by_class.size().items()},
+        'population_by_class': {RISK_LABELS[k]: int(round(v)) for k, v in by_class['population_2020'].sum().items()},
+        'peak_heat_index_c': round(float(table['heat_index_c'].max()), 1),
+        'worst_districts': table.nlargest(TOP_N, ['risk', 'heat_index_c'])['district_name'].astype(str).tolist(),
+    }
+
+
+# ==========================================
+# RENDERING (process pool)
+# ==========================================
+class MapCanvas:
+    """
+    One figure per worker: district outlines are converted to matplotlib paths
+    once and drawn as a single collection; every page only changes colours,
+    highlight, extent and titles before saving.
+    """
+
+    def __init__(self, geoms, colors):
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        from matplotlib.collections import PatchCollection
+        from matplotlib.patches import PathPatch, Patch
+        import shapely
+
+        self.fill = np.asarray(colors, dtype=object)
+        self.present = np.flatnonzero(geoms != None)  # noqa: E711 (element-wise)
+        self.bounds = np.full((len(geoms), 4), np.nan)
+        self.bounds[self.present] = shapely.bounds(geoms[self.present])
+        patches = [PathPatch(self._path(geoms[i])) for i in self.present]
+
+        plt.rcParams['font.family'] = 'monospace'
+        self.fig, self.ax = plt.subplots(figsize=FIG_SIZE, dpi=DPI, facecolor='black')
+        self.ax.set_facecolor('black')
+        self.ax.set_aspect('equal')
+        self.ax.set_axis_off()
+        self.districts = PatchCollection(patches, match_original=False)
+        self.ax.add_collection(self.districts)
+        self.fig.legend(handles=[Patch(color=RISK_COLORS[k], label=v) for k, v in RISK_LABELS.items()],
+                        loc='lower left', facecolor='black', edgecolor='#333333', labelcolor='white', fontsize=8)
+        self.title = self.fig.suptitle("", color='white', fontsize=13, x=0.02, ha='left')
+        self.subtitle = self.fig.text(0.02, 0.925, "", color='#888888', fontsize=8)
+        self.fig.subplots_adjust(left=0.02, right=0.98, bottom=0.02, top=0.9)
+
+    @staticmethod
+    def _path(geom):
+        import shapely
+        from matplotlib.path import Path
+        rings = []
+        for poly in shapely.get_parts(geom):
+            rings.append(Path(np.asarray(poly.exterior.coords), closed=True))
+            rings.extend(Path(np.asarray(r.coords), closed=True) for r in poly.interiors)
+        return Path.make_compound_path(*rings)
+
+    def render(self, page):
+        focus = np.zeros(len(self.fill), dtype=bool)
+        focus[page['focus']] = True
+        faces = np.where(focus, self.fill, CONTEXT_COLOR)[self.present]
+        edges = np.where(self.present == page.get('highlight', -1), 'white', '#000000')
+        widths = np.where(self.present == page.get('highlight', -1), 2.0, 0.3)
+        self.districts.set_facecolor(list(faces))
+        self.districts.set_edgecolor(list(edges))
+        self.districts.set_linewidth(widths)
+
+        extent = page.get('extent', page['focus'])
+        lo = np.nanmin(self.bounds[extent, :2], axis=0)
+        hi = np.nanmax(self.bounds[extent, 2:], axis=0)
+        pad = np.maximum((hi - lo) * 0.05, page.get('pad', 0.05))
+        self.ax.set_xlim(lo[0] - pad[0], hi[0] + pad[0])
+        self.ax.set_ylim(lo[1] - pad[1], hi[1] + pad[1])
+        self.title.set_text(page['title'])
+        self.subtitle.set_text(page['subtitle'])
+        self.fig.savefig(page['path'], facecolor='black')
+        return page['path']
+
+
+_canvas = None
+
+
+def _init_worker(geojson_path, registry_path, colors):
+    global _canvas
+    with open(geojson_path) as f:
+        geojson = json.load(f)
+    _canvas = MapCanvas(district_geometries(geojson, DistrictRegistry.load(registry_path)), colors)
+
+
+def _render(page):
+    return _canvas.render(page)
+
+
+def render_pages(pages, colors, workers):
+    """Renders every page map; workers build the canvas once and take PAGES_PER_TASK pages at a time."""
+    initargs = (GEOJSON_PATH, REGISTRY_PATH, colors)
+    if workers <= 1:
+        _init_worker(*initargs)
+        return [_render(p) for p in pages]
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn"),
+                             initializer=_init_worker, initargs=initargs) as pool:
+        return list(pool.map(_render, pages, chunksize=PAGES_PER_TASK))
+
+
+# ==========================================
+# BUNDLES
+# ==========================================
+def write_bundles(table, hourly, registry, description, out_dir):
+    """Tables and summaries per level; returns the page descriptors for the maps."""
+    columns = ['district_id', 'district_name', 'province', *[c for c in table.columns if c not in ('district_id', 'risk')], 'risk_label']
+    table = table.assign(district_name=registry.categorical(table['district_id']).astype(str),
+                         province=provinces(registry)[table['district_id'].to_numpy()],
+                         risk_label=table['risk'].map(RISK_LABELS))
+    pages = []
+
+    def bundle(folder, rows, title, focus, **page):
+        os.makedirs(folder, exist_ok=True)
+        rows.sort_values(['risk', 'heat_index_c'], ascending=False)[columns].round(2).to_csv(os.path.join(folder, "districts.csv"), index=False)
+        with open(os.path.join(folder, "summary.json"), 'w') as f:
+            json.dump(summarise(rows, description), f, indent=2)
+        pages.append({'title': title, 'subtitle': description, 'focus': focus,
+                      'path': os.path.join(folder, "map.png"), **page})
+
+    all_ids = table['district_id'].to_numpy()
+    bundle(os.path.join(out_dir, "national"), table, "SITREP // NATIONAL", all_ids)
+    for province, rows in table.groupby('province'):
+        ids = rows['district_id'].to_numpy()
+        bundle(os.path.join(out_dir, "provinces", slug(province)), rows, f"SITREP // {province.upper()}", ids)
+        for _, row in rows.iterrows():
+            folder = os.path.join(out_dir, "districts", slug(row['district_name']))
+            bundle(folder, rows[rows['district_id'] == row['district_id']],
+                   f"SITREP // {row['district_name'].upper()} [{row['risk_label']}]", ids,
+                   highlight=int(row['district_id']), extent=[int(row['district_id'])], pad=DISTRICT_PAD_DEG)
+            if hourly is not None:
+                timeline = hourly[hourly['district_id'] == row['district_id']]
+                timeline.assign(risk_label=timeline['risk'].map(RISK_LABELS)).drop(columns='district_id') \
+                        .to_csv(os.path.join(folder, "timeline.csv"), index=False)
+    return pages
+
+
+def provinces(registry):
+    if 'province' in registry.extra:
+        return registry.extra['province'].fillna(UNASSIGNED).astype(str).to_numpy()
+    return np.full(len(registry), UNASSIGNED, dtype=object)
+
+
+def fill_colors(table, n_districts):
+    colors = np.full(n_districts, NO_DATA_COLOR, dtype=object)
+    colors[table['district_id'].to_numpy()] = table['risk'].map(RISK_COLORS).to_numpy()
+    return colors
+
+
+@instrumented("export_sitreps")
+def main():
+    parser = argparse.ArgumentParser(description="Headless situation reports: national, province and district bundles.")
+    sub = parser.add_subparsers(dest="mode", required=True)
+    sc = sub.add_parser("scenario", help="A simulation-map scenario on the 2023 baseline")
+    sc.add_argument("--month", type=int, default=6)
+    sc.add_argument("--d-temp", type=float, default=0.0)
+    sc.add_argument("--d-rh", type=float, default=0.0)
+    sc.add_argument("--d-pop", type=float, default=0.0)
+    win = sub.add_parser("window", help="A time window of the prediction archive")
+    win.add_argument("--start", required=True)
+    win.add_argument("--end", required=True)
+    for p in (sc, win):
+        p.add_argument("--out", default=OUT_DIR)
+        p.add_argument("--workers", type=int, default=os.cpu_count())
+        p.add_argument("--zip", action="store_true", help="Also pack the whole report into one .zip")
+    args = parser.parse_args()
+
+    registry = DistrictRegistry.load(REGISTRY_PATH)
+    with stage("predict") as s:
+        if args.mode == "scenario":
+            table, hourly = scenario_table(registry, joblib.load(MODEL_PATH), args.month, args.d_temp, args.d_rh, args.d_pop)
+            description = f"SCENARIO month={args.month} dT={args.d_temp:+g}C dRH={args.d_rh:+g}% dPOP={args.d_pop:+g}%"
+            tag = f"scenario_m{args.month}_t{args.d_temp:+g}_rh{args.d_rh:+g}_p{args.d_pop:+g}"
+        else:
+            start, end = pd.Timestamp(args.start), pd.Timestamp(args.end)
+            table, hourly = window_table(registry, start, end)
+            description = f"WINDOW {start:%Y-%m-%d %H:%M} -> {end:%Y-%m-%d %H:%M} (PEAK CLASS)"
+            tag = f"window_{start:%Y%m%d%H}_{end:%Y%m%d%H}"
+        s.rows_out = len(table)
+
+    out_dir = os.path.join(args.out, tag)
+    print(f"🗂️  Writing situation reports to {out_dir}...")
+    with stage("write_tables") as s:
+        pages = write_bundles(table, hourly, registry, description, out_dir)
+        s.rows_out = len(pages)
+
+    with stage("render_maps", rows_in=len(pages)) as s:
+        render_pages(pages, fill_colors(table, len(registry)), max(1, args.workers))
+        s.wrote(out_dir)
+
+    if args.zip:
+        with stage("zip") as s:
+            s.wrote(shutil.make_archive(out_dir, 'zip', out_dir))
+    print(f"✅ {len(pages)} pages ({len(table)} districts, {len(set(provinces(registry)[table['district_id']]))} provinces) -> {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 import geopandas as gpd
 import pandas as pd
+import numpy as np
 import json
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from utils.districts import DistrictRegistry, canonicalize, REGISTRY_PATH
 
 # --- PATHS ---
 GEOJSON_PATH = "app/data/pakistan_districts.geojson"
@@ -13,9 +18,11 @@ print("🤝 STARTING DATA HANDSHAKE...")
 gdf = gpd.read_file(GEOJSON_PATH)
 df = pd.read_csv(CSV_PATH)
 
-# 2. Get Unique Names
-geo_names = set(gdf['district_name'].unique())
-csv_names = set(df['district_name'].unique())
+# 2. Resolve both sides through the shared registry and compare IDs
+registry = DistrictRegistry.load_or_build(gdf['district_name'], REGISTRY_PATH)
+geo_ids = registry.ids(gdf['district_name'])
+geo_names = set(registry.names[geo_ids[geo_ids >= 0]])
+csv_names = set(registry.names[np.unique(df['district_id'])]) if 'district_id' in df else set(df['district_name'].unique())
 
 # 3. Find Mismatches
 # We only care about names in the CSV (Data) that are missing from the Map (GeoJSON)
@@ -33,13 +40,10 @@ else:
     print(f"   In Map but not Data: {missing_in_data}")
     
     # 4. AUTO-FIX (The Magic)
-    # We strip whitespace and Title Case both sides
+    # Canonicalise the map names (aliases + Title Case) and stamp the registry IDs
     print("🔧 Applying Standardization Patch...")
-    gdf['district_name'] = gdf['district_name'].str.strip().str.title()
-    
-    # Force specific overrides if "Karachi west" exists
-    patch = {"Karachi west": "Karachi West", "Gujarat": "Gujrat"}
-    gdf['district_name'] = gdf['district_name'].replace(patch)
+    gdf['district_name'] = canonicalize(gdf['district_name'])
+    gdf['district_id'] = registry.ids(gdf['district_name'])
     
     # Re-check
     geo_names_fixed = set(gdf['district_name'].unique())
@@ -47,7 +51,7 @@ else:
     
     if still_missing:
         print(f"❌ CRITICAL: Still missing: {still_missing}")
-        print("   (You might need to manually add these to the patch dict in this script)")
+        print("   (You might need to add these to ALIASES in app/utils/districts.py)")
     else:
         print("✅ FIX SUCCESSFUL. Saving corrected Map...")
         gdf.to_file(GEOJSON_PATH, driver="GeoJSON")
@@ -0,0 +1,260 @@
+import os
+import io
+import zipfile
+import argparse
+import calendar
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+# Same layout as the real downloads (era5/, gadm/, pak_pop/), but in a scratch
+# folder by default: existing files are kept, so writing into a real data/raw
+# would quietly fill its gaps with fixtures. Pipeline scripts read data/raw
+# relative to the working directory, so generate into <workspace>/data/raw and
+# run them from <workspace>.
+OUTPUT_ROOT = "data/synthetic"
+ERA5_SUBDIR = "era5"
+GADM_SUBDIR = "gadm"
+WORLDPOP_SUBDIR = "pak_pop"
+
+BBOX = {'north': 37.5, 'west': 60.5, 'south': 23.5, 'east': 77.5}  # Same box as download_data_cds.py
+ERA5_RES = 0.1          # ERA5-Land grid spacing (degrees)
+WORLDPOP_RES = 1 / 120  # ~1km WorldPop grid
+NATIONAL_DISTRICTS = 141
+NATIONAL_POPULATION = 240_000_000
+PROVINCES = ["Punjab", "Sindh", "Khyber-Pakhtunkhwa", "Balochistan", "Gilgit-Baltistan", "Azad Kashmir"]
+
+# Raw GADM spellings that the cleaning scripts are expected to fix
+GADM_QUIRKS = ["Karachi west", "Gujranwala 1", "Gujranwala 2", "Jakobabad", "M. B. Din", "N. Waziristan"]
+
+SEED = 42
+
+
+def scaled_grid(res, scale):
+    """Lat (descending, like ERA5) and lon axes over the bounding box; `scale` multiplies the cell count."""
+    step = res / np.sqrt(scale)
+    lat = np.arange(BBOX['north'], BBOX['south'] - step / 2, -step)
+    lon = np.arange(BBOX['west'], BBOX['east'] + step / 2, step)
+    return lat.round(6), lon.round(6)
+
+
+# ==========================================
+# 1. ERA5-LAND MONTHS (NetCDF)
+# ==========================================
+def write_era5_month(path, year, month, lat, lon, rng, chunk_days=1):
+    """
+    Streams one month of hourly ERA5-Land-like fields to NetCDF, a day at a time,
+    so memory stays at one day of grid regardless of the grid size.
+    """
+    import netCDF4
+
+    n_days = calendar.monthrange(year, month)[1]
+    t0 = pd.Timestamp(year=year, month=month, day=1)
+    n_lat, n_lon = len(lat), len(lon)
+
+    # Static spatial structure: hotter south/west, cooler north (mountains)
+    lat2d, lon2d = np.meshgrid(lat, lon, indexing='ij')
+    base_k = (273.15 + 34 - 0.9 * (lat2d - 24) - 0.15 * (lon2d - 66) + (month - 4) * 1.2 - abs(month - 6) * 1.5).astype('float32')
+    coast = np.exp(-((lat2d - 24.8) ** 2 + (lon2d - 67.0) ** 2) / 4).astype('float32')
+
+    with netCDF4.Dataset(path, 'w', format='NETCDF4') as nc:
+        nc.createDimension('valid_time', None)
+        nc.createDimension('latitude', n_lat)
+        nc.createDimension('longitude', n_lon)
+
+        v_time = nc.createVariable('valid_time', 'i8', ('valid_time',))
+        v_time.units = "seconds since 1970-01-01"
+        v_time.calendar = "proleptic_gregorian"
+        v_lat = nc.createVariable('latitude', 'f8', ('latitude',))
+        v_lat.units = "degrees_north"
+        v_lon = nc.createVariable('longitude', 'f8', ('longitude',))
+        v_lon.units = "degrees_east"
+        v_lat[:] = lat
+        v_lon[:] = lon
+        nc.createVariable('number', 'i8', ()).assignValue(0)
+
+        specs = {
+            't2m': ("K", "2 metre temperature"),
+            'd2m': ("K", "2 metre dewpoint temperature"),
+            'u10': ("m s**-1", "10 metre U wind component"),
+            'v10': ("m s**-1", "10 metre V wind component"),
+            'ssrd': ("J m**-2", "Surface short-wave (solar) radiation downwards"),
+            'tp': ("m", "Total precipitation"),
+        }
+        chunks = (24, min(n_lat, 128), min(n_lon, 128))
+        out = {}
+        for name, (units, long_name) in specs.items():
+            var = nc.createVariable(name, 'f4', ('valid_time', 'latitude', 'longitude'),
+                                    zlib=True, complevel=1, chunksizes=chunks, fill_value=np.float32(np.nan))
+            var.units = units
+            var.long_name = long_name
+            out[name] = var
+
+        hours_local = (np.arange(24) + 5) % 24  # PKT = UTC+5
+        diurnal = (-np.cos((hours_local - 3) / 24 * 2 * np.pi) * 6).astype('float32')
+        solar_w = np.clip(np.sin((hours_local - 6) / 12 * np.pi), 0, None).astype('float32') * 850
+
+        for day in range(0, n_days, chunk_days):
+            days = min(chunk_days, n_days - day)
+            sl = slice(day * 24, (day + days) * 24)
+            shape = (days * 24, n_lat, n_lon)
+
+            anomaly = rng.normal(0, 2.5, (days, 1, 1)).repeat(24, axis=0).astype('float32')
+            t2m = base_k + np.tile(diurnal, days)[:, None, None] + anomaly + rng.normal(0, 0.6, shape).astype('float32')
+            depression = (14 - 10 * coast + rng.normal(0, 2, shape)).clip(1, 30).astype('float32')
+
+            # ssrd is accumulated since 00 UTC and resets every day
+            hourly_j = (np.tile(solar_w, days)[:, None, None] * 3600 * rng.uniform(0.6, 1.0, shape)).astype('float32')
+            ssrd = np.cumsum(hourly_j.reshape(days, 24, n_lat, n_lon), axis=1).reshape(shape)
+
+            times = t0 + pd.to_timedelta(np.arange(sl.start, sl.stop), unit='h')
+            v_time[sl] = (times - pd.Timestamp("1970-01-01")) // pd.Timedelta(seconds=1)
+            out['t2m'][sl] = t2m
+            out['d2m'][sl] = t2m - depression
+            out['u10'][sl] = rng.normal(1.0, 2.5, shape).astype('float32')
+            out['v10'][sl] = rng.normal(0.5, 2.5, shape).astype('float32')
+            out['ssrd'][sl] = ssrd
+            out['tp'][sl] = (rng.gamma(0.05, 0.002, shape)).astype('float32')
+
+
+def masquerade_as_zip(path):
+    """Wraps a NetCDF inside a zip with the same .nc name, like some CDS deliveries."""
+    with open(path, 'rb') as f:
+        payload = f.read()
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr("data_0.nc", payload)
+    with open(path, 'wb') as f:
+        f.write(buffer.getvalue())
+
+
+# ==========================================
+# 2. GADM-LIKE DISTRICTS (Shapefile)
+# ==========================================
+def build_districts(n_districts, rng):
+    """Voronoi districts clipped to the bounding box, with GADM-style NAME_1/NAME_3 columns."""
+    import geopandas as gpd
+    import shapely
+    from shapely.geometry import box
+
+    frame = box(BBOX['west'], BBOX['south'], BBOX['east'], BBOX['north'])
+    seeds = shapely.points(
+        rng.uniform(BBOX['west'], BBOX['east'], n_districts),
+        rng.uniform(BBOX['south'], BBOX['north'], n_districts),
+    )
+    cells = shapely.get_parts(shapely.voronoi_polygons(shapely.multipoints(seeds), extend_to=frame))
+    cells = shapely.intersection(cells, frame)
+
+    names = [f"Synthetic District {i:04d}" for i in range(len(cells))]
+    names[:min(len(GADM_QUIRKS), len(names))] = GADM_QUIRKS[:len(names)]
+    province_idx = np.digitize(shapely.get_y(shapely.centroid(cells)), np.linspace(BBOX['south'], BBOX['north'], len(PROVINCES) + 1)[1:-1])
+
+    return gpd.GeoDataFrame({
+        'GID_3': [f"PAK.{i + 1}_1" for i in range(len(cells))],
+        'NAME_1': [PROVINCES[i] for i in province_idx],
+        'NAME_3': names,
+    }, geometry=list(cells), crs="EPSG:4326")
+
+
+# ==========================================
+# 3. WORLDPOP-LIKE POPULATION (GeoTIFF)
+# ==========================================
+def write_population_raster(path, scale, rng, n_cities=40, block_rows=512):
+    """Lognormal background plus Gaussian city clusters, written in row blocks."""
+    import rasterio
+    from rasterio.transform import from_origin
+
+    lat, lon = scaled_grid(WORLDPOP_RES, scale)
+    height, width = len(lat), len(lon)
+    step = WORLDPOP_RES / np.sqrt(scale)
+    transform = from_origin(BBOX['west'] - step / 2, BBOX['north'] + step / 2, step, step)
+
+    cities = np.column_stack([
+        rng.uniform(BBOX['south'] + 1, BBOX['north'] - 3, n_cities),
+        rng.uniform(BBOX['west'] + 3, BBOX['east'] - 1, n_cities),
+        rng.uniform(0.05, 0.4, n_cities),
+    ])
+    target_per_cell = NATIONAL_POPULATION * scale / (height * width)
+
+    profile = dict(driver='GTiff', height=height, width=width, count=1, dtype='float32',
+                   crs='EPSG:4326', transform=transform, nodata=-99999.0,
+                   tiled=True, blockxsize=256, blockysize=256, compress='deflate')
+
+    with rasterio.open(path, 'w', **profile) as dst:
+        for row0 in range(0, height, block_rows):
+            rows = lat[row0:row0 + block_rows]
+            la, lo = np.meshgrid(rows, lon, indexing='ij')
+            density = rng.lognormal(0, 1, la.shape).astype('float32') * 0.3
+            for c_lat, c_lon, radius in cities:
+                density += 40 * np.exp(-((la - c_lat) ** 2 + (lo - c_lon) ** 2) / (2 * radius ** 2)).astype('float32')
+            data = (density * target_per_cell / 2.5).astype('float32')
+            window = rasterio.windows.Window(0, row0, width, len(rows))
+            dst.write(data[None], window=window)
+
+    return height, width
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write schema-faithful synthetic ERA5/GADM/WorldPop inputs.")
+    parser.add_argument("--root", default=OUTPUT_ROOT,
+                        help="Output root, laid out like data/raw (default: data/synthetic, never the real data/raw).")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="1 = national size; multiplies districts and grid/raster cell counts (e.g. 10).")
+    parser.add_argument("--districts", type=int, default=None, help="Override the district count (e.g. 5 for a smoke test).")
+    parser.add_argument("--years", type=int, nargs="+", default=[2023])
+    parser.add_argument("--months", type=int, nargs="+", default=[4, 5, 6, 7, 8, 9])
+    parser.add_argument("--zip-masquerade", type=int, default=0, help="Wrap this many months as zip files named .nc.")
+    parser.add_argument("--force", action="store_true", help="Overwrite files that already exist.")
+    parser.add_argument("--seed", type=int, default=SEED)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    n_districts = args.districts or int(round(NATIONAL_DISTRICTS * args.scale))
+
+    era5_dir = os.path.join(args.root, ERA5_SUBDIR)
+    gadm_dir = os.path.join(args.root, GADM_SUBDIR)
+    pop_dir = os.path.join(args.root, WORLDPOP_SUBDIR)
+    for d in (era5_dir, gadm_dir, pop_dir):
+        os.makedirs(d, exist_ok=True)
+
+    print(f"🧪 Generating synthetic inputs in {os.path.abspath(args.root)} (scale x{args.scale:g}, {n_districts} districts)\n")
+
+    # 1. Districts
+    shp_path = os.path.join(gadm_dir, "gadm41_PAK_3.shp")
+    if os.path.exists(shp_path) and not args.force:
+        print(f"✅ Found {shp_path}, skipping...")
+    else:
+        gdf = build_districts(n_districts, rng)
+        gdf.to_file(shp_path)
+        print(f"✅ Districts saved to {shp_path} ({len(gdf)} polygons)")
+
+    # 2. Population
+    tif_path = os.path.join(pop_dir, "pak_ppp_2020_1km_Aggregated_UNadj.tif")
+    if os.path.exists(tif_path) and not args.force:
+        print(f"✅ Found {tif_path}, skipping...")
+    else:
+        h, w = write_population_raster(tif_path, args.scale, rng)
+        print(f"✅ Population raster saved to {tif_path} ({w}x{h})")
+
+    # 3. Climate
+    lat, lon = scaled_grid(ERA5_RES, args.scale)
+    print(f"🌡️  ERA5 grid: {len(lat)}x{len(lon)} cells")
+    zipped = 0
+    for year in args.years:
+        for month in args.months:
+            path = os.path.join(era5_dir, f"era5_pakistan_{year}_{month:02d}.nc")
+            if os.path.exists(path) and not args.force:
+                print(f"✅ Found {os.path.basename(path)}, skipping...")
+                continue
+            write_era5_month(path, year, month, lat, lon, rng)
+            if zipped < args.zip_masquerade:
+                masquerade_as_zip(path)
+                zipped += 1
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            print(f"   --> Saved {os.path.basename(path)} ({size_mb:.1f} MB)")
+
+    print(f"\n🎉 Synthetic datasets ready in {args.root}. Run the pipeline from a folder whose data/raw is this root.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import functools
+from contextlib import contextmanager
+
+# --- CONFIGURATION ---
+# Everything is driven by env vars so the pipeline scripts need no flags
+TRACE_PATH = os.environ.get("PIPELINE_TRACE", "data/traces/pipeline_trace.jsonl")
+PROFILE_DIR = os.environ.get("PIPELINE_PROFILE_DIR", "data/traces/profiles")
+PROFILER = os.environ.get("PIPELINE_PROFILE", "").lower()   # "", "cprofile" or "pyinstrument"
+RUN_ID = os.environ.get("PIPELINE_RUN_ID") or time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+RSS_SAMPLE_S = 0.05
+
+try:
+    import psutil
+    _PROCESS = psutil.Process()
+except ImportError:
+    psutil = None
+    _PROCESS = None
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def _rss():
+    return _PROCESS.memory_info().rss if _PROCESS else None
+
+
+class _RssSampler(threading.Thread):
+    """Polls RSS in the background so a stage's peak is captured, not just its end state."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = _rss() or 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(RSS_SAMPLE_S):
+            self.peak = max(self.peak, _rss() or 0)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, _rss() or 0)
+        return self.peak
+
+
+class Stage:
+    """Counters a stage body can fill in while it runs."""
+
+    def __init__(self, name, rows_in=None, **meta):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.meta = meta
+
+    def read(self, path):
+        """Counts the size of an input file (or every file under a directory)."""
+        self.bytes_read += _path_size(path)
+        return path
+
+    def wrote(self, path):
+        """Counts the size of an output file once it has been written."""
+        self.bytes_written += _path_size(path)
+        return path
+
+
+def _path_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _start_profiler():
+    if PROFILER == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    if PROFILER == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("⚠️ pyinstrument not installed, profiling disabled.")
+            return None
+        profiler = Profiler()
+        profiler.start()
+        return profiler
+    return None
+
+
+def _stop_profiler(profiler, name):
+    if profiler is None:
+        return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe = name.replace("/", "_").replace(" ", "_")
+    if PROFILER == "cprofile":
+        profiler.disable()
+        path = os.path.join(PROFILE_DIR, f"{RUN_ID}_{safe}.prof")
+        profiler.dump_stats(path)
+    else:
+        profiler.stop()
+        path = os.path.join(PROFILE_DIR, f"{RUN_ID}_{safe}.html")
+        with open(path, "w") as f:
+            f.write(profiler.output_html())
+    return path
+
+
+def _write_record(record):
+    os.makedirs(os.path.dirname(TRACE_PATH) or ".", exist_ok=True)
+    with _write_lock, open(TRACE_PATH, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+@contextmanager
+def stage(name, rows_in=None, **meta):
+    """
+    Times a pipeline stage and appends one JSON line to the trace:
+    wall/CPU time, peak RSS, rows in/out and bytes read/written.
+
+        with stage("aggregate", rows_in=len(df)) as s:
+            s.read(path)
+            ...
+            s.rows_out = len(out)
+    """
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    parent = stack[-1].name if stack else None
+
+    s = Stage(name, rows_in, **meta)
+    stack.append(s)
+    sampler = _RssSampler() if _PROCESS else None
+    if sampler:
+        sampler.start()
+    rss_start = _rss()
+    profiler = _start_profiler() if not parent else None  # Profile outermost stages only
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    status = "ok"
+    try:
+        yield s
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        wall = time.perf_counter() - wall0
+        cpu = time.process_time() - cpu0
+        peak = sampler.stop() if sampler else None
+        stack.pop()
+
+        record = {
+            'run_id': RUN_ID,
+            'host': socket.gethostname(),
+            'script': os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else None,
+            'stage': name,
+            'parent': parent,
+            'status': status,
+            'started_at': time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(time.time() - wall)),
+            'wall_s': round(wall, 4),
+            'cpu_s': round(cpu, 4),
+            'rss_start_mb': round(rss_start / 1024 ** 2, 1) if rss_start else None,
+            'peak_rss_mb': round(peak / 1024 ** 2, 1) if peak else None,
+            'rows_in': s.rows_in,
+            'rows_out': s.rows_out,
+            'bytes_read': s.bytes_read,
+            'bytes_written': s.bytes_written,
+            'profile': _stop_profiler(profiler, name),
+        }
+        if s.meta:
+            record['meta'] = s.meta
+        _write_record(record)
+
+
+def instrumented(name=None):
+    """Decorator form of `stage`. Uses the function name when no stage name is given."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with stage(name or fn.__name__):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+# ==========================================
+# REPORTING
+# ==========================================
+def load_trace(path=TRACE_PATH):
+    import pandas as pd
+    with open(path) as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def summarize(trace):
+    """One row per (run, stage) with totals, peak memory and row throughput."""
+    summary = trace.groupby(['run_id', 'stage'], sort=False).agg(
+        calls=('wall_s', 'size'),
+        wall_s=('wall_s', 'sum'),
+        cpu_s=('cpu_s', 'sum'),
+        peak_rss_mb=('peak_rss_mb', 'max'),
+        rows_in=('rows_in', 'sum'),
+        rows_out=('rows_out', 'sum'),
+        mb_read=('bytes_read', lambda b: b.sum() / 1024 ** 2),
+        mb_written=('bytes_written', lambda b: b.sum() / 1024 ** 2),
+    ).reset_index()
+    rows = summary['rows_out'].where(summary['rows_out'] > 0, summary['rows_in'])
+    summary['rows_per_s'] = rows / summary['wall_s'].where(summary['wall_s'] > 0)
+    return summary
+
+
+def compare_runs(summary, base_run, new_run):
+    """Side-by-side wall time and peak RSS of two runs, stage by stage."""
+    base = summary[summary['run_id'] == base_run].set_index('stage')
+    new = summary[summary['run_id'] == new_run].set_index('stage')
+    out = base[['wall_s', 'peak_rss_mb']].join(new[['wall_s', 'peak_rss_mb']], how='outer', lsuffix='_base', rsuffix='_new')
+    out['wall_ratio'] = out['wall_s_new'] / out['wall_s_base']
+    return out.sort_values('wall_s_new', ascending=False)
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Summarise pipeline stage traces.")
+    parser.add_argument("--trace", default=TRACE_PATH)
+    parser.add_argument("--run", help="Only show this run id (default: latest).")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE_RUN", "NEW_RUN"))
+    args = parser.parse_args()
+
+    if not os.path.exists(args.trace):
+        print(f"❌ No trace found at {args.trace}. Run a pipeline script first.")
+        return
+
+    summary = summarize(load_trace(args.trace))
+    runs = summary['run_id'].unique()
+    print(f"📈 {len(runs)} run(s) in {args.trace}\n")
+
+    with pd.option_context('display.width', 160, 'display.max_columns', 20):
+        if args.compare:
+            print(compare_runs(summary, *args.compare).round(3))
+        else:
+            run = args.run or runs[-1]
+            print(f"--- RUN {run} ---")
+            print(summary[summary['run_id'] == run].drop(columns='run_id').round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 import os
+import sys
+from instrumentation import stage
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from utils.districts import DistrictRegistry, canonicalize, EXCLUDED, REGISTRY_PATH
+from utils.spatial_graph import SpatialGraph, GRAPH_PATH
 
 # --- CONFIGURATION ---
 SHAPEFILE_PATH = "data/raw/gadm/gadm41_PAK_3.shp"
@@ -10,44 +17,53 @@ APP_DATA_DIR = "app/data"
 os.makedirs(APP_DATA_DIR, exist_ok=True)
 print("  PREPARING MAP & COORDINATES...")
 
-# 1. Load & Simplify
-gdf = gpd.read_file(SHAPEFILE_PATH)
-gdf['geometry'] = gdf['geometry'].simplify(tolerance=0.01, preserve_topology=True)
-gdf = gdf[['NAME_3', 'geometry']].rename(columns={'NAME_3': 'district_name'})
-
-# 2. Clean Names
-name_corrections = {
-    "Jakobabad": "Jacobabad", "Attok": "Attock", "Mirphurkhas": "Mirpur Khas",
-    "Dera Ghazi Kha": "Dera Ghazi Khan", "M. B. Din": "Mandi Bahauddin",
-    "Tando M. Khan": "Tando Muhammad Khan", "Gujarat": "Gujrat", "Karachi west": "Karachi West", 
-    "Gujranwala 1": "Gujranwala", "Gujranwala 2": "Gujranwala",
-    "Narowal 1": "Narowal", "Narowal 2": "Narowal", "Okara 1": "Okara",
-    "Malakand P.A.": "Malakand", "N. Waziristan": "North Waziristan",
-    "S. Waziristan": "South Waziristan", "Adam Khel": "Kohat",
-    "Bhitani": "Lakki Marwat", "Largha Shirani": "Sherani"
-}
-
-gdf['district_name'] = gdf['district_name'].replace(name_corrections).str.strip().str.title()
-gdf = gdf.dissolve(by='district_name', as_index=False)
-
-# 3. [NEW] Extract Centroids for API Calls (Tab 2)
-# We need Lat/Lon to ask Open-Meteo: "What is the weather in Lahore?"
-# Centroids give us the center point of the shape.
-print("   Extracting district centroids (Lat/Lon)...")
-# Calculate centroids on the geometry
-centroids = gdf.geometry.centroid
-gdf['lat'] = centroids.y
-gdf['lon'] = centroids.x
-
-# Save Coordinates Lookup File
-coords_path = os.path.join(APP_DATA_DIR, "district_coords.csv")
-gdf[['district_name', 'lat', 'lon']].to_csv(coords_path, index=False)
-print(f"    Coordinates saved to {coords_path}")
-
-# 4. Save Map (GeoJSON)
-geojson_path = os.path.join(APP_DATA_DIR, "pakistan_districts.geojson")
-gdf.to_file(geojson_path, driver="GeoJSON")
-print(f"    Map saved to {geojson_path}")
+with stage("prepare_map") as s:
+    # 1. Load & Simplify
+    gdf = gpd.read_file(s.read(SHAPEFILE_PATH))
+    s.rows_in = len(gdf)
+    gdf['geometry'] = gdf['geometry'].simplify(tolerance=0.01, preserve_topology=True)
+    gdf = gdf[['NAME_1', 'NAME_3', 'geometry']].rename(columns={'NAME_1': 'province', 'NAME_3': 'district_name'})
+
+    # 2. Clean Names (shared aliases) and tag each district with its registry ID
+    gdf['district_name'] = canonicalize(gdf['district_name'])
+    gdf = gdf[~gdf['district_name'].isin(EXCLUDED)]
+    gdf = gdf.dissolve(by='district_name', as_index=False)
+    registry = DistrictRegistry.load_or_build(gdf['district_name'], REGISTRY_PATH)
+    gdf['district_id'] = registry.ids(gdf['district_name'])
+    # Province per district rides along in the registry (situation reports group by it)
+    registry.extra['province'] = pd.Series(gdf['province'].to_numpy(), index=gdf['district_id']).reindex(range(len(registry))).to_numpy()
+    registry.save(REGISTRY_PATH)
+    gdf = gdf.drop(columns='province')
+
+    # 3. [NEW] Extract Centroids for API Calls (Tab 2)
+    # We need Lat/Lon to ask Open-Meteo: "What is the weather in Lahore?"
+    # Centroids give us the center point of the shape.
+    print("   Extracting district centroids (Lat/Lon)...")
+    # Calculate centroids on the geometry
+    centroids = gdf.geometry.centroid
+    gdf['lat'] = centroids.y
+    gdf['lon'] = centroids.x
+
+    # Save Coordinates Lookup File
+    coords_path = os.path.join(APP_DATA_DIR, "district_coords.csv")
+    gdf[['district_id', 'district_name', 'lat', 'lon']].to_csv(coords_path, index=False)
+    s.wrote(coords_path)
+    print(f"    Coordinates saved to {coords_path}")
+
+    # 4. Save Map (GeoJSON)
+    geojson_path = os.path.join(APP_DATA_DIR, "pakistan_districts.geojson")
+    gdf.to_file(geojson_path, driver="GeoJSON")
+    s.wrote(geojson_path)
+    s.rows_out = len(gdf)
+    print(f"    Map saved to {geojson_path}")
+
+    # 5. Neighbour Graph (spatial features): built once from the dissolved shapes
+    geoms = np.full(len(registry), None, dtype=object)
+    geoms[gdf['district_id'].to_numpy()] = gdf.geometry.to_numpy()
+    graph = SpatialGraph.from_geometries(geoms)
+    graph.save(GRAPH_PATH)
+    s.wrote(GRAPH_PATH)
+    print(f"    Neighbour graph saved to {GRAPH_PATH} ({graph.weights.nnz // 2} borders)")
 
 
 # ==========================================
@@ -55,49 +71,73 @@ print(f"    Map saved to {geojson_path}")
 # ==========================================
 print("\n PREPARING APP DATASETS...")
 
-df = pd.read_csv(TRAINING_DATA_PATH)
-df['time'] = pd.to_datetime(df['time'])
-
-# 1. Baseline Data (For Tab 1: Simulation)
-print("   Creating Seasonal Baseline (2023)...")
-baseline_df = df[df['time'].dt.year == 2023].copy()
-baseline_df['month'] = baseline_df['time'].dt.month
-
-app_baseline = baseline_df.groupby(['district_name', 'month'])[
-    ['population_2020', 'pop_log', 'temp_c', 'humidity_relative', 
-     'wind_speed_m_s', 'solar_w_m2', 'temp_roll_24h', 'hi_max_72h']
-].mean().reset_index()
-
-baseline_path = os.path.join(APP_DATA_DIR, "app_baseline.csv")
-app_baseline.to_csv(baseline_path, index=False)
-print(f"Baseline saved to {baseline_path}")
-
-# 2. [NEW] Historical Slice (For Tab 3: Animation)
-# We extract the famous June 2015 Heatwave (June 15 - June 30)
-# This keeps the file size small/fast for the app.
-print("   Creating Historical Slice (June 2015 Heatwave)...")
-start_date = "2015-06-15"
-end_date = "2015-06-30"
-
-history_df = df[
-    (df['time'] >= start_date) & 
-    (df['time'] <= end_date)
-].copy()
-
-# Keep only necessary columns for the animation
-# We need 'risk_lag_1h' here because the animation runs the model prediction live!
-history_cols = [
-    'time', 'district_name', 'population_2020', 'pop_log',
-    'temp_c', 'humidity_relative', 'wind_speed_m_s', 'solar_w_m2',
-    'temp_roll_24h', 'hi_max_72h', 'risk_lag_1h'
-]
-app_history = history_df[history_cols].copy()
-
-# Format time as string for the slider (YYYY-MM-DD HH:00)
-app_history['time_str'] = app_history['time'].dt.strftime('%Y-%m-%d %H:00')
-
-history_path = os.path.join(APP_DATA_DIR, "app_history_2015.csv")
-app_history.to_csv(history_path, index=False)
-print(f"   History slice saved to {history_path} ({len(app_history)} rows)")
+with stage("prepare_app_datasets") as s:
+    df = pd.read_csv(s.read(TRAINING_DATA_PATH))
+    s.rows_in = len(df)
+    df['time'] = pd.to_datetime(df['time'])
+
+    # Integer IDs are the join/group key from here on; names are re-attached by the app
+    df['district_id'] = registry.ids(df['district_name'])
+    df = df[df['district_id'] >= 0].drop(columns=['district_name'])
+
+    # 1. Baseline Data (For Tab 1: Simulation)
+    print("   Creating Seasonal Baseline (2023)...")
+    baseline_df = df[df['time'].dt.year == 2023].copy()
+    baseline_df['month'] = baseline_df['time'].dt.month
+
+    app_baseline = baseline_df.groupby(['district_id', 'month'])[
+        ['population_2020', 'pop_log', 'temp_c', 'humidity_relative', 
+         'wind_speed_m_s', 'solar_w_m2', 'temp_roll_24h', 'hi_max_72h']
+    ].mean().reset_index()
+    app_baseline.insert(1, 'district_name', registry.names[app_baseline['district_id']])
+
+    baseline_path = os.path.join(APP_DATA_DIR, "app_baseline.csv")
+    app_baseline.to_csv(baseline_path, index=False)
+    s.wrote(baseline_path)
+    print(f"Baseline saved to {baseline_path}")
+
+    # 1b. Hourly Season (For Tab 1: Season Simulation)
+    # Raw weather inputs only; the app rebuilds physics and lag features per scenario
+    print("   Creating Hourly Season (2023)...")
+    season_cols = ['time', 'district_id', 'population_2020',
+                   'temp_c', 'humidity_relative', 'wind_speed_m_s', 'solar_w_m2']
+    app_season = baseline_df[season_cols].copy()
+    float_cols = ['temp_c', 'humidity_relative', 'wind_speed_m_s', 'solar_w_m2']
+    app_season[float_cols] = app_season[float_cols].astype('float32')
+
+    season_path = os.path.join(APP_DATA_DIR, "app_season_2023.parquet")
+    app_season.to_parquet(season_path, index=False)
+    s.wrote(season_path)
+    print(f"   Hourly season saved to {season_path} ({len(app_season)} rows)")
+
+    # 2. [NEW] Historical Slice (For Tab 3: Animation)
+    # We extract the famous June 2015 Heatwave (June 15 - June 30)
+    # This keeps the file size small/fast for the app.
+    print("   Creating Historical Slice (June 2015 Heatwave)...")
+    start_date = "2015-06-15"
+    end_date = "2015-06-30"
+
+    history_df = df[
+        (df['time'] >= start_date) & 
+        (df['time'] <= end_date)
+    ].copy()
+
+    # Keep only necessary columns for the animation
+    # We need 'risk_lag_1h' here because the animation runs the model prediction live!
+    history_cols = [
+        'time', 'district_id', 'population_2020', 'pop_log',
+        'temp_c', 'humidity_relative', 'wind_speed_m_s', 'solar_w_m2',
+        'temp_roll_24h', 'hi_max_72h', 'risk_lag_1h'
+    ]
+    app_history = history_df[history_cols].copy()
+
+    # Format time as string for the slider (YYYY-MM-DD HH:00)
+    app_history['time_str'] = app_history['time'].dt.strftime('%Y-%m-%d %H:00')
+
+    history_path = os.path.join(APP_DATA_DIR, "app_history_2015.csv")
+    app_history.to_csv(history_path, index=False)
+    s.wrote(history_path)
+    s.rows_out = len(app_baseline) + len(app_season) + len(app_history)
+    print(f"   History slice saved to {history_path} ({len(app_history)} rows)")
 
 print("\n All App Data Ready! Proceed to streamlit_app.py")
\ No newline at end of file
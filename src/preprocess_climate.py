@@ -6,6 +6,9 @@ import regionmask
 import pandas as pd
 import numpy as np
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+from instrumentation import stage, instrumented
+from build_era5_zarr import STORE_PATH, TIME_CHUNK, open_store
 
 # Suppress warnings
 warnings.filterwarnings("ignore")
@@ -14,6 +17,8 @@ warnings.filterwarnings("ignore")
 ERA5_DIR = "data/raw/era5"
 SHAPEFILE_PATH = "data/raw/gadm/gadm41_PAK_3.shp"
 OUTPUT_DIR = "data/interim"
+BLOCK_HOURS = 4 * TIME_CHUNK    # Hours per worker task when reading the Zarr store (whole chunks only)
+WORKERS = os.cpu_count()
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 VAR_MAP = {
@@ -24,6 +29,46 @@ VAR_MAP = {
     'ssrd': 'solar_rad'     # Solar Radiation
 }
 
+def aggregate_to_districts(ds, mask, district_mapper):
+    """Zonal mean of every ERA5 variable per district, returned as a float32 DataFrame."""
+    ds_district = ds.groupby(mask).mean('stacked_latitude_longitude')
+    df = ds_district.to_dataframe().reset_index()
+    
+    # --- FIX: Standardize Time Column Name ---
+    if 'valid_time' in df.columns:
+        df = df.rename(columns={'valid_time': 'time'})
+    
+    # Identify the ID column
+    possible_id_cols = ['region', 'district_id', 'mask']
+    id_col = next((c for c in possible_id_cols if c in df.columns), None)
+    
+    if id_col is None:
+        print(f"       Could not find ID column. Available: {df.columns}")
+        return None
+
+    # Map Name
+    df['district_name'] = df[id_col].map(district_mapper)
+    
+    # Cleanup
+    df = df.dropna(subset=['district_name'])
+    if id_col in df.columns:
+        df = df.drop(columns=[id_col])
+        
+    cols = [c for c in df.columns if df[c].dtype == 'float64']
+    df[cols] = df[cols].astype('float32')
+    return df
+
+def aggregate_block(t0, t1, mask, district_mapper):
+    """Worker: loads one time block from the Zarr store (its chunks only) and aggregates it."""
+    with stage("aggregate_block", hours=f"{t0}-{t1}") as s:
+        with open_store(STORE_PATH) as ds:
+            ds = ds.isel(time=slice(t0, t1)).rename({k: v for k, v in VAR_MAP.items() if k in ds}).load()
+        s.rows_in = int(np.prod(list(ds.sizes.values())))
+        df = aggregate_to_districts(ds, mask, district_mapper)
+        s.rows_out = 0 if df is None else len(df)
+    return df
+
+@instrumented("preprocess_climate")
 def preprocess_era5():
     print(f"🗺️  Loading District Map from {SHAPEFILE_PATH}...")
     districts = gpd.read_file(SHAPEFILE_PATH)
@@ -32,59 +77,62 @@ def preprocess_era5():
     districts = districts[['district_id', 'NAME_3', 'geometry']]
     print(f"   ✅ Map Loaded. Found {len(districts)} districts.")
     
-    nc_files = sorted(glob.glob(os.path.join(ERA5_DIR, "*.nc")))
-    print(f"found {len(nc_files)} weather files to process.")
+    # Prefer the consolidated Zarr store (build_era5_zarr.py) over the monthly files
+    use_store = os.path.exists(STORE_PATH)
+    nc_files = [] if use_store else sorted(glob.glob(os.path.join(ERA5_DIR, "*.nc")))
+    if use_store:
+        print(f"reading weather from {STORE_PATH}.")
+    else:
+        print(f"found {len(nc_files)} weather files to process.")
 
     all_data = []
+    district_mapper = districts.set_index('district_id')['NAME_3']
 
     print("   🎭 Creating Spatial Mask...")
-    first_ds = xr.open_dataset(nc_files[0], engine="netcdf4")
-    mask = regionmask.mask_geopandas(
-        districts, 
-        first_ds.longitude, 
-        first_ds.latitude, 
-        numbers='district_id'
-    )
-    mask.name = 'region' 
-    first_ds.close()
+    with stage("build_mask", rows_in=len(districts)):
+        first_ds = open_store(STORE_PATH) if use_store else xr.open_dataset(nc_files[0], engine="netcdf4")
+        mask = regionmask.mask_geopandas(
+            districts, 
+            first_ds.longitude, 
+            first_ds.latitude, 
+            numbers='district_id'
+        )
+        mask.name = 'region' 
+        n_hours = first_ds.sizes.get('time', 0)
+        first_ds.close()
+
+    if use_store:
+        # Time blocks in parallel; every worker opens the store itself, so there is
+        # no shared file handle and each one decodes only the chunks of its block
+        blocks = [(t0, min(t0 + BLOCK_HOURS, n_hours)) for t0 in range(0, n_hours, BLOCK_HOURS)]
+        print(f"   ⚡ Aggregating {len(blocks)} blocks of {BLOCK_HOURS} hours on {WORKERS} workers...")
+        with ProcessPoolExecutor(WORKERS) as pool:
+            futures = [pool.submit(aggregate_block, t0, t1, mask, district_mapper) for t0, t1 in blocks]
+            for (t0, t1), fut in zip(blocks, futures):
+                try:
+                    df = fut.result()
+                    if df is not None:
+                        all_data.append(df)
+                except Exception as e:
+                    print(f"    Error processing hours {t0}-{t1}: {e}")
 
     for f in nc_files:
         filename = os.path.basename(f)
         print(f"   ⚡ Processing: {filename}...")
         
         try:
-            ds = xr.open_dataset(f, engine="netcdf4")
-            ds = ds.rename({k: v for k, v in VAR_MAP.items() if k in ds})
-            
-            ds_district = ds.groupby(mask).mean('stacked_latitude_longitude')
-            df = ds_district.to_dataframe().reset_index()
-            
-            # --- FIX: Standardize Time Column Name ---
-            if 'valid_time' in df.columns:
-                df = df.rename(columns={'valid_time': 'time'})
-            
-            # Identify the ID column
-            possible_id_cols = ['region', 'district_id', 'mask']
-            id_col = next((c for c in possible_id_cols if c in df.columns), None)
-            
-            if id_col is None:
-                print(f"       Could not find ID column. Available: {df.columns}")
-                continue
-
-            # Map Name
-            district_mapper = districts.set_index('district_id')['NAME_3']
-            df['district_name'] = df[id_col].map(district_mapper)
-            
-            # Cleanup
-            df = df.dropna(subset=['district_name'])
-            if id_col in df.columns:
-                df = df.drop(columns=[id_col])
+            with stage("aggregate_month", file=filename) as s:
+                ds = xr.open_dataset(s.read(f), engine="netcdf4")
+                ds = ds.rename({k: v for k, v in VAR_MAP.items() if k in ds})
+                s.rows_in = int(np.prod([ds.sizes[d] for d in ds.dims]))
                 
-            cols = [c for c in df.columns if df[c].dtype == 'float64']
-            df[cols] = df[cols].astype('float32')
-            
-            all_data.append(df)
-            ds.close()
+                df = aggregate_to_districts(ds, mask, district_mapper)
+                if df is None:
+                    continue
+                s.rows_out = len(df)
+                
+                all_data.append(df)
+                ds.close()
             
         except Exception as e:
             print(f"    Error processing {filename}: {e}")
@@ -94,16 +142,20 @@ def preprocess_era5():
         return
 
     print("\n🔗 Merging all months together...")
-    final_df = pd.concat(all_data, ignore_index=True)
-    
-    # Debug print to be sure
-    print(f"   Columns available: {list(final_df.columns)}")
-    
-    # Sort
-    final_df = final_df.sort_values(['time', 'district_name'])
-    
-    output_path = os.path.join(OUTPUT_DIR, "pakistan_district_climate_history.csv")
-    final_df.to_csv(output_path, index=False)
+    with stage("merge_and_save") as s:
+        final_df = pd.concat(all_data, ignore_index=True)
+        s.rows_in = len(final_df)
+        
+        # Debug print to be sure
+        print(f"   Columns available: {list(final_df.columns)}")
+        
+        # Sort
+        final_df = final_df.sort_values(['time', 'district_name'])
+        
+        output_path = os.path.join(OUTPUT_DIR, "pakistan_district_climate_history.csv")
+        final_df.to_csv(output_path, index=False)
+        s.rows_out = len(final_df)
+        s.wrote(output_path)
     
     print(f"🎉 SUCCESS! Master Dataset saved to: {output_path}")
     print(f"   Rows: {len(final_df)}")
@@ -0,0 +1,58 @@
+import os
+import sys
+import argparse
+import pandas as pd
+from instrumentation import stage, instrumented
+
+# Shared store and district registry from the app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from utils.shared_store import publish, list_versions, STORE_DIR
+from utils.districts import DistrictRegistry, REGISTRY_PATH
+
+# --- CONFIGURATION ---
+# Frames are stored exactly as the app's loaders return them (registry-attached,
+# parsed and sorted), so workers map them without any per-process work.
+DEFAULT_STORE = "app/data/shared"
+MODEL_PATH = "models/heat_risk_model.pkl"
+GEOJSON_PATH = "app/data/pakistan_districts.geojson"
+BASELINE_PATH = "app/data/app_baseline.csv"
+HISTORY_PATH = "app/data/app_history_2015.csv"
+SEASON_PATH = "app/data/app_season_2023.parquet"
+
+
+def app_frames(registry):
+    """The loader frames of app/utils/data_loader.py (those whose source file exists)."""
+    frames = {'baseline': registry.attach(pd.read_csv(BASELINE_PATH))}
+    if os.path.exists(HISTORY_PATH):
+        df = registry.attach(pd.read_csv(HISTORY_PATH))
+        df['time'] = pd.to_datetime(df['time'])
+        frames['history'] = df.sort_values('time').reset_index(drop=True)
+    if os.path.exists(SEASON_PATH):
+        df = registry.attach(pd.read_parquet(SEASON_PATH))
+        df['time'] = pd.to_datetime(df['time'])
+        frames['season'] = df.sort_values(['district_id', 'time']).reset_index(drop=True)
+    return frames
+
+
+@instrumented("publish_shared_store")
+def main():
+    parser = argparse.ArgumentParser(description="Publish the app's model, map and frames as a new shared-store version.")
+    parser.add_argument("--store", default=STORE_DIR or DEFAULT_STORE, help="Defaults to $HEAT_RISK_SHARED_STORE")
+    args = parser.parse_args()
+
+    print(f"📦 Publishing app artifacts to {args.store}...")
+    with stage("read_app_data") as s:
+        frames = app_frames(DistrictRegistry.load(REGISTRY_PATH))
+        s.rows_out = sum(len(df) for df in frames.values())
+
+    with stage("write_version") as s:
+        version = publish(args.store, tables=frames,
+                          files={'heat_risk_model.pkl': MODEL_PATH, 'pakistan_districts.geojson': GEOJSON_PATH})
+        s.wrote(os.path.join(args.store, version))
+
+    print(f"✅ {version} is live ({', '.join(f'{k}={len(v):,}' for k, v in frames.items())}); "
+          f"{len(list_versions(args.store))} versions kept. Workers pick it up on their next rerun.")
+
+
+if __name__ == "__main__":
+    main()
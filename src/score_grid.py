@@ -0,0 +1,377 @@
+import os
+import sys
+import glob
+import argparse
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import joblib
+import numpy as np
+import pandas as pd
+import xarray as xr
+import geopandas as gpd
+import regionmask
+import rasterio
+import zarr
+import pyarrow as pa
+import pyarrow.parquet as pq
+from rasterio.enums import Resampling
+from rasterio.transform import from_origin
+from rasterio.warp import reproject
+from scipy.ndimage import maximum_filter1d
+from instrumentation import stage, instrumented
+from build_era5_zarr import STORE_PATH as ERA5_STORE, open_store
+
+# Shared physics kernel, feature list and district registry from the app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from utils.physics import compute_physics
+from utils.model_engine import REQUIRED_FEATURES, uses_neighbours
+from utils.districts import DistrictRegistry, canonicalize, EXCLUDED, REGISTRY_PATH
+
+warnings.filterwarnings("ignore")
+
+# --- CONFIGURATION ---
+ERA5_DIR = "data/raw/era5"
+SHAPEFILE_PATH = "data/raw/gadm/gadm41_PAK_3.shp"
+POP_RASTER_PATH = "data/raw/pak_pop/pak_ppp_2020_1km_Aggregated_UNadj.tif"
+METADATA_PATH = "data/processed/district_metadata.csv"
+MODEL_PATH = "models/heat_risk_model.pkl"
+GRID_STORE = "data/processed/risk_grid.zarr"
+SUMMARY_PATH = "data/processed/grid_district_summary.parquet"
+
+LAT_CHUNK = 16          # Grid rows per tile; one worker owns a whole band, so writes never overlap
+TIME_CHUNK = 168        # Hours scored per step inside a worker (one week)
+SUMMARY_CHUNK = 168     # Hours aggregated per step when building district summaries
+KELVIN_TO_CELSIUS = 273.15
+SECONDS_PER_HOUR = 3600
+SOLAR_CAP = 1200        # Same artifact cap as Notebook 02
+
+def open_source(path):
+    """One monthly NetCDF file, or the consolidated Zarr store (read chunk by chunk)."""
+    return open_store(path) if path.endswith(".zarr") else xr.open_dataset(path, engine="netcdf4")
+
+
+def time_dim(ds):
+    return 'valid_time' if 'valid_time' in ds.dims else 'time'
+
+
+def read_band(ds, var, t0, t1, i0, i1):
+    """Reads one (time, lat-band) hyperslab of an ERA5 variable as float32, dropping extra dims."""
+    da = ds[var]
+    extra = {d: 0 for d in da.dims if d not in (time_dim(ds), 'latitude', 'longitude')}
+    da = da.isel(extra).isel({time_dim(ds): slice(t0, t1), 'latitude': slice(i0, i1)})
+    return da.values.astype(np.float32)
+
+
+# ==========================================
+# 1. GRID SETUP (Main Process)
+# ==========================================
+def load_districts():
+    """Dissolved district shapes in registry order, so the mask values are registry IDs."""
+    gdf = gpd.read_file(SHAPEFILE_PATH)
+    gdf['district_name'] = canonicalize(gdf['NAME_3'])
+    gdf = gdf[~gdf['district_name'].isin(EXCLUDED)]
+    gdf = gdf.dissolve(by='district_name', as_index=False)[['district_name', 'geometry']]
+    registry = DistrictRegistry.load_or_build(gdf['district_name'], REGISTRY_PATH)
+    gdf['district_id'] = registry.ids(gdf['district_name']).astype(np.int64)
+    gdf = gdf[gdf['district_id'] >= 0].sort_values('district_id').reset_index(drop=True)
+    return gdf, registry
+
+
+def regrid_population(lat, lon):
+    """WorldPop counts summed onto the ERA5 grid (people per cell)."""
+    dx = float(abs(lon[1] - lon[0]))
+    dy = float(abs(lat[1] - lat[0]))
+    flip = lat[0] < lat[-1]
+    top = float(max(lat[0], lat[-1]))
+
+    dst = np.zeros((len(lat), len(lon)), dtype=np.float32)
+    with rasterio.open(POP_RASTER_PATH) as src:
+        reproject(
+            source=rasterio.band(src, 1), destination=dst,
+            dst_transform=from_origin(float(lon[0]) - dx / 2, top + dy / 2, dx, dy),
+            dst_crs="EPSG:4326", dst_nodata=0, resampling=Resampling.sum,
+        )
+    dst = np.clip(np.nan_to_num(dst), 0, None)
+    return dst[::-1] if flip else dst
+
+
+def district_populations(districts, district_id, cell_pop):
+    """District totals from process_maps.py, falling back to the regridded raster."""
+    n_ids = int(districts['district_id'].max()) + 1
+    from_grid = np.bincount(district_id[district_id >= 0], weights=cell_pop[district_id >= 0], minlength=n_ids)
+    pop = pd.Series(from_grid)
+    if os.path.exists(METADATA_PATH):
+        meta = pd.read_csv(METADATA_PATH).set_index('district_id')['population_2020']
+        pop = meta.reindex(pop.index).fillna(pop)
+    return pop.to_numpy(np.float32)
+
+
+def scan_time_axis(files):
+    """Time stamps of every file and each file's offset on the combined axis."""
+    times, offsets = [], []
+    for f in files:
+        with open_source(f) as ds:
+            offsets.append(sum(len(t) for t in times))
+            times.append(ds[time_dim(ds)].values)
+    return np.concatenate(times), offsets
+
+
+def init_store(path, times, lat, lon, district_id, cell_pop, lat_chunk, time_chunk):
+    """Writes coords/static layers and an empty int8 risk array (unwritten chunks read as -1)."""
+    static = xr.Dataset(
+        {
+            'district_id': (('latitude', 'longitude'), district_id.astype(np.int16)),
+            'population': (('latitude', 'longitude'), cell_pop.astype(np.float32)),
+        },
+        coords={'time': times, 'latitude': lat, 'longitude': lon},
+    )
+    static.to_zarr(path, mode='w', consolidated=False)
+
+    root = zarr.open_group(path, mode='r+')
+    root.create_array(
+        'risk', shape=(len(times), len(lat), len(lon)), dtype='int8', fill_value=-1,
+        chunks=(time_chunk, lat_chunk, len(lon)), dimension_names=['time', 'latitude', 'longitude'],
+        attributes={'long_name': 'Predicted heat risk class (0-3, -1 outside districts)'},
+    )
+    zarr.consolidate_metadata(path)
+
+
+# ==========================================
+# 2. TILE SCORING (Worker Processes)
+# ==========================================
+_model = None
+
+
+def _init_worker(model_path):
+    global _model
+    _model = joblib.load(model_path)
+
+
+class BandState:
+    """Hours carried between time chunks of one band, so rolling windows span chunk and file edges."""
+
+    def __init__(self):
+        self.last_time = None
+        self.temp = None        # Previous <= 24 hours
+        self.hi = None          # Previous <= 72 hours
+        self.risk = None        # Previous hour's class
+        self.ssrd = None        # Previous hour's accumulated radiation
+
+    def continues(self, first_time):
+        return self.last_time is not None and first_time - self.last_time == np.timedelta64(1, 'h')
+
+
+def cell_features(state, times, t2m, d2m, u10, v10, ssrd, pop):
+    """
+    Notebook 02/03 features for (T, cells) arrays. Rolling windows look only at
+    earlier hours, the same shift(1) semantics as build_lag_features().
+    """
+    if not state.continues(times[0]):
+        state.__init__()
+    n_t, n_cells = t2m.shape
+
+    temp = t2m - KELVIN_TO_CELSIUS
+    rh, hi, risk = compute_physics(temp, dew_c=d2m - KELVIN_TO_CELSIUS)
+    rh, hi, risk = (a.reshape(n_t, n_cells) for a in (rh, hi, risk))
+
+    # Solar: de-accumulate, clip the midnight reset, J -> W
+    prev = ssrd[:1] if state.ssrd is None else state.ssrd
+    solar = np.clip(np.diff(ssrd, axis=0, prepend=prev), 0, None) / SECONDS_PER_HOUR
+    np.minimum(solar, SOLAR_CAP, out=solar)
+
+    # temp_roll_24h: mean of up to 24 previous hours (fallback: current temp)
+    hist_t = np.empty((0, n_cells), np.float32) if state.temp is None else state.temp
+    ext_t = np.vstack([hist_t, temp]).astype(np.float64)
+    csum = np.vstack([np.zeros((1, n_cells)), np.cumsum(ext_t, axis=0)])
+    end = np.arange(len(hist_t), len(ext_t))
+    start = np.maximum(end - 24, 0)
+    count = (end - start)[:, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        temp_roll = np.where(count > 0, (csum[end] - csum[start]) / np.maximum(count, 1), temp)
+
+    # hi_max_72h: max of up to 72 previous hours (fallback: current HI)
+    hist_h = np.full((72, n_cells), -np.inf, np.float32)
+    if state.hi is not None:
+        hist_h[72 - len(state.hi):] = state.hi
+    ext_h = np.vstack([hist_h, hi])
+    window_max = maximum_filter1d(ext_h, size=72, axis=0, origin=35, mode='nearest')
+    hi_max = window_max[71:71 + n_t]
+    hi_max = np.where(np.isfinite(hi_max), hi_max, hi)
+
+    # risk_lag_1h: previous hour's class (0 at the start of a run)
+    prev_risk = np.zeros((1, n_cells), np.int8) if state.risk is None else state.risk
+    risk_lag = np.vstack([prev_risk, risk[:-1]])
+
+    state.last_time = times[-1]
+    state.temp = ext_t[-24:].astype(np.float32)
+    state.hi = ext_h[-72:]
+    state.risk = risk[-1:]
+    state.ssrd = ssrd[-1:]
+
+    pop_b = np.broadcast_to(pop, (n_t, n_cells))
+    return pd.DataFrame({
+        'population_2020': pop_b.ravel(),
+        'pop_log': np.log10(pop_b + 1).ravel(),
+        'temp_c': temp.ravel(),
+        'humidity_relative': rh.ravel(),
+        'wind_speed_m_s': np.hypot(u10, v10).ravel(),
+        'solar_w_m2': solar.ravel(),
+        'temp_roll_24h': temp_roll.astype(np.float32).ravel(),
+        'hi_max_72h': hi_max.ravel(),
+        'risk_lag_1h': risk_lag.ravel().astype(np.int64),
+    })[REQUIRED_FEATURES]
+
+
+def score_band(store, files, offsets, i0, i1, band_ids, cell_pop_feature, time_chunk):
+    """Scores one latitude band through every file in time order and writes it into the store."""
+    risk_out = zarr.open_array(store, path='risk', mode='r+')
+    inside = band_ids.ravel() >= 0
+    if not inside.any():
+        return i0, 0
+
+    pop = cell_pop_feature.ravel()[inside]
+    shape = band_ids.shape
+    state = BandState()
+    scored = 0
+
+    for f, offset in zip(files, offsets):
+        with open_source(f) as ds:
+            times = ds[time_dim(ds)].values
+            for t0 in range(0, len(times), time_chunk):
+                t1 = min(t0 + time_chunk, len(times))
+                n_t = t1 - t0
+                raw = {v: read_band(ds, v, t0, t1, i0, i1).reshape(n_t, -1)[:, inside]
+                       for v in ('t2m', 'd2m', 'u10', 'v10', 'ssrd')}
+
+                X = cell_features(state, times[t0:t1], raw['t2m'], raw['d2m'], raw['u10'], raw['v10'], raw['ssrd'], pop)
+                preds = _model.predict(X).astype(np.int8)
+
+                block = np.full((n_t, shape[0] * shape[1]), -1, dtype=np.int8)
+                block[:, inside] = preds.reshape(n_t, -1)
+                risk_out[offset + t0:offset + t1, i0:i1, :] = block.reshape(n_t, *shape)
+                scored += len(X)
+    return i0, scored
+
+
+# ==========================================
+# 3. DISTRICT SUMMARIES (Main Process)
+# ==========================================
+def district_summaries(store, registry, out_path, chunk=SUMMARY_CHUNK):
+    """
+    People per predicted class for every district and hour, streamed from the
+    store in time slabs with one weighted bincount per slab.
+    """
+    grid = xr.open_zarr(store)
+    ids = grid['district_id'].values.ravel()
+    inside = ids >= 0
+    ids, pop = ids[inside].astype(np.int64), grid['population'].values.ravel()[inside]
+    n_d = len(registry)
+    risk = grid['risk']
+    writer, rows = None, 0
+
+    for t0 in range(0, risk.sizes['time'], chunk):
+        slab = risk.isel(time=slice(t0, t0 + chunk)).values
+        n_t = slab.shape[0]
+        cls = slab.reshape(n_t, -1)[:, inside].astype(np.int64)
+        scored = cls >= 0
+        key = ((np.arange(n_t)[:, None] * n_d + ids) * 4 + np.clip(cls, 0, 3))[scored]
+
+        people = np.bincount(key, weights=np.broadcast_to(pop, cls.shape)[scored], minlength=n_t * n_d * 4).reshape(n_t * n_d, 4)
+        cells = np.bincount(key, minlength=n_t * n_d * 4).reshape(n_t * n_d, 4)
+        total = people.sum(axis=1)
+
+        df = pd.DataFrame({
+            'time': np.repeat(grid['time'].values[t0:t0 + n_t], n_d),
+            'district_id': np.tile(np.arange(n_d, dtype=np.int16), n_t),
+            'pop_safe': people[:, 0], 'pop_caution': people[:, 1],
+            'pop_danger': people[:, 2], 'pop_extreme': people[:, 3],
+        })
+        with np.errstate(invalid='ignore', divide='ignore'):
+            df['pop_weighted_risk'] = (people @ np.arange(4)) / total
+            df['share_danger_plus'] = (people[:, 2] + people[:, 3]) / total
+        df['max_cell_risk'] = np.where(cells.any(axis=1), 3 - np.argmax(cells[:, ::-1] > 0, axis=1), -1).astype(np.int8)
+        df = df[cells.sum(axis=1) > 0]
+        df.insert(2, 'district_name', registry.categorical(df['district_id']))
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(out_path, table.schema)
+        writer.write_table(table)
+        rows += len(df)
+
+    if writer is not None:
+        writer.close()
+    return rows
+
+
+@instrumented("score_grid")
+def main():
+    parser = argparse.ArgumentParser(description="Score every ERA5 cell and summarise by district.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--lat-chunk", type=int, default=LAT_CHUNK)
+    parser.add_argument("--time-chunk", type=int, default=TIME_CHUNK)
+    parser.add_argument("--summaries-only", action="store_true", help="Rebuild district summaries from an existing store")
+    args = parser.parse_args()
+
+    print(f"🗺️  Loading District Map from {SHAPEFILE_PATH}...")
+    districts, registry = load_districts()
+    print(f"   ✅ {len(districts)} districts.")
+
+    if not args.summaries_only:
+        # Prefer the Zarr store (build_era5_zarr.py): each band reads only its own chunks
+        if os.path.exists(ERA5_STORE):
+            files = [ERA5_STORE]
+            print(f"reading weather from {ERA5_STORE}.")
+        else:
+            files = sorted(glob.glob(os.path.join(ERA5_DIR, "*.nc")))
+            print(f"found {len(files)} weather files to score.")
+        if not files:
+            return
+        if uses_neighbours(joblib.load(MODEL_PATH)):
+            # Cells have no district neighbourhood; score with a model trained on REQUIRED_FEATURES
+            print("   ❌ The model uses district neighbour features, which grid cells do not have.")
+            return
+
+        with stage("grid_setup", rows_in=len(files)) as s:
+            times, offsets = scan_time_axis(files)
+            with open_source(files[0]) as ds:
+                lat, lon = ds.latitude.values, ds.longitude.values
+
+            mask = regionmask.mask_geopandas(districts, lon, lat, numbers='district_id')
+            district_id = np.nan_to_num(mask.values, nan=-1).astype(np.int64)
+            cell_pop = regrid_population(lat, lon)
+            district_pop = district_populations(districts, district_id, cell_pop)
+            pop_feature = np.where(district_id >= 0, district_pop[np.clip(district_id, 0, None)], 0).astype(np.float32)
+
+            init_store(GRID_STORE, times, lat, lon, district_id, cell_pop, args.lat_chunk, args.time_chunk)
+            n_cells = int((district_id >= 0).sum())
+            s.rows_out = n_cells
+            s.wrote(GRID_STORE)
+        print(f"   ✅ Grid {len(lat)}x{len(lon)}, {n_cells:,} land cells, {len(times):,} hours.")
+
+        print(f"⚡ Scoring {len(range(0, len(lat), args.lat_chunk))} latitude bands on {args.workers} workers...")
+        with stage("score_bands", rows_in=len(times) * n_cells) as s:
+            with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(MODEL_PATH,)) as pool:
+                futures = [
+                    pool.submit(score_band, GRID_STORE, files, offsets, i0, i0 + args.lat_chunk,
+                                district_id[i0:i0 + args.lat_chunk], pop_feature[i0:i0 + args.lat_chunk], args.time_chunk)
+                    for i0 in range(0, len(lat), args.lat_chunk)
+                ]
+                s.rows_out = 0
+                for fut in as_completed(futures):
+                    i0, n = fut.result()
+                    s.rows_out += n
+                    if n:
+                        print(f"   band {i0:>4}: {n:,} cell-hours scored")
+        print(f"   ✅ Risk grid written to {GRID_STORE}")
+
+    print("👥 Building population-weighted district summaries...")
+    with stage("district_summaries") as s:
+        rows = district_summaries(GRID_STORE, registry, SUMMARY_PATH)
+        s.rows_out = rows
+        s.wrote(SUMMARY_PATH)
+    print(f"🎉 SUCCESS! {rows:,} district-hours saved to {SUMMARY_PATH}")
+
+
+if __name__ == "__main__":
+    main()
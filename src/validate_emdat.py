@@ -0,0 +1,247 @@
+import os
+import re
+import joblib
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from instrumentation import stage
+
+# --- CONFIGURATION ---
+EMDAT_FILE = "data/raw/emdat/emdat_verification_data.xlsx"
+DATA_PATH = "data/processed/final_training_data.csv"
+ARCHIVE_PATH = "data/processed/prediction_archive.parquet"
+MODEL_PATH = "models/heat_risk_model.pkl"
+OUTPUT_DIR = "data/processed"
+
+FEATURES = [
+    'population_2020', 'pop_log',
+    'temp_c', 'humidity_relative', 'wind_speed_m_s', 'solar_w_m2',
+    'temp_roll_24h', 'hi_max_72h', 'risk_lag_1h'
+]
+
+ALERT_LEVEL = 2        # Danger or worse counts as an alert
+LEAD_WINDOW_H = 72     # Alerts up to 3 days before the reported start count as early warnings
+SCORING_CHUNK = 500_000
+
+# Multi-district cities that EM-DAT reports under a single name
+CITY_PREFIXES = ["Karachi"]
+
+
+def load_emdat_events(path=EMDAT_FILE):
+    """Loads EM-DAT heatwave rows and builds start/end timestamps (same rules as Notebook 05)."""
+    if path.endswith('.xlsx'):
+        heatwaves = pd.read_excel(path)
+    else:
+        heatwaves = pd.read_csv(path)
+
+    heatwaves['Start Day'] = heatwaves['Start Day'].fillna(1).astype(int)
+    heatwaves['End Day'] = heatwaves['End Day'].fillna(28).astype(int)
+
+    heatwaves['start_date'] = pd.to_datetime(dict(
+        year=heatwaves['Start Year'], month=heatwaves['Start Month'], day=heatwaves['Start Day']
+    ))
+    # End day is inclusive, so the window closes at the last hour of that day
+    heatwaves['end_date'] = pd.to_datetime(dict(
+        year=heatwaves['End Year'], month=heatwaves['End Month'], day=heatwaves['End Day']
+    )) + pd.Timedelta(hours=23)
+
+    heatwaves = heatwaves.reset_index(drop=True)
+    heatwaves['event_id'] = heatwaves.index
+    if 'Location' not in heatwaves.columns:
+        heatwaves['Location'] = ""
+    return heatwaves
+
+
+def match_event_districts(heatwaves, district_names):
+    """
+    Expands each event into (event_id, district_name) pairs by matching the
+    free-text EM-DAT 'Location' against known district names.
+    Events with no recognisable district are treated as national.
+    """
+    district_names = sorted(set(district_names))
+    patterns = {d: re.compile(rf"\b{re.escape(d)}\b", re.IGNORECASE) for d in district_names}
+
+    pairs = []
+    for event_id, location in zip(heatwaves['event_id'], heatwaves['Location'].fillna("")):
+        matched = [d for d, pat in patterns.items() if pat.search(location)]
+        for city in CITY_PREFIXES:
+            if re.search(rf"\b{city}\b", location, re.IGNORECASE):
+                matched += [d for d in district_names if d.startswith(city)]
+
+        national = not matched
+        for d in (district_names if national else sorted(set(matched))):
+            pairs.append((event_id, d, national))
+
+    return pd.DataFrame(pairs, columns=['event_id', 'district_name', 'national'])
+
+
+class EventIntervalIndex:
+    """
+    Sorted-array interval index over (district, time).
+
+    Every event window is encoded as a closed interval of int64 keys
+    `district_code * span + hour`, so one searchsorted over the sorted starts
+    finds candidate windows for all predictions at once. Overlapping windows
+    are handled by probing back `depth` positions, where depth is the maximum
+    number of interval starts nested inside any single interval.
+    """
+
+    def __init__(self, codes, start_h, end_h, span):
+        self.span = np.int64(span)
+        lo = codes.astype(np.int64) * self.span + start_h.astype(np.int64)
+        hi = codes.astype(np.int64) * self.span + end_h.astype(np.int64)
+
+        self.order = np.argsort(lo, kind='stable')
+        self.starts = lo[self.order]
+        self.ends = hi[self.order]
+
+        nested = np.searchsorted(self.starts, self.ends, side='right') - np.arange(len(self.starts)) - 1
+        self.depth = int(nested.max()) + 1 if len(nested) else 0
+
+    def join(self, codes, hours):
+        """Returns (row_idx, interval_idx) pairs for every key that falls inside an interval."""
+        keys = codes.astype(np.int64) * self.span + hours.astype(np.int64)
+        right = np.searchsorted(self.starts, keys, side='right') - 1
+
+        rows, hits = [], []
+        for j in range(self.depth):
+            cand = right - j
+            ok = cand >= 0
+            ok[ok] = self.ends[cand[ok]] >= keys[ok]
+            rows.append(np.flatnonzero(ok))
+            hits.append(self.order[cand[ok]])
+
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(rows), np.concatenate(hits)
+
+
+def load_prediction_archive(model=None):
+    """Loads cached predictions, scoring the training data once in chunks if no archive exists."""
+    if os.path.exists(ARCHIVE_PATH):
+        return pd.read_parquet(ARCHIVE_PATH)
+
+    print(f"   No archive at {ARCHIVE_PATH}. Scoring {DATA_PATH}...")
+    if model is None:
+        model = joblib.load(MODEL_PATH)
+
+    with stage("score_archive") as s:
+        parts, names = [], []
+        for chunk in pd.read_csv(s.read(DATA_PATH), chunksize=SCORING_CHUNK):
+            chunk['predicted_risk'] = model.predict(chunk[FEATURES])
+            parts.append(chunk[['time', 'heat_index_c', 'predicted_risk']])
+            names.append(chunk['district_name'].astype('category'))
+
+        # Names stay categorical (int codes + one copy of each string), in memory and in the parquet
+        archive = pd.concat(parts, ignore_index=True)
+        archive.insert(1, 'district_name', union_categoricals(names, sort_categories=True))
+        archive['time'] = pd.to_datetime(archive['time'])
+        archive['predicted_risk'] = archive['predicted_risk'].astype('int8')
+        archive.to_parquet(ARCHIVE_PATH, index=False)
+        s.rows_in = s.rows_out = len(archive)
+        s.wrote(ARCHIVE_PATH)
+    print(f"   Archive saved to {ARCHIVE_PATH} ({len(archive):,} rows)")
+    return archive
+
+
+def validate(heatwaves, archive, alert_level=ALERT_LEVEL, lead_window_h=LEAD_WINDOW_H):
+    """
+    Joins every event window against the whole prediction archive in one
+    vectorised pass and returns (per_event, per_district_event, summary).
+    """
+    names = archive['district_name'].astype('category').cat.remove_unused_categories()
+    districts = pd.Index(names.cat.categories)
+    pairs = match_event_districts(heatwaves, districts)
+    pairs = pairs.merge(heatwaves[['event_id', 'start_date', 'end_date']], on='event_id')
+
+    t0 = archive['time'].min().floor('D') - pd.Timedelta(hours=lead_window_h)
+    to_hours = lambda s: ((s - t0) // pd.Timedelta(hours=1)).to_numpy(np.int64)
+
+    arch_hours = to_hours(archive['time'])
+    span = int(arch_hours.max()) + 1
+
+    arch_codes = names.cat.codes.to_numpy(np.int64)
+    pair_codes = districts.get_indexer(pairs['district_name'])
+    pair_start = to_hours(pairs['start_date'])
+    pair_end = to_hours(pairs['end_date'])
+
+    # Windows are clipped to the archive's hours [0, span): a key outside that range
+    # would wrap into a neighbouring district's block. Windows wholly outside it are left out.
+    window_start = pair_start - lead_window_h
+    covered = (pair_end >= arch_hours.min()) & (window_start < span)
+    pairs['covered'] = covered
+
+    # 1. One interval join over all alert hours
+    alert = archive['predicted_risk'].to_numpy() >= alert_level
+    index = EventIntervalIndex(pair_codes[covered], np.clip(window_start[covered], 0, span - 1),
+                               np.clip(pair_end[covered], 0, span - 1), span)
+    row_idx, pair_idx = index.join(arch_codes[alert], arch_hours[alert])
+    pair_idx = np.flatnonzero(covered)[pair_idx]
+    alert_hours = arch_hours[alert]
+
+    # 2. Per (event, district) hit and lead time
+    hits = pd.DataFrame({'pair': pair_idx, 'hour': alert_hours[row_idx]})
+    first_alert = hits.groupby('pair')['hour'].min()
+    in_event = hits[hits['hour'] >= pair_start[hits['pair']]].groupby('pair').size()
+
+    pairs['hit'] = pairs.index.isin(first_alert.index)
+    pairs['lead_time_h'] = pd.Series(pair_start, index=pairs.index) - first_alert.reindex(pairs.index)
+    pairs['alert_hours_in_event'] = in_event.reindex(pairs.index).fillna(0).astype(int)
+
+    per_event = pairs.groupby('event_id').agg(
+        districts=('district_name', 'size'),
+        districts_hit=('hit', 'sum'),
+        max_lead_time_h=('lead_time_h', 'max'),
+        national=('national', 'first'),
+        covered=('covered', 'any'),
+    )
+    per_event['hit'] = per_event['districts_hit'] > 0
+    per_event = heatwaves.set_index('event_id')[['Location', 'start_date', 'end_date']].join(per_event)
+
+    # 3. False alarms at district-day granularity
+    alert_days = pd.DataFrame({'code': arch_codes[alert], 'day': alert_hours // 24}).drop_duplicates()
+    matched_days = pd.DataFrame({'code': arch_codes[alert][row_idx], 'day': alert_hours[row_idx] // 24}).drop_duplicates()
+    false_alarm_days = len(alert_days) - len(matched_days)
+
+    # Rates are over events the archive covers; the rest cannot be hit or missed
+    scored = per_event[per_event['covered'].fillna(False).astype(bool)]
+    scored_pairs = pairs[pairs['covered']]
+    summary = {
+        'events': int(len(per_event)),
+        'events_covered': int(len(scored)),
+        'events_hit': int(scored['hit'].sum()),
+        'event_hit_rate': float(scored['hit'].mean()) if len(scored) else float('nan'),
+        'district_hit_rate': float(scored_pairs['hit'].mean()) if len(scored_pairs) else float('nan'),
+        'median_lead_time_h': float(pairs['lead_time_h'].median()),
+        'alert_district_days': int(len(alert_days)),
+        'false_alarm_district_days': int(false_alarm_days),
+        'false_alarm_ratio': float(false_alarm_days / len(alert_days)) if len(alert_days) else float('nan'),
+    }
+    return per_event.reset_index(), pairs, summary
+
+
+def main():
+    print(f"🔎 Loading EM-DAT events from {EMDAT_FILE}...")
+    heatwaves = load_emdat_events()
+    print(f"   ✅ {len(heatwaves)} heatwave events loaded.")
+
+    print("📚 Loading prediction archive...")
+    archive = load_prediction_archive()
+    archive['time'] = pd.to_datetime(archive['time'])
+    print(f"   ✅ {len(archive):,} predictions from {archive['time'].min()} to {archive['time'].max()}")
+
+    print("⚡ Running interval join...")
+    with stage("emdat_interval_join", rows_in=len(archive)) as s:
+        per_event, per_district, summary = validate(heatwaves, archive)
+        s.rows_out = len(per_district)
+
+    per_event.to_csv(os.path.join(OUTPUT_DIR, "emdat_validation_events.csv"), index=False)
+    per_district.to_csv(os.path.join(OUTPUT_DIR, "emdat_validation_districts.csv"), index=False)
+
+    print("\n📊 EM-DAT VALIDATION SUMMARY")
+    for k, v in summary.items():
+        print(f"   {k:<28} {v:.3f}" if isinstance(v, float) else f"   {k:<28} {v}")
+
+
+if __name__ == "__main__":
+    main()
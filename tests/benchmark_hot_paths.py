@@ -0,0 +1,423 @@
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# Scripts are run from the repo root (e.g. `python tests/benchmark_hot_paths.py`)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+# --- CONFIGURATION ---
+RESULTS_DIR = os.path.join(ROOT, "tests", "benchmarks")
+LATEST_PATH = os.path.join(RESULTS_DIR, "latest.json")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+MODEL_PATH = os.path.join(ROOT, "models", "heat_risk_model.pkl")
+
+N_DISTRICTS = 141
+REPEATS = 3
+TOLERANCE = 0.20       # Flag anything more than 20% slower than the baseline
+SEED = 42
+
+BENCHMARKS = []
+
+
+def benchmark(name, sizes, quick_sizes=None):
+    """Registers a case. The decorated function takes a size and returns a zero-arg callable."""
+    def wrap(setup):
+        BENCHMARKS.append({'name': name, 'sizes': sizes, 'quick_sizes': quick_sizes or sizes[:1], 'setup': setup})
+        return setup
+    return wrap
+
+
+# ==========================================
+# SYNTHETIC FIXTURES
+# ==========================================
+def district_names(n=N_DISTRICTS):
+    return [f"District {i:03d}" for i in range(n)]
+
+
+def synthetic_weather(n_rows, rng):
+    """Heat-season-like feature rows in the same schema as final_training_data.csv."""
+    temp = rng.normal(33, 6, n_rows).astype('float32')
+    pop = rng.integers(50_000, 15_000_000, n_rows)
+    return pd.DataFrame({
+        'population_2020': pop,
+        'pop_log': np.log10(pop + 1),
+        'temp_c': temp,
+        'humidity_relative': rng.uniform(10, 90, n_rows).astype('float32'),
+        'wind_speed_m_s': rng.gamma(2, 1.5, n_rows).astype('float32'),
+        'solar_w_m2': rng.uniform(0, 1000, n_rows).astype('float32'),
+        'temp_roll_24h': temp - rng.normal(1, 1, n_rows).astype('float32'),
+        'hi_max_72h': temp + rng.uniform(0, 8, n_rows).astype('float32'),
+        'risk_lag_1h': rng.integers(0, 4, n_rows).astype('float32'),
+    })
+
+
+def synthetic_hourly(n_districts, hours, rng, start="2015-06-15"):
+    """District x hour panel with time and district_name columns."""
+    times = pd.date_range(start, periods=hours, freq='h')
+    df = synthetic_weather(n_districts * hours, rng)
+    df.insert(0, 'time', np.tile(times, n_districts))
+    df.insert(1, 'district_name', np.repeat(district_names(n_districts), hours))
+    return df
+
+
+def synthetic_geojson(names):
+    """One square polygon per district on a regular grid."""
+    side = int(np.ceil(np.sqrt(len(names))))
+    features = []
+    for i, name in enumerate(names):
+        x, y = 60.5 + (i % side) * 0.5, 23.5 + (i // side) * 0.5
+        ring = [[x, y], [x + 0.5, y], [x + 0.5, y + 0.5], [x, y + 0.5], [x, y]]
+        features.append({
+            'type': 'Feature',
+            'properties': {'district_name': name},
+            'geometry': {'type': 'Polygon', 'coordinates': [ring]},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+_MODEL = None
+def model():
+    global _MODEL
+    if _MODEL is None:
+        import joblib
+        _MODEL = joblib.load(MODEL_PATH)
+    return _MODEL
+
+
+# ==========================================
+# CASES
+# ==========================================
+@benchmark("calculate_heat_index", sizes=[1_000_000, 10_000_000], quick_sizes=[1_000_000])
+def bench_heat_index(n):
+    from utils.model_engine import calculate_heat_index
+    rng = np.random.default_rng(SEED)
+    temp = pd.Series(rng.normal(33, 6, n).astype('float32'))
+    rh = pd.Series(rng.uniform(10, 90, n).astype('float32'))
+    return lambda: calculate_heat_index(temp, rh)
+
+
+@benchmark("run_prediction", sizes=[1, 141, 1_000_000], quick_sizes=[1, 141])
+def bench_run_prediction(n):
+    from utils.model_engine import run_prediction
+    df = synthetic_weather(n, np.random.default_rng(SEED))
+    m = model()
+    return lambda: run_prediction(m, df)
+
+
+@benchmark("build_lag_features", sizes=[24 * 183, 24 * 183 * 10], quick_sizes=[24 * 30])
+def bench_lag_features(hours):
+    from utils.model_engine import build_lag_features, calculate_heat_index
+    df = synthetic_hourly(N_DISTRICTS, hours, np.random.default_rng(SEED))
+    df['heat_index_c'] = calculate_heat_index(df['temp_c'], df['humidity_relative'])
+    df['risk_score'] = np.digitize(df['heat_index_c'], [27, 32, 41])
+    df = df.drop(columns=['temp_roll_24h', 'hi_max_72h', 'risk_lag_1h'])
+    return lambda: build_lag_features(df)
+
+
+@benchmark("zonal_aggregation", sizes=[24 * 30], quick_sizes=[24 * 7])
+def bench_zonal_aggregation(hours):
+    import xarray as xr
+    from preprocess_climate import aggregate_to_districts
+
+    rng = np.random.default_rng(SEED)
+    lat = np.arange(37.5, 23.4, -0.1)
+    lon = np.arange(60.5, 77.6, 0.1)
+    time_idx = pd.date_range("2023-06-01", periods=hours, freq='h')
+    shape = (hours, len(lat), len(lon))
+    ds = xr.Dataset(
+        {v: (('valid_time', 'latitude', 'longitude'), rng.normal(300, 5, shape).astype('float32'))
+         for v in ['temp_2m', 'dew_point', 'wind_u', 'wind_v', 'solar_rad']},
+        coords={'valid_time': time_idx, 'latitude': lat, 'longitude': lon},
+    )
+
+    # Blocky district mask with ~20% of cells outside Pakistan
+    ids = (np.arange(len(lat))[:, None] // 12) * 12 + (np.arange(len(lon))[None, :] // 14)
+    ids = np.where(rng.random(ids.shape) < 0.2, np.nan, ids % N_DISTRICTS)
+    mask = xr.DataArray(ids, coords={'latitude': lat, 'longitude': lon}, dims=('latitude', 'longitude'), name='region')
+    mapper = pd.Series(district_names(), index=np.arange(N_DISTRICTS))
+    return lambda: aggregate_to_districts(ds, mask, mapper)
+
+
+@benchmark("dashboard_simulate_and_style", sizes=[N_DISTRICTS])
+def bench_dashboard(n):
+    from views.dashboard import simulate_scenario, style_geojson
+
+    rng = np.random.default_rng(SEED)
+    names = district_names(n)
+    baseline = pd.concat([synthetic_weather(n, rng).assign(district_name=names, month=m) for m in range(4, 10)])
+    geojson = synthetic_geojson(names)
+    m = model()
+
+    def run():
+        df = simulate_scenario(m, baseline, 6, 2.0, 5, 10)
+        return style_geojson(geojson, df)
+    return run
+
+
+@benchmark("history_build_frames", sizes=[24 * 16])
+def bench_history(hours):
+    from views.history import build_animation_frames
+
+    from utils.districts import DistrictRegistry
+
+    hist = synthetic_hourly(N_DISTRICTS, hours, np.random.default_rng(SEED))
+    hist = DistrictRegistry.build(hist['district_name']).attach(hist)    # As load_history() returns it
+    m = model()
+    return lambda: build_animation_frames(hist.copy(), m)
+
+
+@benchmark("district_registry_ids", sizes=[1_000_000, 10_000_000], quick_sizes=[1_000_000])
+def bench_registry_ids(n):
+    from utils.districts import DistrictRegistry
+
+    names = pd.Series(np.array(district_names(), dtype=object)[np.random.default_rng(SEED).integers(0, N_DISTRICTS, n)])
+    registry = DistrictRegistry.build(district_names())
+    return lambda: registry.ids(names)
+
+
+@benchmark("forecast_rollout", sizes=[24 * 7], quick_sizes=[24])
+def bench_forecast_rollout(hours):
+    from utils.forecast_engine import ForecastEngine
+
+    rng = np.random.default_rng(SEED)
+    names = district_names()
+    inputs = synthetic_hourly(N_DISTRICTS, hours + 72, rng)
+    populations = pd.Series(rng.integers(50_000, 15_000_000, N_DISTRICTS), index=names)
+    start = inputs['time'].min() + pd.Timedelta(hours=72)
+    m = model()
+    return lambda: ForecastEngine(m, populations).rollout(inputs, start=start)
+
+
+@benchmark("heatwave_events", sizes=[24 * 365, 24 * 3650], quick_sizes=[24 * 365])
+def bench_heatwave_events(hours):
+    from utils.heatwaves import district_events, link_events, catalogue
+    from utils.spatial_graph import adjacency
+    from utils.districts import DistrictRegistry
+
+    # Diurnal cycle plus multi-day regional anomalies, so runs span nights and neighbours
+    rng = np.random.default_rng(SEED)
+    t = np.arange(hours)
+    days = np.repeat(rng.normal(0, 3, (N_DISTRICTS, hours // 24 + 1)), 24, axis=1)[:, :hours]
+    hi = (33 + 7 * np.sin(2 * np.pi * (t % 24) / 24) + days + rng.normal(0, 1, (N_DISTRICTS, hours))).astype(np.float32)
+    risk = np.digitize(hi, [27, 32, 41]).astype(np.int8)
+    population = rng.integers(50_000, 15_000_000, N_DISTRICTS).astype(float)
+    registry = DistrictRegistry.build(district_names())
+    neighbours = adjacency(synthetic_geojson(district_names()), registry)
+    t0 = pd.Timestamp("2015-01-01")
+
+    def run():
+        events = district_events(risk, hi, population)
+        return catalogue(events, link_events(events, neighbours), t0, registry.names)
+    return run
+
+
+@benchmark("neighbour_features", sizes=[24 * 365, 24 * 3650], quick_sizes=[24 * 365])
+def bench_neighbour_features(hours):
+    from utils.spatial_graph import SpatialGraph
+    from utils.districts import DistrictRegistry
+
+    rng = np.random.default_rng(SEED)
+    registry = DistrictRegistry.build(district_names())
+    graph = SpatialGraph.from_geojson(synthetic_geojson(district_names()), registry)
+    hi = rng.normal(35, 6, (N_DISTRICTS, hours)).astype(np.float32)
+    risk_lag = np.digitize(hi, [27, 32, 41]).astype(np.float32)
+    ids = np.arange(N_DISTRICTS)
+    return lambda: graph.neighbour_features(ids, hi, risk_lag)
+
+
+@benchmark("explain_districts", sizes=[N_DISTRICTS, 10_000], quick_sizes=[N_DISTRICTS])
+def bench_explain(n):
+    from utils.explain import Explainer
+
+    df = synthetic_weather(n, np.random.default_rng(SEED))
+    m = model()
+    return lambda: Explainer(m).explain(df)     # Cold cache: every row goes to the booster
+
+
+@benchmark("drift_monitor", sizes=[24 * 30, 24 * 365], quick_sizes=[24 * 30])
+def bench_drift_monitor(hours):
+    from utils.drift import DriftMonitor
+
+    # One observe() per hour for every district, then the full report; memory stays fixed
+    rng = np.random.default_rng(SEED)
+    reference = DriftMonitor.build_reference(N_DISTRICTS)
+    ref = synthetic_weather(N_DISTRICTS * 24 * 90, rng)
+    ref_ids = np.tile(np.arange(N_DISTRICTS), 24 * 90)
+    for c, sketch in reference.items():
+        sketch.add(ref_ids, ref[c].to_numpy())
+    live = synthetic_weather(N_DISTRICTS * hours, rng)
+    live['time'] = np.repeat(pd.date_range("2024-05-01", periods=hours, freq="h"), N_DISTRICTS)
+    ids = np.arange(N_DISTRICTS)
+    blocks = [live.iloc[i * N_DISTRICTS:(i + 1) * N_DISTRICTS] for i in range(hours)]
+
+    def run():
+        monitor = DriftMonitor(reference)
+        for block in blocks:
+            monitor.observe(ids, block)
+        return monitor.report()
+    return run
+
+
+@benchmark("screen_sites", sizes=[10_000, 100_000], quick_sizes=[10_000])
+def bench_screen_sites(n):
+    from utils.spatial_index import DistrictIndex, weather_cells, site_features
+    from utils.model_engine import run_prediction, REQUIRED_FEATURES
+    from utils.districts import DistrictRegistry
+
+    # Sites scattered over (and just beyond) the map; weather per cell is synthetic
+    rng = np.random.default_rng(SEED)
+    registry = DistrictRegistry.build(district_names())
+    geojson = synthetic_geojson(district_names())
+    lat, lon = rng.uniform(23.3, 30.2, n), rng.uniform(60.3, 67.2, n)
+    population = rng.integers(50_000, 15_000_000, N_DISTRICTS).astype(float)
+    m = model()
+
+    def run():
+        index = DistrictIndex.from_geojson(geojson, registry)
+        ids, _ = index.locate(lat, lon)
+        ok = ids >= 0
+        cells, cell_of_site = weather_cells(lat[ok], lon[ok])
+        current = synthetic_weather(len(cells), rng)[REQUIRED_FEATURES[2:]]
+        features, row = site_features(ids[ok], cell_of_site, current, population)
+        preds, _ = run_prediction(m, features)
+        return preds[row]
+    return run
+
+
+# ==========================================
+# RUNNER
+# ==========================================
+def measure(fn, repeats):
+    """Best-of-N wall time, then one traced run for peak Python/NumPy allocations."""
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'best_s': min(times), 'median_s': float(np.median(times)), 'peak_mb': peak / 1024 ** 2}
+
+
+def run_suite(quick=False, only=None, repeats=REPEATS):
+    """Timings per key; a case that raises is recorded as {'error': ...} so the comparison can fail on it."""
+    results = {}
+    for case in BENCHMARKS:
+        if only and case['name'] not in only:
+            continue
+        for size in (case['quick_sizes'] if quick else case['sizes']):
+            key = f"{case['name']}[{size}]"
+            print(f"⏱️  {key}...", end=" ", flush=True)
+            try:
+                results[key] = measure(case['setup'](size), repeats)
+                r = results[key]
+                print(f"{r['best_s'] * 1000:9.1f} ms | peak {r['peak_mb']:8.1f} MB")
+            except Exception as e:
+                results[key] = {'error': f"{type(e).__name__}: {e}"}
+                print(f"❌ {results[key]['error']}")
+    return results
+
+
+def expected_keys(baseline, results, quick=False, only=None):
+    """
+    Baseline keys this run should have measured: those of the selected cases,
+    except the larger sizes a --quick run skips. Keys of cases that no longer
+    exist are always expected, so removing a case does not go unnoticed.
+    """
+    names = {case['name'] for case in BENCHMARKS}
+    keys = []
+    for key in baseline:
+        name = key.split("[", 1)[0]
+        if only and name not in only:
+            continue
+        if quick and name in names and key not in results:
+            continue
+        keys.append(key)
+    return keys
+
+
+def compare(results, baseline, tolerance=TOLERANCE, quick=False, only=None):
+    """Returns the keys that failed, went missing, or are slower than the baseline by more than `tolerance`."""
+    regressions = []
+    print(f"\n--- Comparison against baseline (tolerance {tolerance:.0%}) ---")
+    for key, r in results.items():
+        if 'error' in r:
+            print(f"   {key:<45} ❌ FAILED ({r['error']})")
+            regressions.append(key)
+            continue
+        if key not in baseline or 'error' in baseline[key]:
+            print(f"   {key:<45} (new)")
+            continue
+        ratio = r['best_s'] / baseline[key]['best_s']
+        flag = "❌ REGRESSION" if ratio > 1 + tolerance else "✅"
+        print(f"   {key:<45} x{ratio:5.2f}  {flag}")
+        if ratio > 1 + tolerance:
+            regressions.append(key)
+    for key in expected_keys(baseline, results, quick, only):
+        if key not in results:
+            print(f"   {key:<45} ❌ MISSING (in the baseline, not measured)")
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline and app hot paths.")
+    parser.add_argument("--quick", action="store_true", help="Smallest size of every case only.")
+    parser.add_argument("--only", nargs="*", help="Case names to run.")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    print(f"🚀 Running benchmarks on {platform.node()} (Python {platform.python_version()})\n")
+    results = run_suite(args.quick, args.only, args.repeats)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    payload = {
+        'timestamp': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'results': results,
+    }
+    with open(LATEST_PATH, 'w') as f:
+        json.dump(payload, f, indent=2)
+    print(f"\n💾 Results saved to {LATEST_PATH}")
+
+    failed = [key for key, r in results.items() if 'error' in r]
+    if args.save_baseline:
+        if failed:
+            print(f"❌ Baseline not updated: {len(failed)} case(s) failed ({', '.join(failed)})")
+            sys.exit(1)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(payload, f, indent=2)
+        print(f"📌 Baseline updated: {BASELINE_PATH}")
+        return
+
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, args.tolerance, args.quick, args.only):
+            sys.exit(1)
+    else:
+        print("   No baseline yet. Run with --save-baseline to create one.")
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+# Scripts are run from the repo root (e.g. `python tests/benchmark_reruns.py`)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# --- CONFIGURATION ---
+RESULTS_PATH = os.path.join(ROOT, "tests", "benchmarks", "reruns.json")
+REPEATS = 5
+TIMEOUT_S = 300
+
+
+def timed_run(at, action=None):
+    """Applies one widget interaction and returns the rerun wall time in ms."""
+    t0 = time.perf_counter()
+    (action(at) if action else at).run()
+    ms = (time.perf_counter() - t0) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return ms
+
+
+def goto(at, page):
+    at.sidebar.radio[0].set_value(page)
+    return at
+
+
+def slider(label, value):
+    return lambda at: next(s for s in at.slider if s.label == label).set_value(value)
+
+
+def submit(label):
+    return lambda at: next(b for b in at.button if b.label == label).click()
+
+
+def selectbox(label, value):
+    return lambda at: next(s for s in at.selectbox if s.label == label).set_value(value)
+
+
+def scenario(at, page, steps, repeats):
+    """Median ms per step; every step is repeated on a fresh session after one warm-up pass."""
+    times = {name: [] for name, _ in steps}
+    for i in range(repeats + 1):
+        goto(at, page).run()
+        for name, action in steps:
+            for a in action:
+                a(at)
+            ms = timed_run(at)
+            if i:                              # First pass only warms the caches
+                times[name].append(ms)
+    return {name: float(np.median(v)) for name, v in times.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-to-update of common widget interactions (AppTest reruns).")
+    parser.add_argument("--app-dir", default=os.path.join(ROOT, "app"), help="App folder whose data/ to use")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--label", default="latest", help="Key to store this run under (e.g. before / after)")
+    args = parser.parse_args()
+
+    app_dir = os.path.abspath(args.app_dir)
+    os.chdir(os.path.dirname(app_dir))           # The app resolves app/data/... from here
+    sys.path.insert(0, app_dir)
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(app_dir, "main.py"), default_timeout=TIMEOUT_S)
+    at.run()
+
+    results = {}
+    results['SIMULATION_ZONE'] = scenario(at, "SIMULATION_ZONE", [
+        ("new_stressor", [slider("GLOBAL_WARMING [dC]", 2.0), submit(">> EXECUTE_SIMULATION")]),
+        ("same_stressor", [submit(">> EXECUTE_SIMULATION")]),
+        ("back_to_start", [slider("GLOBAL_WARMING [dC]", 0.0), submit(">> EXECUTE_SIMULATION")]),
+        ("ensemble_widget", [selectbox("DISTRIBUTION", "NORMAL")]),
+    ], args.repeats)
+    results['LIVE_UPLINK'] = scenario(at, "LIVE_UPLINK", [
+        ("horizon_slider", [slider("HORIZON [DAYS]", 3)]),
+        ("horizon_back", [slider("HORIZON [DAYS]", 7)]),
+    ], args.repeats)
+    results['HISTORICAL_PRESENTATION'] = scenario(at, "HISTORICAL_PRESENTATION", [
+        ("rerun", []),
+    ], args.repeats)
+
+    print(f"⏱️  Median rerun time per interaction ({args.repeats} repeats, warm caches)\n")
+    for page, steps in results.items():
+        for name, ms in steps.items():
+            print(f"   {page:<26} {name:<18} {ms:>9.1f} ms")
+
+    stored = {}
+    if os.path.exists(RESULTS_PATH):
+        with open(RESULTS_PATH) as f:
+            stored = json.load(f)
+    stored[args.label] = results
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, "w") as f:
+        json.dump(stored, f, indent=2)
+
+    if args.label != "before" and "before" in stored:
+        print("\n   vs before:")
+        for page, steps in results.items():
+            for name, ms in steps.items():
+                old = stored["before"].get(page, {}).get(name)
+                if old:
+                    print(f"   {page:<26} {name:<18} {old:>9.1f} -> {ms:>7.1f} ms ({ms / old:.0%})")
+    print(f"\n💾 Results saved to {RESULTS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
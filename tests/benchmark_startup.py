@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import subprocess
+import numpy as np
+
+# Scripts are run from the repo root (e.g. `python tests/benchmark_startup.py`)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP_DIR = os.path.join(ROOT, "app")
+
+# --- CONFIGURATION ---
+RESULTS_PATH = os.path.join(ROOT, "tests", "benchmarks", "startup.json")
+REPEATS = 5
+
+# What one script run imports before routing, old (eager) vs new (lazy) main.py
+COMMON = ["streamlit", "utils.telemetry"]
+EAGER = COMMON + ["utils.data_loader", "views.dashboard", "views.live_monitor", "views.history", "views.diagnostics"]
+LAZY = {
+    "SIMULATION_ZONE": COMMON + ["views.dashboard"],
+    "LIVE_UPLINK": COMMON + ["views.live_monitor"],
+    "HISTORICAL_PRESENTATION": COMMON + ["views.history"],
+}
+
+PROBE = """
+import sys, time, json, importlib
+sys.path.insert(0, {app_dir!r})
+t0 = time.perf_counter()
+for m in {modules!r}:
+    importlib.import_module(m)
+print(json.dumps({{"import_s": time.perf_counter() - t0, "modules_loaded": len(sys.modules)}}))
+"""
+
+
+def cold_import(modules, repeats=REPEATS):
+    """Median import time of `modules` in fresh interpreters (nothing cached in sys.modules)."""
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(app_dir=APP_DIR, modules=modules)],
+            capture_output=True, text=True, check=True, cwd=ROOT,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        'import_s': float(np.median([r['import_s'] for r in runs])),
+        'modules_loaded': runs[-1]['modules_loaded'],
+    }
+
+
+def main():
+    print(f"🚀 Cold import times (median of {REPEATS} fresh interpreters)\n")
+    results = {'eager_all_views': cold_import(EAGER)}
+    for page, modules in LAZY.items():
+        results[f"lazy_{page}"] = cold_import(modules)
+
+    eager = results['eager_all_views']['import_s']
+    print(f"   {'MODE':<34} {'IMPORT [s]':>10} {'MODULES':>8} {'vs EAGER':>9}")
+    for name, r in results.items():
+        print(f"   {name:<34} {r['import_s']:>10.3f} {r['modules_loaded']:>8} {r['import_s'] / eager:>8.0%}")
+
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Saved to {RESULTS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Scripts are run from the repo root (e.g. `python tests/emdat_validation_check.py`)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from validate_emdat import validate
+
+
+def print_status(name, success, message):
+    icon = "✅" if success else "❌"
+    print(f"{icon} [{name}] {message}")
+    return success
+
+
+def archive_2015_2016():
+    """Hourly predictions for Alpha and Beta over 2015-2016; only Alpha alerts, in June 2016."""
+    time = pd.date_range("2015-01-01", "2016-12-31 23:00", freq="h")
+    frames = []
+    for name in ["Alpha", "Beta"]:
+        risk = np.zeros(len(time), dtype=np.int8)
+        if name == "Alpha":
+            risk[(time >= "2016-06-01") & (time < "2016-07-01")] = 3
+        frames.append(pd.DataFrame({'time': time, 'district_name': name, 'heat_index_c': 30.0, 'predicted_risk': risk}))
+    archive = pd.concat(frames, ignore_index=True)
+    archive['district_name'] = archive['district_name'].astype('category')
+    return archive
+
+
+def events(rows):
+    df = pd.DataFrame(rows, columns=['Location', 'start_date', 'end_date'])
+    df['start_date'] = pd.to_datetime(df['start_date'])
+    df['end_date'] = pd.to_datetime(df['end_date']) + pd.Timedelta(hours=23)
+    df['event_id'] = df.index
+    return df
+
+
+def main():
+    archive = archive_2015_2016()
+    heatwaves = events([
+        ("Beta", "2014-06-01", "2014-06-30"),       # Before the archive: must not borrow Alpha's 2016 alerts
+        ("Alpha", "2016-06-05", "2016-06-20"),      # Inside the archive with alerts
+        ("Beta", "2016-06-05", "2016-06-20"),       # Inside the archive without alerts
+        ("Alpha", "2018-06-01", "2018-06-30"),      # After the archive
+    ])
+    per_event, pairs, summary = validate(heatwaves, archive)
+    ok = True
+
+    before = per_event.loc[0]
+    ok &= print_status("BEFORE_ARCHIVE", not before['hit'] and not before['covered'],
+                       f"hit={before['hit']} covered={before['covered']} alert_hours={pairs.loc[0, 'alert_hours_in_event']}")
+    after = per_event.loc[3]
+    ok &= print_status("AFTER_ARCHIVE", not after['hit'] and not after['covered'], f"hit={after['hit']} covered={after['covered']}")
+    ok &= print_status("INSIDE_HIT", bool(per_event.loc[1, 'hit']), f"lead_time_h={pairs.loc[1, 'lead_time_h']}")
+    ok &= print_status("INSIDE_MISS", not per_event.loc[2, 'hit'], f"hit={per_event.loc[2, 'hit']}")
+    ok &= print_status("HIT_RATE", summary['events_covered'] == 2 and summary['event_hit_rate'] == 0.5,
+                       f"events_covered={summary['events_covered']} event_hit_rate={summary['event_hit_rate']}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
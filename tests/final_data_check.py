@@ -120,4 +120,5 @@ else:
         print_status("NASA", False, f"Corrupt CSV: {e}")
 
 print("\n------------------------------------------------")
-print("🎉 If you see 4 Green Checks, you are ready for Preprocessing!")
\ No newline at end of file
+print("🎉 If you see 4 Green Checks, you are ready for Preprocessing!")
+print("   (Samples one file per source. For every file, run tests/scan_archive_integrity.py)")
\ No newline at end of file
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import argparse
+import threading
+import numpy as np
+
+# Scripts are run from the repo root (e.g. `python tests/load_test_prediction_service.py`)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from benchmark_hot_paths import synthetic_weather, model
+from utils.model_engine import REQUIRED_FEATURES
+from utils.prediction_service import start_prediction_server, PredictionClient
+
+# --- CONFIGURATION ---
+CLIENTS = [1, 8, 32]       # Concurrent callers (think: open dashboard sessions)
+ROWS_PER_CALL = 1          # The live monitor scores one row per call
+DURATION_S = 5.0
+SEED = 42
+
+
+def run_load(predict, clients, rows, duration):
+    """Each client thread calls `predict` back to back; returns (calls/s, p50 ms, p95 ms)."""
+    rng = np.random.default_rng(SEED)
+    X = synthetic_weather(rows * 64, rng)[REQUIRED_FEATURES].to_numpy(np.float32)
+    latencies = [[] for _ in range(clients)]
+    stop = time.perf_counter() + duration
+
+    def worker(i):
+        j = 0
+        while time.perf_counter() < stop:
+            x = X[(j % 64) * rows:(j % 64 + 1) * rows]
+            t0 = time.perf_counter()
+            predict(x)
+            latencies[i].append(time.perf_counter() - t0)
+            j += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    lat = np.concatenate([np.asarray(l) for l in latencies]) * 1000
+    return len(lat) / elapsed, np.percentile(lat, 50), np.percentile(lat, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the micro-batching service vs per-call prediction.")
+    parser.add_argument("--clients", type=int, nargs="*", default=CLIENTS)
+    parser.add_argument("--rows", type=int, default=ROWS_PER_CALL)
+    parser.add_argument("--duration", type=float, default=DURATION_S)
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    m = model()
+    server = start_prediction_server(m, port=0, window_ms=args.window_ms)
+    client = PredictionClient(f"http://127.0.0.1:{server.server_address[1]}")
+
+    # Same contract as model_engine.run_prediction
+    def per_call(x):
+        return m.predict(x), m.predict_proba(x)
+
+    rng = np.random.default_rng(SEED)
+    check = synthetic_weather(1000, rng)[REQUIRED_FEATURES].to_numpy(np.float32)
+    preds, probs = client.predict(check)
+    assert (preds == m.predict(check)).all() and np.allclose(probs, m.predict_proba(check), atol=1e-6)
+    print("✅ Service predictions match the in-process model.\n")
+
+    print(f"{'clients':>8} | {'mode':<10} | {'calls/s':>9} | {'p50 ms':>7} | {'p95 ms':>7}")
+    print("-" * 54)
+    for clients in args.clients:
+        for mode, fn in (("per-call", per_call), ("service", client.predict)):
+            rate, p50, p95 = run_load(fn, clients, args.rows, args.duration)
+            print(f"{clients:>8} | {mode:<10} | {rate:>9,.0f} | {p50:>7.2f} | {p95:>7.2f}")
+    batcher = server.RequestHandlerClass.batcher
+    print(f"\n📦 Service scored {batcher.rows:,} rows in {batcher.batches:,} model calls "
+          f"({batcher.rows / max(batcher.batches, 1):.1f} rows per call).")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
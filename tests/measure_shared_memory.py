@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import multiprocessing as mp
+import pandas as pd
+
+# Scripts are run from the repo root (e.g. `python tests/measure_shared_memory.py`)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+# --- CONFIGURATION ---
+WORKERS = [1, 2, 4, 8]      # Server processes behind the load balancer
+MODES = ["local", "shared"]
+
+
+def memory_kb():
+    """(RSS, PSS) of this process. PSS splits shared pages between the processes mapping them."""
+    with open("/proc/self/smaps_rollup") as f:
+        fields = dict(line.split(":", 1) for line in f if ":" in line and not line.startswith(" "))
+    return int(fields['Rss'].split()[0]), int(fields['Pss'].split()[0])
+
+
+def worker(mode, store_dir, barrier, results):
+    """Loads what a server process holds after warm-up, then reports memory while every worker is alive."""
+    import joblib
+    from utils.shared_store import SharedStore
+    from publish_shared_store import app_frames, MODEL_PATH, GEOJSON_PATH
+    from utils.districts import DistrictRegistry, REGISTRY_PATH
+
+    base_rss, base_pss = memory_kb()
+    if mode == "shared":
+        store = SharedStore(store_dir)
+        version = store.current()
+        frames = {name: store.table(name, version) for name in store.manifest(version)['tables']}
+        model = joblib.load(store.path("heat_risk_model.pkl", version))
+        with open(store.path("pakistan_districts.geojson", version)) as f:
+            geojson = json.load(f)
+    else:
+        frames = app_frames(DistrictRegistry.load(REGISTRY_PATH))
+        model = joblib.load(MODEL_PATH)
+        with open(GEOJSON_PATH) as f:
+            geojson = json.load(f)
+
+    # Touch every numeric column, as the views do
+    checksum = sum(float(df[c].sum()) for df in frames.values() for c in df.select_dtypes('number'))
+    barrier.wait()
+    rss, pss = memory_kb()
+    results.put({'rss_mb': (rss - base_rss) / 1024, 'pss_mb': (pss - base_pss) / 1024, 'checksum': checksum,
+                 'objects': (model is not None) + len(geojson['features'])})
+    barrier.wait()      # Stay alive until every worker has measured
+
+
+def measure(mode, n, store_dir):
+    ctx = mp.get_context("spawn")
+    barrier, results = ctx.Barrier(n), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, store_dir, barrier, results)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    rows = [results.get(timeout=600) for _ in procs]
+    for p in procs:
+        p.join()
+    df = pd.DataFrame(rows)
+    return {'mode': mode, 'workers': n, 'rss_total_mb': df['rss_mb'].sum(), 'pss_total_mb': df['pss_mb'].sum(),
+            'pss_per_worker_mb': df['pss_mb'].mean()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Data memory of N app workers: each reading app/data vs mapping the shared store.")
+    parser.add_argument("--workers", type=int, nargs="*", default=WORKERS)
+    parser.add_argument("--store", default=None, help="Published store to map (default: publish to a temp folder)")
+    args = parser.parse_args()
+
+    store_dir = args.store
+    if store_dir is None:
+        from utils.shared_store import publish
+        from publish_shared_store import app_frames, MODEL_PATH, GEOJSON_PATH
+        from utils.districts import DistrictRegistry, REGISTRY_PATH
+        store_dir = tempfile.mkdtemp(prefix="heat_risk_store_")
+        publish(store_dir, tables=app_frames(DistrictRegistry.load(REGISTRY_PATH)),
+                files={'heat_risk_model.pkl': MODEL_PATH, 'pakistan_districts.geojson': GEOJSON_PATH})
+
+    print(f"🧠 Loader memory over and above a bare interpreter (store: {store_dir})")
+    rows = []
+    for n in args.workers:
+        for mode in MODES:
+            t0 = time.perf_counter()
+            rows.append(measure(mode, n, store_dir))
+            print(f"   {mode:>6} x{n:<2}  PSS {rows[-1]['pss_total_mb']:8.1f} MB total | "
+                  f"{rows[-1]['pss_per_worker_mb']:7.1f} MB/worker | RSS {rows[-1]['rss_total_mb']:8.1f} MB "
+                  f"({time.perf_counter() - t0:.1f}s)")
+    print(pd.DataFrame(rows).round(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
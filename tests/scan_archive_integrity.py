@@ -0,0 +1,366 @@
+import os
+import re
+import sys
+import glob
+import json
+import time
+import zipfile
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+BASE_DIR = "data/raw"
+PATHS = {
+    "era5":     os.path.join(BASE_DIR, "era5", "*.nc"),
+    "gadm":     os.path.join(BASE_DIR, "gadm", "*.shp"),
+    "worldpop": os.path.join(BASE_DIR, "pak_pop", "*.tif"),
+    "nasa":     os.path.join(BASE_DIR, "nasa_power", "*.csv"),
+}
+CACHE_PATH = "data/interim/integrity_cache.json"
+REPORT_PATH = "data/interim/integrity_report.json"
+CHECKS_VERSION = 1          # Bump when a check changes, so cached verdicts are re-earned
+
+ERA5_VARIABLES = ['t2m', 'd2m', 'u10', 'v10', 'ssrd']
+ERA5_RANGES = {             # Plausible physical ranges for the sampled slices
+    't2m': (180, 340), 'd2m': (150, 320),
+    'u10': (-80, 80), 'v10': (-80, 80), 'ssrd': (0, 5e7),
+}
+ERA5_SAMPLES = 3            # Time slices read per variable (first, middle, last)
+RASTER_WINDOWS = 16         # Random 256x256 windows read from each raster
+HASH_BYTES = 1 << 20        # Quick hash: size + first and last MiB
+
+
+# ==========================================
+# FINGERPRINTS & CACHE
+# ==========================================
+def quick_hash(path, full=False):
+    """blake2b of the size plus the head and tail of the file (or all of it with full=True)."""
+    h = hashlib.blake2b(digest_size=16)
+    size = os.path.getsize(path)
+    h.update(str(size).encode())
+    with open(path, 'rb') as f:
+        if full or size <= 2 * HASH_BYTES:
+            for block in iter(lambda: f.read(HASH_BYTES), b''):
+                h.update(block)
+        else:
+            h.update(f.read(HASH_BYTES))
+            f.seek(-HASH_BYTES, os.SEEK_END)
+            h.update(f.read(HASH_BYTES))
+    return h.hexdigest()
+
+
+def fingerprint(path, full_hash=False):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': quick_hash(path, full_hash)}
+
+
+def load_cache(path=CACHE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        cache = json.load(f)
+    return cache.get('entries', {}) if cache.get('version') == CHECKS_VERSION else {}
+
+
+def save_cache(entries, path=CACHE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'version': CHECKS_VERSION, 'entries': entries}, f)
+
+
+# ==========================================
+# CHECKS (one file each, run in worker processes)
+# ==========================================
+def file_format(path):
+    """Format from the magic bytes, independent of the extension."""
+    with open(path, 'rb') as f:
+        head = f.read(8)
+    if head.startswith(b'PK\x03\x04'):
+        return "zip"
+    if head.startswith(b'CDF'):
+        return "netcdf3"
+    if head.startswith(b'\x89HDF'):
+        return "netcdf4"
+    return "unknown"
+
+
+def expected_hours(path):
+    """Hours in the month named by the file (era5_pakistan_YYYY_MM.nc), or None."""
+    m = re.search(r'(\d{4})_(\d{2})', os.path.basename(path))
+    if not m:
+        return None, None
+    start = pd.Timestamp(year=int(m.group(1)), month=int(m.group(2)), day=1)
+    return start, start.days_in_month * 24
+
+
+def check_netcdf_dataset(nc, result, start, hours):
+    """Metadata, then a few sampled slices per variable; nothing close to a full read."""
+    variables = {k.lower(): v for k, v in nc.variables.items()}
+    missing = [v for v in ERA5_VARIABLES if v not in variables]
+    if missing:
+        result['errors'].append(f"missing variables {missing}")
+
+    tname = 'valid_time' if 'valid_time' in nc.dimensions else 'time'
+    if tname not in nc.dimensions:
+        result['errors'].append("no time dimension")
+        return
+    n_t = len(nc.dimensions[tname])
+    result['checks']['hours'] = n_t
+    result['checks']['grid'] = [len(nc.dimensions[d]) for d in ('latitude', 'longitude') if d in nc.dimensions]
+
+    if tname in nc.variables:
+        import cftime
+        tvar = nc.variables[tname]
+        times = cftime.num2pydate(tvar[[0, n_t - 1]] if n_t > 1 else tvar[:1], tvar.units)
+        result['checks']['first_time'] = str(times[0])
+        result['checks']['last_time'] = str(times[-1])
+        if start is not None and pd.Timestamp(times[0]).to_period('M') != start.to_period('M'):
+            result['errors'].append(f"first hour {times[0]} is not in the month named by the file")
+    if hours is not None and n_t < hours:
+        result['errors'].append(f"{n_t} hours, expected {hours}")
+
+    idx = sorted({0, n_t // 2, n_t - 1}) if n_t else []
+    for name in ERA5_VARIABLES:
+        if name not in variables:
+            continue
+        var = variables[name]
+        t_axis = var.dimensions.index(tname) if tname in var.dimensions else None
+        for i in idx[:ERA5_SAMPLES]:
+            key = [slice(None)] * var.ndim
+            if t_axis is not None:
+                key[t_axis] = i
+            sample = np.ma.filled(var[tuple(key)].astype(np.float64), np.nan)
+            finite = np.isfinite(sample)
+            if finite.mean() < 0.99:
+                result['errors'].append(f"{name}[{i}]: {1 - finite.mean():.1%} missing values")
+                continue
+            lo, hi = ERA5_RANGES[name]
+            if sample[finite].min() < lo or sample[finite].max() > hi:
+                result['errors'].append(f"{name}[{i}]: values outside {lo}..{hi}")
+
+
+def check_era5(path):
+    import netCDF4
+    result = {'checks': {}, 'errors': [], 'warnings': []}
+    fmt = file_format(path)
+    result['checks']['format'] = fmt
+    start, hours = expected_hours(path)
+
+    if fmt == "zip":
+        # Checked from the archive in memory; the file is left as it is
+        result['warnings'].append("zip archive under a .nc name (build_era5_zarr.py reads it in place)")
+        with zipfile.ZipFile(path) as zf:
+            members = [m for m in zf.namelist() if m.endswith(".nc")]
+            result['checks']['members'] = members
+            if not members:
+                result['errors'].append("zip contains no .nc member")
+            for member in members:
+                with netCDF4.Dataset(member, memory=zf.read(member)) as nc:
+                    sub = {'checks': {}, 'errors': [], 'warnings': []}
+                    check_netcdf_dataset(nc, sub, start, hours)
+                    result['checks'].setdefault('hours', sub['checks'].get('hours'))
+                    result['checks'].setdefault('grid', sub['checks'].get('grid'))
+                    # Each member holds only some variables; judge presence on the union below
+                    result['errors'] += [f"{member}: {e}" for e in sub['errors'] if not e.startswith("missing variables")]
+                    result['checks'].setdefault('variables', []).extend(
+                        v for v in nc.variables if v.lower() in ERA5_VARIABLES)
+            missing = [v for v in ERA5_VARIABLES if v not in {x.lower() for x in result['checks'].get('variables', [])}]
+            if members and missing:
+                result['errors'].append(f"missing variables {missing}")
+    elif fmt in ("netcdf3", "netcdf4"):
+        with netCDF4.Dataset(path) as nc:
+            check_netcdf_dataset(nc, result, start, hours)
+    else:
+        result['errors'].append("not a NetCDF or zip file (bad download or error page?)")
+    return result
+
+
+def check_gadm(path):
+    import pyogrio
+    from shapely import is_valid
+    result = {'checks': {}, 'errors': [], 'warnings': []}
+    for ext in ('.shx', '.dbf', '.prj'):
+        if not os.path.exists(os.path.splitext(path)[0] + ext):
+            result['errors'].append(f"missing sidecar {ext}")
+    if result['errors']:
+        return result
+
+    info = pyogrio.read_info(path)
+    result['checks'].update({'features': int(info['features']), 'crs': info['crs'], 'geometry_type': info['geometry_type']})
+    if info['features'] == 0:
+        result['errors'].append("no features")
+    if not info['crs']:
+        result['errors'].append("no CRS")
+    if os.path.basename(path).endswith("_3.shp") and 'NAME_3' not in list(info['fields']):
+        result['errors'].append("no NAME_3 field")
+
+    sample = pyogrio.read_dataframe(path, max_features=25)
+    invalid = int((~is_valid(sample.geometry.values)).sum())
+    result['checks']['sampled_invalid_geometries'] = invalid
+    if invalid:
+        result['warnings'].append(f"{invalid} of {len(sample)} sampled geometries are invalid")
+    return result
+
+
+def check_worldpop(path):
+    import rasterio
+    from rasterio.windows import Window
+    result = {'checks': {}, 'errors': [], 'warnings': []}
+    with rasterio.open(path) as src:
+        result['checks'].update({'width': src.width, 'height': src.height, 'crs': str(src.crs), 'dtype': src.dtypes[0]})
+        if src.crs is None:
+            result['errors'].append("no CRS")
+
+        # Random windows instead of the whole band: enough to catch truncation and all-zero rasters
+        rng = np.random.default_rng(0)
+        w, h = min(256, src.width), min(256, src.height)
+        peak, valid = 0.0, 0
+        for _ in range(RASTER_WINDOWS):
+            col, row = int(rng.integers(0, src.width - w + 1)), int(rng.integers(0, src.height - h + 1))
+            block = src.read(1, window=Window(col, row, w, h), masked=True)
+            if block.count():
+                valid += int(block.count())
+                peak = max(peak, float(block.max()))
+        # The last row is where a truncated download fails
+        tail = src.read(1, window=Window(0, src.height - 1, src.width, 1), masked=True)
+        result['checks'].update({'sampled_valid_cells': valid, 'sampled_max': peak, 'tail_row_valid': int(tail.count())})
+        if valid and peak <= 0:
+            result['errors'].append("sampled cells are all zero")
+        if not valid:
+            result['warnings'].append("no valid cells in the sampled windows")
+    return result
+
+
+def check_nasa(path):
+    result = {'checks': {}, 'errors': [], 'warnings': []}
+    head = pd.read_csv(path, nrows=10)
+    result['checks'].update({'columns': list(head.columns[:5]), 'sampled_rows': len(head)})
+    if len(head) < 10:
+        result['errors'].append("fewer than 10 rows")
+    return result
+
+
+CHECKERS = {'era5': check_era5, 'gadm': check_gadm, 'worldpop': check_worldpop, 'nasa': check_nasa}
+
+
+def scan_file(kind, path):
+    t0 = time.perf_counter()
+    try:
+        result = CHECKERS[kind](path)
+    except Exception as e:
+        result = {'checks': {}, 'errors': [f"{type(e).__name__}: {e}"], 'warnings': []}
+    result['seconds'] = round(time.perf_counter() - t0, 3)
+    return result
+
+
+# ==========================================
+# ARCHIVE-LEVEL CHECKS
+# ==========================================
+def check_era5_series(entries):
+    """Missing months and grids that differ from the majority across the ERA5 files."""
+    issues = []
+    era5 = [e for e in entries if e['kind'] == 'era5' and expected_hours(e['path'])[0] is not None]
+    if not era5:
+        return issues
+    months = sorted(expected_hours(e['path'])[0].to_period('M') for e in era5)
+    present = set(months)
+    gaps = [str(p) for p in pd.period_range(months[0], months[-1], freq='M') if p not in present]
+    # Download scripts fetch the heat season only, so gaps inside a year are reported as notes
+    if gaps:
+        issues.append({'level': 'warning', 'message': f"months missing between {months[0]} and {months[-1]}: {gaps}"})
+
+    grids = pd.Series({e['path']: tuple(e['checks']['grid']) for e in era5 if e['checks'].get('grid')}, dtype=object)
+    if grids.nunique() > 1:
+        majority = grids.mode().iloc[0]
+        odd = grids[grids != majority].index.tolist()
+        issues.append({'level': 'error', 'message': f"grid differs from {majority} in {odd}"})
+    return issues
+
+
+# ==========================================
+# RUNNER
+# ==========================================
+def discover(paths=PATHS):
+    return [(kind, p) for kind, pattern in paths.items() for p in sorted(glob.glob(pattern))]
+
+
+def run_scan(workers=None, full_hash=False, use_cache=True):
+    files = discover()
+    cache = load_cache() if use_cache else {}
+    entries, todo = [], []
+
+    for kind, path in files:
+        fp = fingerprint(path, full_hash)
+        hit = cache.get(path)
+        if hit and all(hit.get(k) == fp[k] for k in ('size', 'mtime_ns', 'hash')):
+            entries.append({**hit, 'cached': True})
+        else:
+            todo.append((kind, path, fp))
+
+    print(f"🔎 {len(files)} files: {len(files) - len(todo)} cached, {len(todo)} to scan on {workers or os.cpu_count()} workers.")
+    if todo:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = {pool.submit(scan_file, kind, path): (kind, path, fp) for kind, path, fp in todo}
+            for fut in as_completed(futures):
+                kind, path, fp = futures[fut]
+                entry = {'path': path, 'kind': kind, **fp, **fut.result(), 'cached': False}
+                entries.append(entry)
+                icon = "❌" if entry['errors'] else ("⚠️ " if entry['warnings'] else "✅")
+                print(f"   {icon} [{kind}] {os.path.basename(path)} ({entry['seconds']:.2f}s)")
+                for msg in entry['errors']:
+                    print(f"      {msg}")
+
+    entries.sort(key=lambda e: (e['kind'], e['path']))
+    save_cache({e['path']: {k: v for k, v in e.items() if k != 'cached'} for e in entries})
+
+    archive_issues = check_era5_series(entries)
+    by_kind = {k: sum(1 for e in entries if e['kind'] == k) for k in PATHS}
+    report = {
+        'generated': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'base_dir': os.path.abspath(BASE_DIR),
+        'checks_version': CHECKS_VERSION,
+        'summary': {
+            'files': len(entries),
+            'by_kind': by_kind,
+            'failed': sum(1 for e in entries if e['errors']),
+            'warnings': sum(1 for e in entries if e['warnings']),
+            'cached': sum(1 for e in entries if e['cached']),
+            'archive_errors': sum(1 for i in archive_issues if i['level'] == 'error'),
+        },
+        'archive': archive_issues,
+        'files': entries,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check every raw input file (metadata and sampled reads) in parallel.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--full-hash", action="store_true", help="Hash whole files instead of head + tail")
+    parser.add_argument("--no-cache", action="store_true", help="Re-scan every file")
+    parser.add_argument("--report", default=REPORT_PATH)
+    args = parser.parse_args()
+
+    print(f"🚀 Scanning raw inputs in: {os.path.abspath(BASE_DIR)}\n")
+    report = run_scan(args.workers, args.full_hash, not args.no_cache)
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+
+    s = report['summary']
+    for issue in report['archive']:
+        print(f"{'❌' if issue['level'] == 'error' else '⚠️ '} {issue['message']}")
+    missing = [k for k, n in s['by_kind'].items() if n == 0]
+    if missing:
+        print(f"⚠️  No files found for: {missing}")
+    print(f"\n📋 {s['files']} files, {s['failed']} failed, {s['warnings']} with warnings, {s['cached']} from cache.")
+    print(f"💾 Report saved to {args.report}")
+    sys.exit(1 if s['failed'] or s['archive_errors'] else 0)
+
+
+if __name__ == "__main__":
+    main()